@@ -0,0 +1,80 @@
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "hotel_reservation_python_db"))
+
+import db_connection
+import hotel_db as db
+from analytics import roll_up
+from bench_availability import START, build_hotel
+
+
+def loop_report(hotel, start, end):
+    # the old way: walk every reservation and add up each of its nights
+    totals = {}
+    for r in hotel.active_reservations():
+        nights = (r.check_out - r.check_in).days
+        per_night = r.calculate_total_cost() / nights
+        night = r.check_in
+        while night < r.check_out:
+            if start <= night < end:
+                key = (night, r.room.room_type)
+                count, revenue = totals.get(key, (0, 0.0))
+                totals[key] = (count + 1, revenue + per_night)
+            night += datetime.timedelta(days=1)
+    return totals
+
+
+def copy_to_db(hotel):
+    db.init_db()
+    db.add_rooms_bulk([(room.room_number, room.room_type, room.price_per_night) for room in hotel.rooms])
+    reservations = list(hotel.active_reservations())
+    with db_connection.transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO guests (guest_id, name, contact) VALUES (?, ?, ?)",
+            [(i, r.guest.name, r.guest.contact_info) for i, r in enumerate(reservations, start=1)],
+        )
+        cursor.executemany(
+            "INSERT INTO reservations (reservation_id, guest_id, room_number, check_in_date, check_out_date, total_cost) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (r.reservation_id, i, r.room.room_number, r.check_in.isoformat(), r.check_out.isoformat(),
+                 r.calculate_total_cost())
+                for i, r in enumerate(reservations, start=1)
+            ],
+        )
+
+
+def timed(label, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    print(f"  {label:<34}{(time.perf_counter() - started) * 1e3:>10.1f} ms")
+    return result
+
+
+def main():
+    reservations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    hotel, horizon = build_hotel(100, reservations)
+    end = START + datetime.timedelta(days=365)
+    print(f"one year of nightly stats, {hotel.reservation_count()} reservations, {len(hotel.rooms)} rooms "
+          f"(history runs to {horizon})")
+    loop = timed("memory, loop over every night", loop_report, hotel, START, end)
+    memory = timed("memory, difference arrays", hotel.nightly_stats, START, end)
+    with tempfile.TemporaryDirectory() as workdir:
+        db_connection.DB_PATH = os.path.join(workdir, "hotel.db")
+        copy_to_db(hotel)
+        sqlite = timed("sqlite, GROUP BY + window sums", db.nightly_stats, START, end)
+        db_connection.close_connection()
+
+    assert all(loop.get((s.night, s.room_type), (0,))[0] == s.occupied for s in memory)
+    assert [(s.night, s.room_type, s.occupied) for s in memory] == [(s.night, s.room_type, s.occupied) for s in sqlite]
+    total = roll_up(memory, None)[None]
+    print(f"occupancy {total.occupancy:.1%}, ADR {total.adr:.2f}, RevPAR {total.revpar:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bench_availability import START
+
+from modern_hotel_sys import Guest, Hotel
+from room_assignment import BestFit, FirstFit
+
+
+ROOMS_PER_TYPE = 50
+WINDOW = 90
+
+
+def booking_requests(count, seed=1):
+    # short and long stays arriving in random order across the window, the
+    # mix that leaves unsellable one-night holes under first-fit
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        nights = rng.choice([1, 1, 2, 2, 3, 4, 7, 10, 14])
+        check_in = START + datetime.timedelta(days=rng.randrange(WINDOW - nights))
+        requests.append((rng.choice(["Single", "Double", "Suite"]), check_in, nights))
+    return requests
+
+
+def occupancy(hotel):
+    booked = sum((r.check_out - r.check_in).days for r in hotel.active_reservations())
+    return booked / (len(hotel.rooms) * WINDOW)
+
+
+def run(strategy, requests, workdir):
+    hotel = Hotel("Benchmark Hotel", "1 Bench Street", data_file=os.path.join(workdir, "reservations.csv"),
+                  journal_file=os.path.join(workdir, "reservations.journal"), compact_every=sys.maxsize,
+                  assignment_strategy=strategy)
+    hotel.auto_add_rooms(ROOMS_PER_TYPE, ROOMS_PER_TYPE, ROOMS_PER_TYPE)
+    guest = Guest("Bench Guest", "N/A")
+    rejected = []
+    started = time.perf_counter()
+    for room_type, check_in, nights in requests:
+        if hotel.make_reservation(guest, room_type, check_in, nights) is None:
+            rejected.append((room_type, check_in, nights))
+    elapsed = time.perf_counter() - started
+    hotel.compact()
+    return hotel, rejected, elapsed
+
+
+def check_reload(hotel, strategy):
+    # a reload from reservations.csv and the journal puts every booking back
+    # in the room it was confirmed in, repack moves included
+    reloaded = Hotel("Benchmark Hotel", "1 Bench Street", data_file=hotel.data_file,
+                     journal_file=hotel.journal.path, compact_every=sys.maxsize, assignment_strategy=strategy)
+    reloaded.auto_add_rooms(ROOMS_PER_TYPE, ROOMS_PER_TYPE, ROOMS_PER_TYPE)
+    reloaded.load_reservations_from_file()
+    rooms = {r.reservation_id: r.room.room_number for r in hotel.active_reservations()}
+    assert {r.reservation_id: r.room.room_number for r in reloaded.active_reservations()} == rooms
+    reloaded.journal.close()
+
+
+def main():
+    requests = booking_requests(int(sys.argv[1]) if len(sys.argv) > 1 else 6000)
+    rooms = 3 * ROOMS_PER_TYPE
+    print(f"{len(requests)} requests, {rooms} rooms, {WINDOW}-night window")
+    print(f"{'strategy':<22} {'bookings/s':>11} {'booked':>7} {'rejected':>9} {'occupancy':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, strategy in (("first-fit", FirstFit()), ("best-fit", BestFit())):
+            hotel, rejected, elapsed = run(strategy, requests, workdir)
+            booked = len(requests) - len(rejected)
+            print(f"{label:<22} {len(requests) / elapsed:>11.0f} {booked:>7} {len(rejected):>9} {occupancy(hotel):>10.1%}")
+
+            # offline: repack every room type, then retry what was turned away
+            started = time.perf_counter()
+            moved = sum(hotel.repack_room_type(room_type, today=START - datetime.timedelta(days=1))
+                        for room_type in ("Single", "Double", "Suite"))
+            repack_time = time.perf_counter() - started
+            guest = Guest("Bench Guest", "N/A")
+            recovered = sum(1 for request in rejected if hotel.make_reservation(guest, *request))
+            hotel.journal.close()
+            check_reload(hotel, strategy)
+            hotel.journal.truncate()
+            hotel.journal.close()
+            print(f"{'  + repack':<22} {'':>11} {booked + recovered:>7} {len(rejected) - recovered:>9} "
+                  f"{occupancy(hotel):>10.1%}   ({moved} moved in {repack_time * 1e3:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
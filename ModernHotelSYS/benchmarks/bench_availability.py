@@ -0,0 +1,68 @@
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "modernhotelsys_python"))
+
+from modern_hotel_sys import Guest, Hotel, Reservation
+
+
+START = datetime.date(2025, 1, 1)
+
+
+def build_hotel(rooms_per_type, reservation_count, seed=1, **hotel_options):
+    rng = random.Random(seed)
+    hotel = Hotel("Benchmark Hotel", "1 Bench Street", **hotel_options)
+    hotel.auto_add_rooms(rooms_per_type, rooms_per_type, rooms_per_type)
+    # fill every room back to back so each one carries its share of bookings
+    next_free = {room.room_number: START for room in hotel.rooms}
+    for i in range(reservation_count):
+        room = hotel.rooms[i % len(hotel.rooms)]
+        check_in = next_free[room.room_number] + datetime.timedelta(days=rng.randint(0, 2))
+        check_out = check_in + datetime.timedelta(days=rng.randint(1, 7))
+        next_free[room.room_number] = check_out
+        hotel.add_reservation(Reservation(f"RES-{i + 1:03d}", Guest(f"Guest {i}", "N/A"), room, check_in, check_out))
+    horizon = max(next_free.values())
+    return hotel, horizon
+
+
+def linear_is_room_available(hotel, room, check_in, check_out):
+    for r in hotel.active_reservations():
+        if r.room.room_number == room.room_number:
+            if not (check_out <= r.check_in or check_in >= r.check_out):
+                return False
+    return True
+
+
+def time_queries(hotel, queries, is_available):
+    started = time.perf_counter()
+    for room_type, check_in, check_out in queries:
+        for room in hotel.rooms:
+            if room.room_type == room_type and is_available(room, check_in, check_out):
+                break
+    return (time.perf_counter() - started) / len(queries)
+
+
+def main():
+    rooms_per_type = 100
+    query_count = 200
+    print(f"{'reservations':>12} {'indexed (us)':>14} {'linear scan (us)':>18}")
+    for reservation_count in (1000, 10000, 50000, 100000):
+        hotel, horizon = build_hotel(rooms_per_type, reservation_count)
+        rng = random.Random(2)
+        span = (horizon - START).days
+        queries = []
+        for _ in range(query_count):
+            check_in = START + datetime.timedelta(days=rng.randint(0, span))
+            queries.append((rng.choice(["Single", "Double", "Suite"]), check_in, check_in + datetime.timedelta(days=rng.randint(1, 7))))
+        indexed = time_queries(hotel, queries, hotel.is_room_available)
+        # the linear scan is quadratic, so only sample a few queries at scale
+        sample = queries[: max(5, query_count * 1000 // reservation_count)]
+        linear = time_queries(hotel, sample, lambda room, a, b: linear_is_room_available(hotel, room, a, b))
+        print(f"{reservation_count:>12} {indexed * 1e6:>14.1f} {linear * 1e6:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
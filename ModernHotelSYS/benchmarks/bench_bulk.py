@@ -0,0 +1,65 @@
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "hotel_reservation_python_db"))
+
+import db_connection
+import hotel_db as db
+from bench_availability import build_hotel
+
+from modern_hotel_sys import Guest
+
+
+BLOCK = 250
+CHECK_IN = datetime.date(2030, 5, 4)
+ROOM_TYPES = ["Single", "Double", "Suite"]
+
+
+def hotel_block(workdir, bulk):
+    hotel, _ = build_hotel(100, 20000,
+                           data_file=os.path.join(workdir, "reservations.csv"),
+                           journal_file=os.path.join(workdir, f"reservations_{bulk}.journal"))
+    requests = [(Guest(f"Delegate {i}", "N/A"), ROOM_TYPES[i % 3], CHECK_IN, 3) for i in range(BLOCK)]
+    started = time.perf_counter()
+    if bulk:
+        booked = hotel.make_reservations_bulk(requests)
+    else:
+        booked = [hotel.make_reservation(*request) for request in requests]
+    elapsed = time.perf_counter() - started
+    hotel.journal.close()
+    assert len(booked) == BLOCK and all(booked)
+    return elapsed
+
+
+def db_block(workdir, bulk):
+    db_connection.DB_PATH = os.path.join(workdir, f"hotel_{bulk}.db")
+    db.init_db()
+    db.provision_rooms({"floors": {str(f): {"Single": 10, "Double": 10, "Suite": 10} for f in range(1, 11)}})
+    requests = [(f"Delegate {i}", "N/A", ROOM_TYPES[i % 3], CHECK_IN, 3) for i in range(BLOCK)]
+    started = time.perf_counter()
+    if bulk:
+        booked = db.book_rooms_bulk(requests)
+    else:
+        booked = [db.book_room(*request) for request in requests]
+    elapsed = time.perf_counter() - started
+    assert len(booked) == BLOCK and all(booked)
+    # a block larger than what is left must fail without booking anything
+    assert db.book_rooms_bulk(requests) is None
+    assert db_connection.get_connection().execute("SELECT COUNT(*) FROM reservations").fetchone()[0] == BLOCK
+    db_connection.close_connection()
+    return elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{BLOCK}-room group block")
+        print(f"{'backend':<10} {'one by one (ms)':>16} {'bulk (ms)':>10}")
+        print(f"{'memory':<10} {hotel_block(workdir, False) * 1e3:>16.1f} {hotel_block(workdir, True) * 1e3:>10.1f}")
+        print(f"{'sqlite':<10} {db_block(workdir, False) * 1e3:>16.1f} {db_block(workdir, True) * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import datetime
+import time
+
+from bench_availability import START, build_hotel
+
+
+def grid_from_index(hotel, start, days):
+    grid = {}
+    for room in hotel.rooms:
+        grid[room.room_number] = [
+            hotel.is_room_available(room, start + datetime.timedelta(days=i), start + datetime.timedelta(days=i + 1))
+            for i in range(days)
+        ]
+    return grid
+
+
+def timed(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    hotel, horizon = build_hotel(100, 50000)
+    start = START + datetime.timedelta(days=(horizon - START).days // 2)
+    print(f"{len(hotel.rooms)} rooms, {hotel.reservation_count()} reservations")
+    print(f"{'days':>6} {'calendar grid (ms)':>20} {'per-night checks (ms)':>23} {'type counts (ms)':>18}")
+    for days in (30, 60, 90):
+        calendar_time, grid = timed(lambda: hotel.availability_grid(start, days))
+        index_time, expected = timed(lambda: grid_from_index(hotel, start, days), repeat=1)
+        assert grid == expected
+        counts_time, _ = timed(lambda: hotel.free_room_counts(start, days))
+        print(f"{days:>6} {calendar_time * 1e3:>20.2f} {index_time * 1e3:>23.2f} {counts_time * 1e3:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "chain"))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "hotel_reservation_python_db"))
+
+import db_connection
+import hotel_db as db
+from hotel_chain import PropertyRouter
+
+START = datetime.date(2025, 1, 1)
+ROOM_TYPES = ["Single", "Double", "Suite"]
+
+
+def requests(properties, count, seed=1):
+    rng = random.Random(seed)
+    return [
+        (rng.choice(properties), f"Guest {i}", "N/A", rng.choice(ROOM_TYPES),
+         START + datetime.timedelta(days=rng.randrange(365)), rng.randint(1, 4))
+        for i in range(count)
+    ]
+
+
+def one_database(workdir, properties, stays):
+    # every property's rooms in one file behind one write lock
+    db_connection.DB_PATH = os.path.join(workdir, "chain.db")
+    db.init_db()
+    db.add_rooms_bulk([
+        (p * 1000 + floor * 100 + i, room_type, db.ROOM_TYPE_PRICES[room_type])
+        for p in range(1, len(properties) + 1)
+        for floor, room_type in enumerate(ROOM_TYPES, start=1)
+        for i in range(1, 11)
+    ])
+    started = time.perf_counter()
+    booked = sum(db.book_room(*stay[1:]) is not None for stay in stays)
+    elapsed = time.perf_counter() - started
+    db_connection.close_connection()
+    return elapsed, booked
+
+
+def sharded(router, stays):
+    for property_id in router.property_ids:  # open every shard before timing
+        router.quote(property_id, "Single", START, 1)
+    started = time.perf_counter()
+    futures = [router.submit(stay[0], "book", *stay[1:]) for stay in stays]
+    booked = sum(future.result() is not None for future in futures)
+    return time.perf_counter() - started, booked
+
+
+def search(router, queries):
+    # mean time for the whole answer and for the first property's
+    total = first = 0.0
+    for i in range(queries):
+        check_in = START + datetime.timedelta(days=i % 365)
+        started = time.perf_counter()
+        for j, _ in enumerate(router.search_availability("Double", check_in, 2)):
+            if j == 0:
+                first += time.perf_counter() - started
+        total += time.perf_counter() - started
+    return total / queries * 1e3, first / queries * 1e3
+
+
+def main():
+    properties = [f"hotel-{i}" for i in range(int(sys.argv[1]) if len(sys.argv) > 1 else 8)]
+    stays = requests(properties, 4000)
+    print(f"{len(stays)} bookings over {len(properties)} properties, {os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as workdir:
+        elapsed, booked = one_database(workdir, properties, stays)
+        print(f"  {'one database, one writer':<34}{len(stays) / elapsed:>10,.0f} bookings/s ({booked} booked)")
+        for workers in (0, len(properties)):
+            data_dir = os.path.join(workdir, f"shards-{workers}")
+            with PropertyRouter(properties, "sqlite", data_dir, workers) as router:
+                elapsed, booked = sharded(router, stays)
+                print(f"  {f'sharded, {workers} worker processes':<34}{len(stays) / elapsed:>10,.0f} bookings/s "
+                      f"({booked} booked)")
+                per_query, first = search(router, 200)
+                print(f"  {'':<4}cross-property search {per_query:>8.2f} ms, first shard after {first:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "hotel_reservation_python_db"))
+
+import db_connection
+import hotel_db as db
+from bench_analytics import copy_to_db
+from bench_availability import build_hotel
+
+
+def timed(label, func, *args):
+    started = time.perf_counter()
+    rows, watermark = func(*args)
+    print(f"  {label:<34}{(time.perf_counter() - started) * 1e3:>10.1f} ms {rows:>9} rows")
+    return watermark
+
+
+def touch(hotel, count):
+    # the hour's traffic: a few stays lengthened by a night and a few cancelled
+    reservations = list(hotel.active_reservations())
+    step = len(reservations) // count
+    for i, r in enumerate(reservations[::step][:count]):
+        if i % 2:
+            hotel.discard_reservation(r.reservation_id)
+        else:
+            hotel.modify_reservation(r.reservation_id, nights=(r.check_out - r.check_in).days + 1)
+
+
+def main():
+    reservations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    changes = reservations // 100
+    with tempfile.TemporaryDirectory() as workdir:
+        hotel, _ = build_hotel(100, reservations, data_file=os.path.join(workdir, "reservations.csv"),
+                               journal_file=os.path.join(workdir, "reservations.journal"))
+        hotel.load_reservations_from_file()  # numbers the bookings' change sequences
+        export = os.path.join(workdir, "export.csv")
+        print(f"{reservations} reservations, then {changes} edits and cancellations")
+        watermark = timed("memory, full export", hotel.export_changes, export)
+        touch(hotel, changes)
+        timed("memory, changes since watermark", hotel.export_changes, export, watermark)
+
+        db_connection.DB_PATH = os.path.join(workdir, "hotel.db")
+        copy_to_db(hotel)
+        full_export = os.path.join(workdir, "full.csv")
+        watermark = timed("sqlite, full export", db.export_changes, full_export)
+        for r in list(db.iter_reservations())[::reservations // changes][:changes]:
+            db.delete_reservation(r.reservation_id)
+        timed("sqlite, changes since watermark", db.export_changes, export, watermark)
+        db_connection.close_connection()
+
+        # the full export loaded into an empty copy of the hotel
+        db_connection.DB_PATH = os.path.join(workdir, "copy.db")
+        db.init_db()
+        db.add_rooms_bulk([(room.room_number, room.room_type, room.price_per_night) for room in hotel.rooms])
+        started = time.perf_counter()
+        result = db.import_reservations(full_export)
+        print(f"  {'sqlite, import the full export':<34}{(time.perf_counter() - started) * 1e3:>10.1f} ms "
+              f"{result.applied:>9} rows")
+        db_connection.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "hotel_reservation_python_db"))
+
+import db_connection
+import hotel_db as db
+
+
+START = datetime.date(2025, 1, 1)
+
+
+def populate(reservation_count, rooms_per_type=100, seed=1):
+    rng = random.Random(seed)
+    rooms = []
+    for floor, room_type in enumerate(db.ROOM_TYPE_PRICES, start=1):
+        rooms.extend((floor * 1000 + i, room_type, db.ROOM_TYPE_PRICES[room_type]) for i in range(1, rooms_per_type + 1))
+    db.add_rooms_bulk(rooms)
+
+    next_free = {room_number: START for room_number, _, _ in rooms}
+    guests = [(f"Guest {i}", "N/A") for i in range(reservation_count)]
+    reservations = []
+    for i in range(reservation_count):
+        room_number, _, price = rooms[i % len(rooms)]
+        check_in = next_free[room_number] + datetime.timedelta(days=rng.randint(0, 2))
+        nights = rng.randint(1, 7)
+        check_out = check_in + datetime.timedelta(days=nights)
+        next_free[room_number] = check_out
+        reservations.append((f"RES-{i + 1:03d}", i + 1, room_number, check_in.isoformat(), check_out.isoformat(), nights * price))
+    with db_connection.transaction() as cursor:
+        cursor.executemany("INSERT INTO guests (name, contact) VALUES (?, ?)", guests)
+        cursor.executemany(
+            "INSERT INTO reservations (reservation_id, guest_id, room_number, check_in_date, check_out_date, total_cost) VALUES (?, ?, ?, ?, ?, ?)",
+            reservations,
+        )
+    return max(next_free.values())
+
+
+def query_plan(sql, params):
+    rows = db_connection.get_connection().execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def check_query_plan():
+    params = ("Single", "2025-06-05", None, "2025-06-01")
+    plan = query_plan(db.FREE_ROOMS_SQL + " LIMIT 1", params)
+    print("EXPLAIN QUERY PLAN:")
+    for detail in plan:
+        print(f"  {detail}")
+    assert any("idx_rooms_type" in detail for detail in plan), plan
+    assert any("idx_reservations_room_dates" in detail for detail in plan), plan
+    assert not any(detail.startswith("SCAN") and "INDEX" not in detail for detail in plan), plan
+
+
+def time_lookups(horizon, count=500, seed=2):
+    rng = random.Random(seed)
+    span = (horizon - START).days
+    started = time.perf_counter()
+    for _ in range(count):
+        check_in = START + datetime.timedelta(days=rng.randint(0, span))
+        check_out = check_in + datetime.timedelta(days=rng.randint(1, 7))
+        db.find_available_room(rng.choice(list(db.ROOM_TYPE_PRICES)), check_in, check_out)
+    return (time.perf_counter() - started) / count
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 250000]
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'reservations':>12} {'find room (us)':>15} {'no index (us)':>14}")
+        for reservation_count in sizes:
+            db_connection.DB_PATH = os.path.join(workdir, f"hotel_{reservation_count}.db")
+            db.init_db()
+            horizon = populate(reservation_count)
+            if reservation_count == sizes[0]:
+                check_query_plan()
+            indexed = time_lookups(horizon)
+            conn = db_connection.get_connection()
+            conn.execute("DROP INDEX idx_reservations_room_dates")
+            unindexed = time_lookups(horizon, count=5)
+            print(f"{reservation_count:>12} {indexed * 1e6:>15.1f} {unindexed * 1e6:>14.1f}")
+            db_connection.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import datetime
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "hotel_reservation_python_db"))
+
+import db_connection
+import hotel_db as db
+
+
+START = datetime.date(2025, 1, 1)
+
+
+def worker(args):
+    db_path, worker_id, bookings, days = args
+    db_connection.DB_PATH = db_path
+    rng = random.Random(worker_id)
+    booked = 0
+    for i in range(bookings):
+        check_in = START + datetime.timedelta(days=rng.randrange(days))
+        room_type = rng.choice(list(db.ROOM_TYPE_PRICES))
+        if db.book_room(f"Worker {worker_id} guest {i}", "N/A", room_type, check_in, rng.randint(1, 4)):
+            booked += 1
+    db_connection.close_connection()
+    return booked
+
+
+def double_bookings():
+    return db_connection.get_connection().execute(
+        """
+        SELECT COUNT(*) FROM reservations a
+        JOIN reservations b
+          ON a.room_number = b.room_number
+         AND a.reservation_id < b.reservation_id
+         AND a.check_in_date < b.check_out_date
+         AND b.check_in_date < a.check_out_date
+        """
+    ).fetchone()[0]
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    bookings = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    # a short booking window keeps the workers fighting over the same rooms
+    days = 60
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "hotel.db")
+        db_connection.DB_PATH = db_path
+        db.init_db()
+        db.auto_add_rooms()
+        db_connection.close_connection()
+
+        started = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            booked = sum(pool.map(worker, [(db_path, i, bookings, days) for i in range(processes)]))
+        elapsed = time.perf_counter() - started
+
+        conn = db_connection.get_connection()
+        stored, distinct = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT reservation_id) FROM reservations"
+        ).fetchone()
+        overlaps = double_bookings()
+        print(f"{processes} processes x {bookings} attempts: {booked} booked in {elapsed:.2f}s "
+              f"({booked / elapsed:.0f} bookings/s, {processes * bookings / elapsed:.0f} attempts/s)")
+        print(f"stored reservations: {stored}, distinct IDs: {distinct}, next ID: {db.get_next_reservation_id()}")
+        print(f"double-booked room nights: {overlaps}")
+        assert stored == booked == distinct
+        assert db.get_next_reservation_id() == booked + 1
+        assert overlaps == 0
+
+
+if __name__ == "__main__":
+    main()
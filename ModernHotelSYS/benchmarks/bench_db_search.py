@@ -0,0 +1,79 @@
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "hotel_reservation_python_db"))
+
+import db_connection
+import hotel_db as db
+
+
+FIRST_NAMES = ["Aaliyah", "Aaron", "Abigail", "Adam", "Bianca", "Carlos", "Chloe", "Daniel", "Elena", "Farah",
+               "George", "Hana", "Ivan", "Julia", "Kenji", "Laura", "Mateo", "Nadia", "Omar", "Priya"]
+LAST_NAMES = ["Williams", "Taylor", "Johnson", "Davis", "Garcia", "Nguyen", "Okafor", "Rossi", "Schmidt", "Tanaka",
+              "Smith", "Brown", "Kowalski", "Haddad", "Silva", "Moreau", "Ivanova", "Larsen", "Novak", "Patel"]
+
+
+def populate(guest_count, seed=1):
+    rng = random.Random(seed)
+    db.auto_add_rooms()
+    rooms = [room for floor in (100, 200, 300) for room in range(floor + 1, floor + 11)]
+    start = datetime.date(2025, 1, 1)
+    guests = []
+    reservations = []
+    for i in range(guest_count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}{i}"
+        guests.append((name, f"guest{i}@example.com"))
+        check_in = start + datetime.timedelta(days=rng.randrange(365))
+        reservations.append((db.format_reservation_id(i + 1), i + 1, rng.choice(rooms), check_in.isoformat(),
+                             (check_in + datetime.timedelta(days=2)).isoformat(), 200))
+    with db_connection.transaction() as cursor:
+        cursor.executemany("INSERT INTO guests (name, contact) VALUES (?, ?)", guests)
+        cursor.executemany(
+            "INSERT INTO reservations (reservation_id, guest_id, room_number, check_in_date, check_out_date, total_cost) VALUES (?, ?, ?, ?, ?, ?)",
+            reservations,
+        )
+
+
+def like_search(keyword):
+    return db_connection.get_connection().execute(
+        f"""
+        SELECT {db.RESERVATION_COLUMNS}
+        FROM reservations r
+        JOIN guests g ON r.guest_id = g.guest_id
+        JOIN rooms ON r.room_number = rooms.room_number
+        WHERE g.name LIKE ?
+        LIMIT ?
+    """,
+        ("%" + keyword + "%", db.SEARCH_PAGE_SIZE),
+    ).fetchall()
+
+
+def timed(search, keywords):
+    started = time.perf_counter()
+    for keyword in keywords:
+        search(keyword)
+    return (time.perf_counter() - started) / len(keywords)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 500000]
+    rng = random.Random(2)
+    keywords = [f"{rng.choice(LAST_NAMES)}{rng.randrange(sizes[0])}" for _ in range(50)]
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'guests':>8} {'fts5 (us)':>10} {'LIKE (us)':>10}")
+        for guest_count in sizes:
+            db_connection.DB_PATH = os.path.join(workdir, f"hotel_{guest_count}.db")
+            db.init_db()
+            populate(guest_count)
+            fts = timed(db.search_guests, keywords)
+            like = timed(like_search, keywords[:10])
+            print(f"{guest_count:>8} {fts * 1e6:>10.1f} {like * 1e6:>10.1f}")
+            db_connection.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+from bench_availability import START, build_hotel
+
+from modern_hotel_sys import Guest
+
+
+def time_bookings(hotel, count, persist):
+    guest = Guest("Bench Guest", "N/A")
+    started = time.perf_counter()
+    for i in range(count):
+        check_in = START + datetime.timedelta(days=2000 + i)
+        hotel.make_reservation(guest, "Single", check_in, 1)
+        if persist:
+            hotel.save_reservations_to_file()
+    return (time.perf_counter() - started) / count
+
+
+def main():
+    bookings = 50
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'reservations':>12} {'journal append (us)':>21} {'full rewrite (us)':>19}")
+        for reservation_count in (1000, 10000, 100000):
+            hotel, _ = build_hotel(100, reservation_count,
+                                   data_file=os.path.join(workdir, "reservations.csv"),
+                                   journal_file=os.path.join(workdir, "reservations.journal"),
+                                   compact_every=sys.maxsize)
+            journal = time_bookings(hotel, bookings, persist=False)
+            hotel.close()
+            rewrite = time_bookings(hotel, bookings, persist=True)
+            print(f"{reservation_count:>12} {journal * 1e6:>21.1f} {rewrite * 1e6:>19.1f}")
+            hotel.journal.truncate()
+            hotel.journal.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import csv
+import datetime
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from bench_availability import build_hotel
+
+from modern_hotel_sys import Guest, Hotel, Reservation, Room, parse_sequence, parse_total
+
+
+class DictRoom:
+    def __init__(self, room_number, room_type, price_per_night):
+        self.room_number = room_number
+        self.room_type = room_type
+        self.price_per_night = price_per_night
+
+
+class DictGuest:
+    def __init__(self, name, contact_info):
+        self.name = name
+        self.contact_info = contact_info
+
+
+class DictReservation:
+    def __init__(self, reservation_id, guest, room, check_in, check_out):
+        self.reservation_id = reservation_id
+        self.guest = guest
+        self.room = room
+        self.check_in = check_in
+        self.check_out = check_out
+
+
+def dict_backed_load(data_file):
+    # what the previous model held: one dict-backed Guest and two fresh dates per row
+    rooms = {}
+    reservations = []
+    with open(data_file, newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for parts in reader:
+            room = rooms.get(parts[2])
+            if room is None:
+                room = rooms[parts[2]] = DictRoom(int(parts[2]), parts[3], 100)
+            reservations.append(DictReservation(
+                parts[0], DictGuest(parts[1], "N/A"), room,
+                datetime.date.fromisoformat(parts[4]), datetime.date.fromisoformat(parts[5])))
+    return reservations
+
+
+def slotted_load(data_file):
+    # the model objects as Hotel loads them, sharing guests, dates and
+    # totals, but without any of Hotel's indexes
+    rooms = {}
+    guests = {}
+    dates = {}
+    totals = {}
+    reservations = []
+    with open(data_file, newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for parts in reader:
+            room = rooms.get(parts[2])
+            if room is None:
+                room = rooms[parts[2]] = Room(int(parts[2]), parts[3], 100)
+            guest = guests.get(parts[1])
+            if guest is None:
+                guest = guests[parts[1]] = Guest(parts[1], "N/A")
+            for text in (parts[4], parts[5]):
+                if text not in dates:
+                    dates[text] = datetime.date.fromisoformat(text)
+            if parts[6] not in totals:
+                totals[parts[6]] = parse_total(parts[6])
+            reservations.append(Reservation(parts[0], guest, room, dates[parts[4]], dates[parts[5]],
+                                            totals[parts[6]], parse_sequence(parts, 7)))
+    return reservations
+
+
+# What a loaded Hotel may hold per booking on top of its model objects:
+# the reservation index, room schedules, calendar, change log and guest
+# search index. New per-booking state has to fit here or raise it
+# knowingly. The search index takes about 185 of it when, as here, every
+# guest has a name of their own.
+INDEX_BUDGET = 384
+
+
+def measure(load):
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as workdir:
+        data_file = os.path.join(workdir, "reservations.csv")
+        hotel, _ = build_hotel(100, rows, data_file=data_file)
+        hotel.save_reservations_to_file()
+        del hotel
+
+        def load_hotel():
+            hotel = Hotel("Benchmark Hotel", "1 Bench Street", data_file=data_file,
+                          journal_file=data_file + ".journal")
+            hotel.auto_add_rooms(100, 100, 100)
+            hotel.load_reservations_from_file()
+            return hotel
+
+        print(f"{rows} reservations")
+        print(f"{'model':<24} {'retained (MB)':>14} {'bytes/booking':>14} {'peak (MB)':>10}")
+        retained = {}
+        for label, load in (
+            ("dict-backed objects", lambda: dict_backed_load(data_file)),
+            ("slotted objects", lambda: slotted_load(data_file)),
+            ("Hotel, fully indexed", load_hotel),
+        ):
+            result, current, peak = measure(load)
+            del result
+            retained[label] = current
+            print(f"{label:<24} {current / 2**20:>14.1f} {current / rows:>14.0f} {peak / 2**20:>10.1f}")
+        indexes = (retained["Hotel, fully indexed"] - retained["slotted objects"]) / rows
+        print(f"Hotel indexes and change log: {indexes:.0f} bytes/booking, budget {INDEX_BUDGET}"
+              + ("" if indexes <= INDEX_BUDGET else " -- OVER BUDGET"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, os.pardir, "hotel_reservation_python_db"))
+
+import db_connection
+import hotel_db as db
+from bench_availability import START, build_hotel
+from metrics import METRICS
+
+
+def time_hotel(queries):
+    hotel, horizon = build_hotel(50, 20000, journal_file=os.devnull)
+    days = (horizon - START).days
+    started = time.perf_counter()
+    for i in range(queries):
+        check_in = START + datetime.timedelta(days=i % days)
+        hotel.find_available_room("Double", check_in, check_in + datetime.timedelta(days=3))
+    return (time.perf_counter() - started) / queries * 1e6
+
+
+def time_db(bookings):
+    with tempfile.TemporaryDirectory() as workdir:
+        db_connection.DB_PATH = os.path.join(workdir, "hotel.db")
+        db.init_db()
+        db.auto_add_rooms()
+        started = time.perf_counter()
+        for i in range(bookings):
+            check_in = START + datetime.timedelta(days=i % 365)
+            db.book_room(f"Guest {i}", "N/A", "Suite", check_in, 1)
+        elapsed = time.perf_counter() - started
+        db_connection.close_connection()
+    return elapsed / bookings * 1e6
+
+
+def main():
+    queries = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    bookings = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    print(f"{'':<28}{'metrics off':>14}{'metrics on':>14}")
+    off = time_hotel(queries), time_db(bookings)
+    METRICS.enable()
+    on = time_hotel(queries), time_db(bookings)
+    print(f"{'Hotel.find_available_room':<28}{off[0]:>11.1f} us{on[0]:>11.1f} us")
+    print(f"{'book_room (sqlite)':<28}{off[1]:>11.1f} us{on[1]:>11.1f} us")
+    histograms = {(h["name"], h["labels"].get("function")): h for h in METRICS.snapshot()["histograms"]}
+    h = histograms[("db_call_seconds", "book_room")]
+    print(f"book_room p50 {h['p50'] * 1e6:.0f} us, p99 {h['p99'] * 1e6:.0f} us over {h['count']} calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "modernhotelsys_python"))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "hotel_reservation_python_db"))
+
+import db_connection
+import hotel_db as db
+from rate_calendar import RateCalendar
+
+
+START = datetime.date(2025, 1, 1)
+ROOM_TYPES = ("Single", "Double", "Suite")
+
+
+def quote_by_night(rates, room_type, check_in, nights):
+    # what pricing costs without the running totals: one rate lookup per night
+    cents = 0
+    for i in range(nights):
+        cents += round(rates.nightly_rate(room_type, check_in + datetime.timedelta(days=i)) * 100)
+    return cents / 100
+
+
+def page_views(views, quotes_per_view, seed=1):
+    # a booking widget pricing a handful of stays around the dates a visitor
+    # is looking at; popular dates come up again and again
+    rng = random.Random(seed)
+    for _ in range(views):
+        anchor = START + datetime.timedelta(days=int(rng.expovariate(1 / 30)) % 365)
+        room_type = rng.choice(ROOM_TYPES)
+        yield [
+            (room_type, anchor + datetime.timedelta(days=rng.randint(-3, 3)), rng.randint(1, 14))
+            for _ in range(quotes_per_view)
+        ]
+
+
+def make_rates():
+    rates = RateCalendar(weekend_multiplier=1.2)
+    rates.add_season(datetime.date(2025, 6, 1), datetime.date(2025, 9, 1), 1.5)
+    rates.add_season(datetime.date(2025, 12, 20), datetime.date(2026, 1, 3), 2.0, ["Suite"])
+    for i in range(0, 365, 45):
+        rates.set_rate("Double", START + datetime.timedelta(days=i), 99)
+    return rates
+
+
+def timed(label, quote, views):
+    started = time.perf_counter()
+    count = 0
+    for view in views:
+        for room_type, check_in, nights in view:
+            quote(room_type, check_in, nights)
+            count += 1
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {count / elapsed:>12,.0f} quotes/s")
+
+
+def main():
+    views = list(page_views(int(sys.argv[1]) if len(sys.argv) > 1 else 5000, 20))
+
+    rates = make_rates()
+    for view in views[:200]:
+        for q in view:
+            assert rates.quote(*q) == quote_by_night(rates, *q)
+    rates.invalidate()
+
+    timed("memory, per-night sum", lambda *q: quote_by_night(rates, *q), views)
+    timed("memory, running totals", rates._quote, views)
+    rates.invalidate()
+    timed("memory, running totals + LRU", rates.quote, views)
+    print(f"    {rates.quote.cache_info()}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_connection.DB_PATH = os.path.join(workdir, "hotel.db")
+        db.init_db()
+        db.auto_add_rooms()
+        for room_type in ROOM_TYPES:
+            db.set_rates(room_type, START, START + datetime.timedelta(days=400), multiplier=1)
+            db.set_rates(room_type, START, START + datetime.timedelta(days=400), multiplier=1.2, weekdays=(4, 5))
+        db.set_rates("Single", datetime.date(2025, 6, 1), datetime.date(2025, 9, 1), multiplier=1.5)
+
+        def db_quote(room_type, check_in, nights):
+            return db.quote_stay(room_type, check_in, check_in + datetime.timedelta(days=nights))
+
+        timed("sqlite, running totals", db_quote, views[: len(views) // 5])
+        db_connection.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "hotel_reservation_python_db"))
+
+import db_connection
+import hotel_db as db
+from read_cache import ReadCache
+
+START = datetime.date(2025, 1, 1)
+ROOM_TYPES = ["Single", "Double", "Suite"]
+GUESTS = ["Ann Lee", "Bob Ray", "Carla Diaz", "Dev Patel", "Eve Moss", "Finn Cole"]
+
+
+def workload(count, seed=1):
+    # the front desk's mix: 50 reads per write, over the next two weeks and
+    # a handful of guests, so the same questions come back again and again
+    rng = random.Random(seed)
+    ops = []
+    for i in range(count):
+        check_in = START + datetime.timedelta(days=rng.randrange(14))
+        if i % 51 == 50:
+            ops.append(("book", rng.choice(GUESTS), rng.choice(ROOM_TYPES), check_in, rng.randint(1, 3)))
+        elif rng.random() < 0.6:
+            ops.append(("availability", rng.choice(ROOM_TYPES), check_in, check_in + datetime.timedelta(days=2)))
+        elif rng.random() < 0.5:
+            ops.append(("search", rng.choice(GUESTS).split()[0].lower()))
+        else:
+            ops.append(("get", f"RES-{rng.randint(1, 400):03d}"))
+    return ops
+
+
+def run(ops, reads):
+    started = time.perf_counter()
+    for op in ops:
+        if op[0] == "book":
+            reads.book_room(op[1], "N/A", op[2], op[3], op[4])
+        elif op[0] == "availability":
+            reads.available_rooms(*op[1:])
+        elif op[0] == "search":
+            reads.search_guests(op[1])
+        else:
+            reads.get_reservation(op[1])
+    return time.perf_counter() - started
+
+
+class Uncached:
+    # the same calls straight to the database
+    available_rooms = staticmethod(db.find_available_rooms)
+    search_guests = staticmethod(db.search_guests)
+    get_reservation = staticmethod(db.get_reservation)
+    book_room = staticmethod(db.book_room)
+
+
+def fresh_database(path):
+    db_connection.DB_PATH = path
+    db.init_db()
+    db.add_rooms_bulk([
+        (floor * 100 + i, room_type, db.ROOM_TYPE_PRICES[room_type])
+        for floor, room_type in enumerate(ROOM_TYPES, start=1)
+        for i in range(1, 41)
+    ])
+    rng = random.Random(2)
+    for i in range(400):
+        db.book_room(rng.choice(GUESTS), "N/A", rng.choice(ROOM_TYPES),
+                     START + datetime.timedelta(days=rng.randrange(30)), rng.randint(1, 4))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    ops = workload(count)
+    print(f"{count} front desk calls, 50 reads per booking")
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, reads in (("no cache", Uncached()), ("read-through cache", ReadCache())):
+            fresh_database(os.path.join(workdir, f"{label}.db"))
+            elapsed = run(ops, reads)
+            print(f"  {label:<24}{count / elapsed:>10,.0f} calls/s")
+            if isinstance(reads, ReadCache):
+                for kind, counts in reads.stats().items():
+                    if kind != "entries":
+                        total = counts["hits"] + counts["misses"]
+                        print(f"    {kind:<22}{counts['hits'] / total:>9.0%} hits of {total}")
+            db_connection.close_connection()
+
+
+if __name__ == "__main__":
+    main()
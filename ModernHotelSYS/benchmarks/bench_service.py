@@ -0,0 +1,144 @@
+import asyncio
+import datetime
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVICE = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "service", "hotel_service.py")
+
+START = datetime.date(2025, 1, 1)
+ROOM_TYPES = ("Single", "Double", "Suite")
+
+
+class Client:
+    # one keep-alive HTTP/1.1 connection
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, method, path, payload=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+
+async def client_loop(port, client_id, requests, days, latencies, counts):
+    rng = random.Random(client_id)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    client = Client(reader, writer)
+    booked = []
+    for i in range(requests):
+        room_type = rng.choice(ROOM_TYPES)
+        check_in = START + datetime.timedelta(days=rng.randrange(days))
+        nights = rng.randint(1, 4)
+        roll = rng.random()
+        if roll < 0.5:
+            op = "availability"
+            args = ("GET", f"/availability?room_type={room_type}&check_in={check_in}&nights={nights}")
+        elif roll < 0.75:
+            op = "book"
+            args = ("POST", "/reservations", {
+                "name": f"Client {client_id} guest {i}",
+                "contact": f"client{client_id}@example.com",
+                "room_type": room_type,
+                "check_in": check_in.isoformat(),
+                "nights": nights,
+            })
+        elif roll < 0.9 or not booked:
+            op = "search"
+            args = ("GET", f"/search?q=client+{rng.randrange(64)}&limit=20")
+        else:
+            op = "cancel"
+            args = ("DELETE", f"/reservations/{booked.pop(rng.randrange(len(booked)))}")
+        started = time.perf_counter()
+        status, payload = await client.request(*args)
+        latencies.setdefault(op, []).append(time.perf_counter() - started)
+        counts[status] = counts.get(status, 0) + 1
+        if op == "book" and status == 201:
+            booked.append(payload["reservation_id"])
+    writer.close()
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_for_port(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def run(backend, clients, requests, days):
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, SERVICE, "--backend", backend, "--port", str(port), "--data-dir", workdir],
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            await wait_for_port(port)
+            latencies = {}
+            counts = {}
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(client_loop(port, i, requests, days, latencies, counts) for i in range(clients))
+            )
+            elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait()
+
+    everything = [t for samples in latencies.values() for t in samples]
+    print(f"{backend:>6} backend, {clients} clients x {requests} requests: "
+          f"{len(everything) / elapsed:8.0f} req/s, "
+          f"p50 {percentile(everything, 0.5) * 1000:.2f} ms, p99 {percentile(everything, 0.99) * 1000:.2f} ms")
+    for op, samples in sorted(latencies.items()):
+        print(f"    {op:<12} {len(samples):6} requests  "
+              f"p50 {percentile(samples, 0.5) * 1000:7.2f} ms  p99 {percentile(samples, 0.99) * 1000:7.2f} ms")
+    print(f"    status codes: {dict(sorted(counts.items()))}")
+    assert 500 not in counts
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    backends = sys.argv[3:] or ["memory", "sqlite"]
+    # a short booking window keeps the clients fighting over the same rooms
+    days = 60
+    for backend in backends:
+        asyncio.run(run(backend, clients, requests, days))
+
+
+if __name__ == "__main__":
+    main()
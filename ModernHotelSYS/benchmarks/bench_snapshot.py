@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import time
+
+from bench_availability import build_hotel
+
+from modern_hotel_sys import Hotel
+from reservation_snapshot import CHECK_IN, ReservationSnapshot
+
+
+ROOMS_PER_TYPE = 100
+
+
+def load(data_file):
+    hotel = Hotel("Benchmark Hotel", "1 Bench Street", data_file=data_file, journal_file=data_file + ".journal")
+    hotel.auto_add_rooms(ROOMS_PER_TYPE, ROOMS_PER_TYPE, ROOMS_PER_TYPE)
+    started = time.perf_counter()
+    hotel.load_reservations_from_file()
+    return time.perf_counter() - started, hotel.reservation_count()
+
+
+def open_and_scan(snapshot_file):
+    # opening the map plus one pass over a column, with no Python objects per row
+    started = time.perf_counter()
+    with ReservationSnapshot(snapshot_file) as snapshot:
+        opened = time.perf_counter() - started
+        check_ins = snapshot.column(CHECK_IN)
+        latest = max(check_ins)
+        check_ins.release()
+    return opened, time.perf_counter() - started, latest
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'rows':>9} {'csv MB':>7} {'snap MB':>8} {'csv load (s)':>13} {'snap load (s)':>14} "
+              f"{'open (ms)':>10} {'scan (ms)':>10}")
+        for rows in sizes:
+            csv_file = os.path.join(workdir, f"reservations_{rows}.csv")
+            snapshot_file = os.path.join(workdir, f"reservations_{rows}.snap")
+            hotel, _ = build_hotel(ROOMS_PER_TYPE, rows, data_file=csv_file, journal_file=os.devnull)
+            hotel.save_reservations_to_file()
+            hotel.data_file = snapshot_file
+            hotel.save_reservations_to_file()
+            del hotel
+            csv_load, loaded = load(csv_file)
+            assert loaded == rows
+            snap_load, loaded = load(snapshot_file)
+            assert loaded == rows
+            opened, scanned, _ = open_and_scan(snapshot_file)
+            print(f"{rows:>9} {os.path.getsize(csv_file) / 1e6:>7.1f} {os.path.getsize(snapshot_file) / 1e6:>8.1f} "
+                  f"{csv_load:>13.2f} {snap_load:>14.2f} {opened * 1e3:>10.2f} {scanned * 1e3:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
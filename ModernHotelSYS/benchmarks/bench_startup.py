@@ -0,0 +1,60 @@
+import csv
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+from bench_availability import build_hotel
+
+from modern_hotel_sys import Guest, Hotel, Reservation
+
+
+ROOMS_PER_TYPE = 100
+
+
+def fresh_hotel(data_file):
+    hotel = Hotel("Benchmark Hotel", "1 Bench Street", data_file=data_file,
+                  journal_file=data_file + ".journal")
+    hotel.auto_add_rooms(ROOMS_PER_TYPE, ROOMS_PER_TYPE, ROOMS_PER_TYPE)
+    return hotel
+
+
+def legacy_load(hotel):
+    # the previous loader: place every row with find_available_room as it is read
+    with open(hotel.data_file, "r", newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for parts in reader:
+            check_in = datetime.date.fromisoformat(parts[4])
+            check_out = datetime.date.fromisoformat(parts[5])
+            room = hotel.find_available_room(parts[3], check_in, check_out)
+            if room:
+                hotel.add_reservation(Reservation(parts[0], Guest(parts[1], "N/A"), room, check_in, check_out))
+
+
+def time_load(data_file, load):
+    hotel = fresh_hotel(data_file)
+    started = time.perf_counter()
+    load(hotel)
+    return time.perf_counter() - started, hotel.reservation_count()
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'rows':>9} {'bulk load (s)':>14} {'rows/s':>10} {'per-row load (s)':>17}")
+        for rows in sizes:
+            data_file = os.path.join(workdir, f"reservations_{rows}.csv")
+            hotel, _ = build_hotel(ROOMS_PER_TYPE, rows, data_file=data_file)
+            hotel.save_reservations_to_file()
+            del hotel
+            bulk, loaded = time_load(data_file, Hotel.load_reservations_from_file)
+            assert loaded == rows
+            # the per-row path is only sampled at the smallest size
+            legacy = f"{time_load(data_file, legacy_load)[0]:.2f}" if rows <= 10000 else "-"
+            print(f"{rows:>9} {bulk:>14.2f} {rows / bulk:>10.0f} {legacy:>17}")
+
+
+if __name__ == "__main__":
+    main()
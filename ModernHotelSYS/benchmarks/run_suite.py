@@ -0,0 +1,268 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, os.pardir, "modernhotelsys_python"))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "hotel_reservation_python_db"))
+
+import db_connection
+import hotel_db as db
+from modern_hotel_sys import Guest, Hotel, Room
+from workload import Workload
+
+# name -> (rooms, reservations)
+SCALES = {
+    "small": (60, 2000),
+    "medium": (300, 20000),
+    "large": (1500, 100000),
+}
+
+
+class MemoryDriver:
+    name = "memory"
+
+    def __init__(self, workdir):
+        self.workdir = workdir
+        self.rooms = []
+        self.hotel = self.open_hotel()
+
+    def open_hotel(self):
+        hotel = Hotel(
+            "Benchmark Hotel",
+            "1 Bench Street",
+            data_file=os.path.join(self.workdir, "reservations.csv"),
+            journal_file=os.path.join(self.workdir, "reservations.journal"),
+        )
+        for room in self.rooms:
+            hotel.add_room(Room(*room))
+        return hotel
+
+    def add_rooms(self, rooms):
+        self.rooms = rooms
+        for room in rooms:
+            self.hotel.add_room(Room(*room))
+
+    def book(self, b):
+        r = self.hotel.make_reservation(Guest(b.guest, b.contact), b.room_type, b.check_in, b.nights)
+        return r and r.reservation_id
+
+    def cancel(self, reservation_id):
+        self.hotel.discard_reservation(reservation_id)
+
+    def availability(self, room_type, check_in, nights):
+        return len(self.hotel.available_rooms(room_type, check_in, nights))
+
+    def search(self, keyword):
+        return len(self.hotel.search_reservations(keyword))
+
+    def report(self, start, end):
+        return len(self.hotel.nightly_stats(start, end))
+
+    def save(self):
+        self.hotel.save_reservations_to_file()
+        return self.hotel.reservation_count()
+
+    def load(self):
+        hotel = self.open_hotel()
+        hotel.load_reservations_from_file()
+        hotel.journal.close()
+        return hotel.reservation_count()
+
+    def close(self):
+        self.hotel.close()
+
+
+class SqliteDriver:
+    # "save" copies the database with the online backup API and "load"
+    # streams every reservation on a fresh connection; the database has no
+    # separate file format to save or load
+    name = "sqlite"
+
+    def __init__(self, workdir):
+        self.workdir = workdir
+        db_connection.DB_PATH = os.path.join(workdir, "hotel.db")
+        db.init_db()
+
+    def add_rooms(self, rooms):
+        db.add_rooms_bulk(rooms)
+
+    def book(self, b):
+        r = db.book_room(b.guest, b.contact, b.room_type, b.check_in, b.nights)
+        return r and r.reservation_id
+
+    def cancel(self, reservation_id):
+        db.delete_reservation(reservation_id)
+
+    def availability(self, room_type, check_in, nights):
+        return len(db.find_available_rooms(room_type, check_in, check_in + datetime.timedelta(days=nights)))
+
+    def search(self, keyword):
+        return len(db.search_guests(keyword))
+
+    def report(self, start, end):
+        return len(db.nightly_stats(start, end))
+
+    def save(self):
+        target = sqlite3.connect(os.path.join(self.workdir, "backup.db"))
+        db_connection.get_connection().backup(target)
+        count = target.execute("SELECT COUNT(*) FROM reservations").fetchone()[0]
+        target.close()
+        return count
+
+    def load(self):
+        db_connection.close_connection()
+        return sum(1 for _ in db.iter_reservations())
+
+    def close(self):
+        db_connection.close_connection()
+
+
+DRIVERS = {"memory": MemoryDriver, "sqlite": SqliteDriver}
+
+
+def run_scale(driver_class, scale, workload, queries):
+    results = []
+
+    def record(operation, ops, seconds, **details):
+        results.append({
+            "backend": driver_class.name,
+            "scale": scale,
+            "rooms": workload.room_count,
+            "reservations": workload.reservation_count,
+            "operation": operation,
+            "ops": ops,
+            "seconds": round(seconds, 6),
+            "ops_per_sec": round(ops / seconds, 1) if seconds else None,
+            **details,
+        })
+
+    with tempfile.TemporaryDirectory() as workdir:
+        driver = driver_class(workdir)
+        driver.add_rooms(workload.rooms())
+
+        events = workload.events()
+        ids = {}
+        booked = rejected = cancelled = 0
+        started = time.perf_counter()
+        for kind, booking in events:
+            if kind == "book":
+                reservation_id = driver.book(booking)
+                if reservation_id:
+                    ids[booking.number] = reservation_id
+                    booked += 1
+                else:
+                    rejected += 1
+            elif booking.number in ids:
+                driver.cancel(ids.pop(booking.number))
+                cancelled += 1
+        record("book+cancel", len(events), time.perf_counter() - started,
+               booked=booked, rejected=rejected, cancelled=cancelled)
+
+        started = time.perf_counter()
+        for query in workload.availability_queries(queries):
+            driver.availability(*query)
+        record("availability", queries, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for keyword in workload.search_queries(queries):
+            driver.search(keyword)
+        record("search", queries, time.perf_counter() - started)
+
+        # nightly occupancy and revenue over the whole booking window
+        started = time.perf_counter()
+        nights = driver.report(workload.start, workload.start + datetime.timedelta(days=workload.days))
+        record("report", nights, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        saved = driver.save()
+        record("save", saved, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        loaded = driver.load()
+        record("load", loaded, time.perf_counter() - started)
+        driver.close()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path, threshold):
+    # prints the change per (backend, scale, operation); True if anything
+    # got slower by more than `threshold`
+    with open(baseline_path) as f:
+        baseline = {
+            (r["backend"], r["scale"], r["operation"]): r for r in json.load(f)["results"]
+        }
+    regressed = False
+    print(f"\nversus {baseline_path}:")
+    for r in current["results"]:
+        old = baseline.get((r["backend"], r["scale"], r["operation"]))
+        if not old or not old["ops_per_sec"] or not r["ops_per_sec"]:
+            continue
+        change = r["ops_per_sec"] / old["ops_per_sec"] - 1
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"  {r['backend']:<7}{r['scale']:<8}{r['operation']:<14}{change:+8.1%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark both hotel backends on a synthetic workload")
+    parser.add_argument("--scales", default="small,medium", help=f"comma separated, from {', '.join(SCALES)}")
+    parser.add_argument("--backends", default="memory,sqlite")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--queries", type=int, default=2000, help="availability and search queries per run")
+    parser.add_argument("--output", default=os.path.join(HERE, "results", "latest.json"))
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "started": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": args.seed,
+        },
+        "results": [],
+    }
+    for scale in args.scales.split(","):
+        rooms, reservations = SCALES[scale]
+        workload = Workload(rooms, reservations, seed=args.seed)
+        for backend in args.backends.split(","):
+            for r in run_scale(DRIVERS[backend], scale, workload, args.queries):
+                report["results"].append(r)
+                print(f"{r['backend']:<7}{r['scale']:<8}{r['operation']:<14}"
+                      f"{r['ops']:>8} ops {r['seconds']:>9.3f} s {r['ops_per_sec'] or 0:>12,.0f} ops/s")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {args.output}")
+
+    if args.compare and compare(report, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
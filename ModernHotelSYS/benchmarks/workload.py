@@ -0,0 +1,115 @@
+import collections
+import datetime
+import math
+import random
+
+START = datetime.date(2025, 1, 1)
+
+# (room type, share of the rooms, base price)
+ROOM_MIX = (("Single", 0.4, 100), ("Double", 0.4, 150), ("Suite", 0.2, 300))
+
+# nights -> relative frequency; short stays dominate, with a bump at a week
+STAY_LENGTHS = {1: 30, 2: 24, 3: 16, 4: 9, 5: 6, 6: 3, 7: 6, 10: 3, 14: 3}
+
+FIRST_NAMES = (
+    "Ana", "Ben", "Chloe", "David", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jon",
+    "Kofi", "Lena", "Marta", "Noah", "Olga", "Pablo", "Quinn", "Rosa", "Sven", "Tara",
+)
+LAST_NAMES = (
+    "Smith", "Garcia", "Muller", "Rossi", "Kowalski", "Tanaka", "Okafor", "Silva",
+    "Nguyen", "Haddad", "Larsen", "Novak", "Dubois", "Ivanova", "Khan", "Moreau",
+)
+
+Booking = collections.namedtuple(
+    "Booking", "number guest contact room_type check_in nights booked_on cancelled_on"
+)
+
+
+class Workload:
+    # A reproducible synthetic hotel: the rooms, then the bookings in the
+    # order they arrive. Arrivals are spread over a booking window sized so
+    # the stays fill about `occupancy` of the room-nights; each booking is
+    # made an exponentially distributed lead time before check-in, and a
+    # `cancel_rate` share is cancelled somewhere between booking and arrival.
+
+    def __init__(self, rooms, reservations, seed=1, occupancy=0.7, cancel_rate=0.15,
+                 mean_lead_days=28, start=START):
+        self.room_count = rooms
+        self.reservation_count = reservations
+        self.seed = seed
+        self.occupancy = occupancy
+        self.cancel_rate = cancel_rate
+        self.mean_lead_days = mean_lead_days
+        self.start = start
+        mean_stay = sum(n * w for n, w in STAY_LENGTHS.items()) / sum(STAY_LENGTHS.values())
+        self.days = max(30, math.ceil(reservations * mean_stay / (rooms * occupancy)))
+
+    def rooms(self):
+        # (room_number, room_type, price_per_night); floors of 100 rooms
+        rooms = []
+        for type_index, (room_type, share, price) in enumerate(ROOM_MIX):
+            count = max(1, round(self.room_count * share))
+            for i in range(count):
+                floor = type_index * 100 + i // 100 + 1
+                rooms.append((floor * 100 + i % 100 + 1, room_type, price))
+        return rooms
+
+    def bookings(self):
+        rng = random.Random(self.seed)
+        types = [t for t, _, _ in ROOM_MIX]
+        type_weights = [share for _, share, _ in ROOM_MIX]
+        lengths = list(STAY_LENGTHS)
+        length_weights = list(STAY_LENGTHS.values())
+        bookings = []
+        for number in range(self.reservation_count):
+            first = rng.choice(FIRST_NAMES)
+            last = rng.choice(LAST_NAMES)
+            check_in = self.start + datetime.timedelta(days=rng.randrange(self.days))
+            lead = min(365, int(rng.expovariate(1 / self.mean_lead_days)))
+            booked_on = check_in - datetime.timedelta(days=lead)
+            cancelled_on = None
+            if rng.random() < self.cancel_rate:
+                cancelled_on = booked_on + datetime.timedelta(days=rng.randint(0, lead))
+            bookings.append(Booking(
+                number,
+                f"{first} {last}",
+                f"{first}.{last}{number}@example.com".lower(),
+                rng.choices(types, type_weights)[0],
+                check_in,
+                rng.choices(lengths, length_weights)[0],
+                booked_on,
+                cancelled_on,
+            ))
+        bookings.sort(key=lambda b: (b.booked_on, b.number))
+        return bookings
+
+    def events(self):
+        # ("book", booking) and ("cancel", booking) in the order they happen;
+        # a cancellation always comes after its booking
+        events = []
+        for order, booking in enumerate(self.bookings()):
+            events.append((booking.booked_on, 0, order, "book", booking))
+            if booking.cancelled_on is not None:
+                events.append((booking.cancelled_on, 1, order, "cancel", booking))
+        events.sort(key=lambda e: e[:3])
+        return [(kind, booking) for _, _, _, kind, booking in events]
+
+    def availability_queries(self, count, seed=None):
+        rng = random.Random(self.seed + 1 if seed is None else seed)
+        lengths = list(STAY_LENGTHS)
+        weights = list(STAY_LENGTHS.values())
+        for _ in range(count):
+            yield (
+                rng.choice([t for t, _, _ in ROOM_MIX]),
+                self.start + datetime.timedelta(days=rng.randrange(self.days)),
+                rng.choices(lengths, weights)[0],
+            )
+
+    def search_queries(self, count, seed=None):
+        # mostly surnames, some "first last" prefixes as typed into a search box
+        rng = random.Random(self.seed + 2 if seed is None else seed)
+        for _ in range(count):
+            if rng.random() < 0.7:
+                yield rng.choice(LAST_NAMES)
+            else:
+                yield f"{rng.choice(FIRST_NAMES)[:3]} {rng.choice(LAST_NAMES)[:4]}"
@@ -0,0 +1,256 @@
+import argparse
+import collections
+import concurrent.futures
+import datetime
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "modernhotelsys_python"))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "hotel_reservation_python_db"))
+
+import db_connection
+import hotel_db as db
+from modern_hotel_sys import Guest, Hotel
+
+# A hotel chain: every property is a shard with its own store, either a
+# directory holding the memory backend's reservations.csv and journal or
+# one SQLite database, so properties never share a file or a write lock.
+# The shards live in a fixed pool of worker processes, and properties are
+# dealt round-robin to them in the order they are listed; every call for a
+# property goes to its owner, which opens the shard once and keeps it.
+# Calls for different properties run in parallel, and calls for one
+# property run in order.
+
+Booking = collections.namedtuple(
+    "Booking", "property_id reservation_id room_number room_type check_in check_out total_cost"
+)
+
+
+class UnknownProperty(KeyError):
+    pass
+
+
+class MemoryShard:
+    def __init__(self, property_id, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.property_id = property_id
+        self.hotel = Hotel(
+            property_id,
+            "",
+            data_file=os.path.join(directory, "reservations.csv"),
+            journal_file=os.path.join(directory, "reservations.journal"),
+        )
+        self.hotel.auto_add_rooms(10, 10, 10)
+        self.hotel.load_reservations_from_file()
+
+    def booking(self, r):
+        return Booking(
+            self.property_id,
+            r.reservation_id,
+            r.room.room_number,
+            r.room.room_type,
+            r.check_in,
+            r.check_out,
+            r.calculate_total_cost(),
+        )
+
+    def availability(self, room_type, check_in, nights):
+        rooms = self.hotel.available_rooms(room_type, check_in, nights)
+        return [(room.room_number, room.price_per_night) for room in rooms]
+
+    def quote(self, room_type, check_in, nights):
+        return self.hotel.quote(room_type, check_in, nights)
+
+    def book(self, name, contact, room_type, check_in, nights):
+        r = self.hotel.make_reservation(Guest(name, contact), room_type, check_in, nights)
+        return None if r is None else self.booking(r)
+
+    def get(self, reservation_id):
+        r = self.hotel.get_reservation(reservation_id)
+        return None if r is None else self.booking(r)
+
+    def cancel(self, reservation_id):
+        r = self.hotel.discard_reservation(reservation_id)
+        return None if r is None else self.booking(r)
+
+    def close(self):
+        self.hotel.close()
+
+
+class SqliteShard:
+    def __init__(self, property_id, path):
+        self.property_id = property_id
+        self.path = path
+        with db_connection.use_database(path):
+            db.init_db()
+            if not db_connection.get_connection().execute("SELECT 1 FROM rooms LIMIT 1").fetchone():
+                db.auto_add_rooms()
+
+    def booking(self, r):
+        return Booking(
+            self.property_id, r.reservation_id, r.room_number, r.room_type, r.check_in, r.check_out, r.total_cost
+        )
+
+    def availability(self, room_type, check_in, nights):
+        with db_connection.use_database(self.path):
+            return db.find_available_rooms(room_type, check_in, check_in + datetime.timedelta(days=nights))
+
+    def quote(self, room_type, check_in, nights):
+        with db_connection.use_database(self.path):
+            return db.quote_stay(room_type, check_in, check_in + datetime.timedelta(days=nights))
+
+    def book(self, name, contact, room_type, check_in, nights):
+        with db_connection.use_database(self.path):
+            r = db.book_room(name, contact, room_type, check_in, nights)
+        return None if r is None else self.booking(r)
+
+    def get(self, reservation_id):
+        with db_connection.use_database(self.path):
+            r = db.get_reservation(reservation_id)
+        return None if r is None else self.booking(r)
+
+    def cancel(self, reservation_id):
+        with db_connection.use_database(self.path):
+            r = db.get_reservation(reservation_id)
+            if r is None or db.delete_reservation(reservation_id) is None:
+                return None
+        return self.booking(r)
+
+    def close(self):
+        db_connection.close_connection(self.path)
+
+
+def open_shard(backend, data_dir, property_id):
+    if backend == "memory":
+        return MemoryShard(property_id, os.path.join(data_dir, property_id))
+    return SqliteShard(property_id, os.path.join(data_dir, f"{property_id}.db"))
+
+
+# worker process state: the backend settings and the shards opened so far
+_worker = {"backend": None, "data_dir": None, "shards": {}}
+
+
+def _init_worker(backend, data_dir):
+    _worker["backend"] = backend
+    _worker["data_dir"] = data_dir
+
+
+def _call(property_id, method, *args):
+    shard = _worker["shards"].get(property_id)
+    if shard is None:
+        shard = _worker["shards"][property_id] = open_shard(_worker["backend"], _worker["data_dir"], property_id)
+    return getattr(shard, method)(*args)
+
+
+def _close_shards():
+    for shard in _worker["shards"].values():
+        shard.close()
+    _worker["shards"].clear()
+
+
+class PropertyRouter:
+    # Dispatches calls by property id to the worker process owning the
+    # property. workers=0 keeps every shard in this process instead, which
+    # is simpler to debug and fine for a handful of properties.
+
+    def __init__(self, property_ids, backend="sqlite", data_dir=".", workers=None):
+        if backend not in ("memory", "sqlite"):
+            raise ValueError(f"Unknown backend {backend!r}")
+        os.makedirs(data_dir, exist_ok=True)
+        self.property_ids = list(property_ids)
+        if workers is None:
+            workers = min(len(self.property_ids), os.cpu_count() or 1)
+        # properties are dealt round-robin, so owners differ by at most one
+        self.owners = {property_id: i % max(workers, 1) for i, property_id in enumerate(self.property_ids)}
+        self.executors = [
+            concurrent.futures.ProcessPoolExecutor(1, initializer=_init_worker, initargs=(backend, data_dir))
+            for _ in range(workers)
+        ]
+        if not self.executors:
+            _init_worker(backend, data_dir)
+
+    def submit(self, property_id, method, *args):
+        # a Future for the call; submit calls for many properties before
+        # waiting on any of them to have them run side by side
+        if property_id not in self.owners:
+            raise UnknownProperty(property_id)
+        if self.executors:
+            return self.executors[self.owners[property_id]].submit(_call, property_id, method, *args)
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(_call(property_id, method, *args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def availability(self, property_id, room_type, check_in, nights):
+        return self.submit(property_id, "availability", room_type, check_in, nights).result()
+
+    def quote(self, property_id, room_type, check_in, nights):
+        return self.submit(property_id, "quote", room_type, check_in, nights).result()
+
+    def book(self, property_id, name, contact, room_type, check_in, nights):
+        return self.submit(property_id, "book", name, contact, room_type, check_in, nights).result()
+
+    def get(self, property_id, reservation_id):
+        return self.submit(property_id, "get", reservation_id).result()
+
+    def cancel(self, property_id, reservation_id):
+        return self.submit(property_id, "cancel", reservation_id).result()
+
+    def search_availability(self, room_type, check_in, nights, property_ids=None):
+        # Asks every property (or the given ones) at once and yields
+        # (property_id, [(room_number, price_per_night), ...]) for each as
+        # soon as it answers, so the first results arrive while slower
+        # shards are still working. Closing the generator early cancels the
+        # requests that have not started.
+        futures = {
+            self.submit(property_id, "availability", room_type, check_in, nights): property_id
+            for property_id in (self.property_ids if property_ids is None else property_ids)
+        }
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def close(self):
+        # closes the shards (the memory backend compacts its journal) and
+        # stops the workers
+        if not self.executors:
+            _close_shards()
+        for executor in self.executors:
+            executor.submit(_close_shards).result()
+            executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search availability across every property of a chain")
+    parser.add_argument("room_type")
+    parser.add_argument("check_in", type=datetime.date.fromisoformat)
+    parser.add_argument("nights", type=int)
+    parser.add_argument("--properties", default="hotel-1,hotel-2,hotel-3,hotel-4", help="comma separated ids")
+    parser.add_argument("--backend", choices=("memory", "sqlite"), default="sqlite")
+    parser.add_argument("--data-dir", default="chain", help="one database or directory per property goes here")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    with PropertyRouter(args.properties.split(","), args.backend, args.data_dir, args.workers) as router:
+        total = 0
+        for property_id, rooms in router.search_availability(args.room_type.capitalize(), args.check_in, args.nights):
+            total += len(rooms)
+            cheapest = min((price for _, price in rooms), default=None)
+            print(f"{property_id:<16}{len(rooms):>4} free" + (f", from ${cheapest}/night" if rooms else ""))
+        print(f"{total} {args.room_type.capitalize()} rooms free across the chain")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+
+from metrics import METRICS
+
+
+DB_PATH = "hotel.db"
+
+# statements compiled per connection; sqlite3 reuses them by SQL text
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    # with WAL, NORMAL only syncs at checkpoints, not on every commit
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+# VM instructions between progress callbacks on instrumented connections
+VM_STEP = 100
+
+_local = threading.local()
+_statement_labels = {}
+
+
+def statement_label(sql):
+    # the SQL with whitespace collapsed, cut short enough to be a metric label
+    label = _statement_labels.get(sql)
+    if label is None:
+        label = _statement_labels[sql] = " ".join(sql.split())[:80]
+    return label
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    # Records every statement's execution time, the rows it returned or
+    # changed, and sqlite_vm_steps_total: VM instructions run for it, in
+    # units of VM_STEP, the closest the sqlite3 module gets to a count of
+    # rows scanned.
+    statement = ""
+
+    def _record(self, metric, func, *args):
+        conn = self.connection
+        steps = conn.vm_steps
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            if metric == "sqlite_query_seconds":
+                METRICS.observe(metric, elapsed, statement=self.statement)
+            else:
+                METRICS.inc(metric, elapsed, statement=self.statement)
+            if conn.vm_steps > steps:
+                METRICS.inc("sqlite_vm_steps_total", conn.vm_steps - steps, statement=self.statement)
+
+    def execute(self, sql, parameters=()):
+        self.statement = statement_label(sql)
+        self._record("sqlite_query_seconds", super().execute, sql, parameters)
+        if self.rowcount > 0:
+            METRICS.inc("sqlite_rows_changed_total", self.rowcount, statement=self.statement)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self.statement = statement_label(sql)
+        self._record("sqlite_query_seconds", super().executemany, sql, seq_of_parameters)
+        if self.rowcount > 0:
+            METRICS.inc("sqlite_rows_changed_total", self.rowcount, statement=self.statement)
+        return self
+
+    def _returned(self, rows):
+        if rows:
+            METRICS.inc("sqlite_rows_returned_total", rows, statement=self.statement)
+
+    def fetchone(self):
+        row = self._record("sqlite_fetch_seconds_total", super().fetchone)
+        self._returned(row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._record("sqlite_fetch_seconds_total", super().fetchmany, size or self.arraysize)
+        self._returned(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._record("sqlite_fetch_seconds_total", super().fetchall)
+        self._returned(len(rows))
+        return rows
+
+    def __next__(self):
+        row = self._record("sqlite_fetch_seconds_total", super().__next__)
+        self._returned(1)
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    # Connection.execute() would bypass the cursor subclass, so the shortcuts
+    # go through cursor() here
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.vm_steps = 0
+        self.set_progress_handler(self._count_steps, VM_STEP)
+
+    def _count_steps(self):
+        self.vm_steps += 1
+        return 0
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connect(path=None):
+    # connections opened while metrics are on record every statement; the
+    # plain sqlite3 classes are used otherwise so there is no overhead
+    conn = sqlite3.connect(
+        path or current_path(),
+        isolation_level=None,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=InstrumentedConnection if METRICS.enabled else sqlite3.Connection,
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def current_path():
+    # the database this thread works on: the innermost use_database(), else DB_PATH
+    return getattr(_local, "path", None) or DB_PATH
+
+
+@contextmanager
+def use_database(path):
+    # Points this thread's get_connection() and transaction() calls, and so
+    # every hotel_db function, at another database file for the duration;
+    # the multi-property router keeps one database per property this way.
+    previous = getattr(_local, "path", None)
+    _local.path = path
+    try:
+        yield
+    finally:
+        _local.path = previous
+
+
+def get_connection(path=None):
+    # one long-lived connection per thread and database file
+    path = path or current_path()
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = connect(path)
+    return conn
+
+
+def close_connection(path=None):
+    connections = getattr(_local, "connections", {})
+    conn = connections.pop(path or current_path(), None)
+    if conn is not None:
+        conn.close()
+
+
+@contextmanager
+def transaction(mode="DEFERRED", path=None):
+    conn = get_connection(path)
+    if conn.in_transaction:
+        # join the caller's transaction instead of nesting
+        yield conn.cursor()
+        return
+    conn.execute(f"BEGIN {mode}")
+    try:
+        yield conn.cursor()
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
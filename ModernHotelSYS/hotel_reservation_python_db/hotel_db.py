@@ -0,0 +1,1182 @@
+# Data access for the hotel database: every function takes plain arguments
+# and returns rows, Reservation objects or counts, never prompts or prints.
+# They all use the calling thread's shared connection (db_connection), and
+# each write runs in its own transaction unless the caller has opened one:
+#
+#     with transaction("IMMEDIATE"):
+#         delete_reservation("RES-001")
+#         book_room("Ann Lee", "ann@example.com", "Suite", check_in, 2)
+#
+# commits both or neither. main.py is the interactive front end.
+
+import csv
+import dataclasses
+import datetime
+import json
+import os
+import re
+import sqlite3
+import time
+
+from db_connection import get_connection, transaction
+from analytics import fill_nights  # shared/ is on sys.path via db_connection
+from metrics import timed
+from reservation_csv import (
+    CHUNK_ROWS,
+    ExportRow,
+    ImportResult,
+    cancelled_row,
+    read_chunks,
+    write_export,
+)
+
+
+ROOM_TYPE_PRICES = {"Single": 100, "Double": 150, "Suite": 300}
+
+# A room is free for [check_in, check_out) when none of its reservations
+# overlaps that range. Reservations on one room never overlap each other, so
+# only the latest one starting before check_out can clash, and it clashes
+# when it ends after check_in. That row is a single descending probe of
+# idx_reservations_room_dates, and idx_rooms_type limits the outer walk to
+# rooms of the requested type.
+FREE_ROOMS_SQL = """
+    SELECT room_number, price_per_night FROM rooms
+    WHERE room_type = ?
+      AND IFNULL((
+          SELECT r.check_out_date FROM reservations r
+          WHERE r.room_number = rooms.room_number
+            AND r.check_in_date < ?
+            AND r.reservation_id IS NOT ?
+          ORDER BY r.check_in_date DESC
+          LIMIT 1
+      ), '') <= ?
+    ORDER BY room_number
+"""
+
+# the same probe for one given room: 1 when it is free for [check_in, check_out)
+ROOM_FREE_SQL = """
+    SELECT IFNULL((
+        SELECT r.check_out_date FROM reservations r
+        WHERE r.room_number = ?
+          AND r.check_in_date < ?
+          AND r.reservation_id IS NOT ?
+        ORDER BY r.check_in_date DESC
+        LIMIT 1
+    ), '') <= ?
+"""
+
+# selected in Reservation field order
+RESERVATION_COLUMNS = """
+    r.reservation_id, g.name, g.contact,
+    r.room_number, rooms.room_type,
+    r.check_in_date, r.check_out_date, r.total_cost,
+    rooms.price_per_night, r.guest_id
+"""
+
+SEARCH_PAGE_SIZE = 20
+
+# rows fetched per keyset page by iter_reservations
+LIST_PAGE_SIZE = 500
+
+# Everything changed after a sequence, oldest first: live reservations by
+# their change_seq and deleted ones from cancelled_reservations. Both sides
+# read their change_seq index in order, so SQLite merges the two and stops
+# at the LIMIT without sorting.
+CHANGES_SQL = """
+    SELECT * FROM (
+        SELECT r.change_seq, r.reservation_id, g.name, r.room_number, rooms.room_type,
+               r.check_in_date, r.check_out_date, r.total_cost, 0
+        FROM reservations r
+        JOIN guests g ON r.guest_id = g.guest_id
+        JOIN rooms ON r.room_number = rooms.room_number
+        WHERE r.change_seq > :since
+        ORDER BY r.change_seq
+        LIMIT :limit
+    )
+    UNION ALL
+    SELECT * FROM (
+        SELECT change_seq, reservation_id, NULL, NULL, NULL, NULL, NULL, NULL, 1
+        FROM cancelled_reservations
+        WHERE change_seq > :since
+        ORDER BY change_seq
+        LIMIT :limit
+    )
+    ORDER BY 1
+    LIMIT :limit
+"""
+
+RESERVATION_ID_NUMBER = re.compile(r"RES-(\d+)\Z")
+
+# derived from the dates; cancelled reservations are deleted outright
+RESERVATION_STATUSES = ("upcoming", "in-house", "completed")
+
+# the 30 rooms auto_add_rooms has always created: one floor per room type
+DEFAULT_ROOM_SPEC = {
+    "floors": {"1": {"Single": 10}, "2": {"Double": 10}, "3": {"Suite": 10}},
+}
+
+
+@dataclasses.dataclass(slots=True)
+class Reservation:
+    reservation_id: str
+    guest_name: str
+    contact: str
+    room_number: int
+    room_type: str
+    check_in: datetime.date
+    check_out: datetime.date
+    total_cost: float
+    price_per_night: float
+    guest_id: int
+
+    @classmethod
+    def from_row(cls, row):
+        # row: the RESERVATION_COLUMNS of one reservation
+        return cls(
+            row[0],
+            row[1],
+            row[2],
+            row[3],
+            row[4],
+            datetime.date.fromisoformat(row[5]),
+            datetime.date.fromisoformat(row[6]),
+            row[7],
+            row[8],
+            row[9],
+        )
+
+    @property
+    def nights(self):
+        return (self.check_out - self.check_in).days
+
+
+def format_reservation_id(number):
+    return f"RES-{number:03d}"
+
+
+def get_next_reservation_id():
+    # the ID the next booking will get; allocate_reservation_id hands it out
+    row = get_connection().execute(
+        "SELECT value + 1 FROM sequences WHERE name = 'reservation_id'"
+    ).fetchone()
+    return row[0] if row else 1
+
+
+def allocate_reservation_id(cursor):
+    # must run inside a write transaction so the increment and read are atomic
+    cursor.execute(
+        "UPDATE sequences SET value = value + 1 WHERE name = 'reservation_id'"
+    )
+    cursor.execute("SELECT value FROM sequences WHERE name = 'reservation_id'")
+    return format_reservation_id(cursor.fetchone()[0])
+
+
+def init_db():
+    cursor = get_connection().cursor()
+
+    # create tables if they don't exist
+    cursor.execute(
+        """
+    CREATE TABLE IF NOT EXISTS rooms (
+        room_number INTEGER PRIMARY KEY,
+        room_type TEXT,
+        price_per_night REAL,
+        is_available INTEGER DEFAULT 1
+    )"""
+    )
+
+    cursor.execute(
+        """
+    CREATE TABLE IF NOT EXISTS guests (
+        guest_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        contact TEXT
+    )"""
+    )
+
+    cursor.execute(
+        """
+    CREATE TABLE IF NOT EXISTS reservations (
+        reservation_id TEXT PRIMARY KEY,
+        guest_id INTEGER,
+        room_number INTEGER,
+        check_in_date TEXT,
+        check_out_date TEXT,
+        total_cost REAL,
+        FOREIGN KEY (guest_id) REFERENCES guests(guest_id),
+        FOREIGN KEY (room_number) REFERENCES rooms(room_number)
+    )"""
+    )
+    if "change_seq" not in {
+        row[1] for row in cursor.execute("PRAGMA table_info(reservations)")
+    }:
+        # a database from before change tracking: number its rows in
+        # insertion order so the first export includes them all
+        cursor.execute("ALTER TABLE reservations ADD COLUMN change_seq INTEGER")
+        cursor.execute("UPDATE reservations SET change_seq = rowid")
+
+    # rooms.is_available is no longer consulted; availability is worked out
+    # from the reservation dates through these indexes
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_reservations_room_dates ON reservations (room_number, check_in_date, check_out_date)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_rooms_type ON rooms (room_type, room_number)"
+    )
+
+    # reservation IDs come from a counter row rather than the highest stored
+    # ID, seeded numerically from existing data (RES-1000 sorts before RES-999)
+    cursor.execute(
+        """
+    CREATE TABLE IF NOT EXISTS sequences (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )"""
+    )
+    cursor.execute(
+        """
+    INSERT OR IGNORE INTO sequences (name, value)
+    SELECT 'reservation_id', IFNULL(MAX(CAST(substr(reservation_id, 5) AS INTEGER)), 0)
+    FROM reservations"""
+    )
+
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_reservations_guest ON reservations (guest_id)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_reservations_check_in ON reservations (check_in_date, reservation_id)"
+    )
+
+    # Nightly rates per room type, set through set_rates. cumulative is the
+    # running total of rate over the type's nights in date order, so any
+    # stay is priced from two rows; nights outside the table cost the room's
+    # price_per_night.
+    cursor.execute(
+        """
+    CREATE TABLE IF NOT EXISTS rates (
+        room_type TEXT,
+        night TEXT,
+        rate REAL NOT NULL,
+        cumulative REAL NOT NULL,
+        PRIMARY KEY (room_type, night)
+    ) WITHOUT ROWID"""
+    )
+    init_guest_search(cursor)
+    init_change_tracking(cursor)
+
+
+def init_guest_search(cursor):
+    # guests_fts indexes guest names and contacts; it stores no text of its
+    # own (content='guests') and the triggers keep it in step with guests
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'guests_fts'"
+    ).fetchone()
+    try:
+        cursor.execute(
+            """
+        CREATE VIRTUAL TABLE IF NOT EXISTS guests_fts USING fts5(
+            name, contact,
+            content = 'guests', content_rowid = 'guest_id',
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )"""
+        )
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5; search_guests falls back to LIKE
+        return
+
+    cursor.executescript(
+        """
+    CREATE TRIGGER IF NOT EXISTS guests_fts_insert AFTER INSERT ON guests BEGIN
+        INSERT INTO guests_fts (rowid, name, contact)
+        VALUES (new.guest_id, new.name, new.contact);
+    END;
+    CREATE TRIGGER IF NOT EXISTS guests_fts_delete AFTER DELETE ON guests BEGIN
+        INSERT INTO guests_fts (guests_fts, rowid, name, contact)
+        VALUES ('delete', old.guest_id, old.name, old.contact);
+    END;
+    CREATE TRIGGER IF NOT EXISTS guests_fts_update AFTER UPDATE ON guests BEGIN
+        INSERT INTO guests_fts (guests_fts, rowid, name, contact)
+        VALUES ('delete', old.guest_id, old.name, old.contact);
+        INSERT INTO guests_fts (rowid, name, contact)
+        VALUES (new.guest_id, new.name, new.contact);
+    END;
+    """
+    )
+    if not exists:
+        # index the guests that were added before the search table existed
+        cursor.execute("INSERT INTO guests_fts (guests_fts) VALUES ('rebuild')")
+
+
+def init_change_tracking(cursor):
+    # Every insert, update or delete of a reservation, and every edit of a
+    # guest's details, takes the next 'change_seq' value from sequences.
+    # Triggers do the numbering so that no write path can forget it. A
+    # deleted reservation leaves its ID and sequence in
+    # cancelled_reservations until forget_cancellations.
+    cursor.execute(
+        """
+    CREATE TABLE IF NOT EXISTS cancelled_reservations (
+        reservation_id TEXT PRIMARY KEY,
+        change_seq INTEGER NOT NULL
+    )"""
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_reservations_change_seq ON reservations (change_seq)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_cancelled_change_seq ON cancelled_reservations (change_seq)"
+    )
+    cursor.execute(
+        """
+    INSERT OR IGNORE INTO sequences (name, value)
+    SELECT 'change_seq', MAX(
+        IFNULL((SELECT MAX(change_seq) FROM reservations), 0),
+        IFNULL((SELECT MAX(change_seq) FROM cancelled_reservations), 0)
+    )"""
+    )
+    cursor.executescript(
+        """
+    CREATE TRIGGER IF NOT EXISTS reservations_change_insert AFTER INSERT ON reservations BEGIN
+        UPDATE sequences SET value = value + 1 WHERE name = 'change_seq';
+        UPDATE reservations
+        SET change_seq = (SELECT value FROM sequences WHERE name = 'change_seq')
+        WHERE reservation_id = new.reservation_id;
+        DELETE FROM cancelled_reservations WHERE reservation_id = new.reservation_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS reservations_change_update
+    AFTER UPDATE OF guest_id, room_number, check_in_date, check_out_date, total_cost ON reservations BEGIN
+        UPDATE sequences SET value = value + 1 WHERE name = 'change_seq';
+        UPDATE reservations
+        SET change_seq = (SELECT value FROM sequences WHERE name = 'change_seq')
+        WHERE reservation_id = new.reservation_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS reservations_change_delete AFTER DELETE ON reservations BEGIN
+        UPDATE sequences SET value = value + 1 WHERE name = 'change_seq';
+        INSERT OR REPLACE INTO cancelled_reservations (reservation_id, change_seq)
+        VALUES (old.reservation_id, (SELECT value FROM sequences WHERE name = 'change_seq'));
+    END;
+    CREATE TRIGGER IF NOT EXISTS guests_change_update AFTER UPDATE OF name, contact ON guests BEGIN
+        UPDATE sequences SET value = value + 1 WHERE name = 'change_seq';
+        UPDATE reservations
+        SET change_seq = (SELECT value FROM sequences WHERE name = 'change_seq')
+        WHERE guest_id = new.guest_id;
+    END;
+    """
+    )
+
+
+def add_room(room_number, room_type, price_per_night):
+    # False if the room number already exists
+    with transaction() as cursor:
+        cursor.execute(
+            "INSERT OR IGNORE INTO rooms (room_number, room_type, price_per_night) VALUES (?, ?, ?)",
+            (room_number, room_type, price_per_night),
+        )
+        return cursor.rowcount == 1
+
+
+def expand_room_spec(spec):
+    # spec: {"floors": {"1": {"Single": 10, "Double": 5}, ...}, "prices": {...}}
+    # rooms on floor F are numbered F01, F02, ... in the order the types are listed
+    prices = dict(ROOM_TYPE_PRICES)
+    prices.update(spec.get("prices", {}))
+    rooms = []
+    for floor, counts in spec["floors"].items():
+        number = int(floor) * 100
+        for room_type, count in counts.items():
+            if room_type not in prices:
+                raise ValueError(f"No price given for room type {room_type!r}")
+            for _ in range(int(count)):
+                number += 1
+                rooms.append((number, room_type, prices[room_type]))
+        if number - int(floor) * 100 > 99:
+            raise ValueError(f"Floor {floor} has more than 99 rooms")
+    return rooms
+
+
+def load_room_inventory(path):
+    # CSV with room_number,room_type,price_per_night columns, or JSON holding
+    # either a list of such objects or a floor spec for expand_room_spec
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return expand_room_spec(data)
+        rows = data
+    else:
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+    return [
+        (
+            int(row["room_number"]),
+            row["room_type"],
+            float(row.get("price_per_night") or ROOM_TYPE_PRICES[row["room_type"]]),
+        )
+        for row in rows
+    ]
+
+
+@timed("db_call_seconds")
+def add_rooms_bulk(rooms):
+    started = time.perf_counter()
+    with transaction() as cursor:
+        cursor.executemany(
+            "INSERT OR IGNORE INTO rooms (room_number, room_type, price_per_night) VALUES (?, ?, ?)",
+            rooms,
+        )
+        added = cursor.rowcount
+    elapsed = time.perf_counter() - started
+    return added, elapsed
+
+
+def provision_rooms(inventory):
+    # inventory: a file path, a floor spec dict or a list of room tuples.
+    # Returns (added, already existing, seconds taken).
+    if isinstance(inventory, str):
+        rooms = load_room_inventory(inventory)
+    elif isinstance(inventory, dict):
+        rooms = expand_room_spec(inventory)
+    else:
+        rooms = list(inventory)
+
+    added, elapsed = add_rooms_bulk(rooms)
+    return added, len(rooms) - added, elapsed
+
+
+def auto_add_rooms():
+    return provision_rooms(DEFAULT_ROOM_SPEC)
+
+
+@timed("db_call_seconds")
+def find_available_rooms(room_type, check_in, check_out, exclude_reservation_id=None):
+    cursor = get_connection().execute(
+        FREE_ROOMS_SQL,
+        (room_type, check_out.isoformat(), exclude_reservation_id, check_in.isoformat()),
+    )
+    return cursor.fetchall()
+
+
+def find_available_room(room_type, check_in, check_out, exclude_reservation_id=None):
+    cursor = get_connection().execute(
+        FREE_ROOMS_SQL + " LIMIT 1",
+        (room_type, check_out.isoformat(), exclude_reservation_id, check_in.isoformat()),
+    )
+    return cursor.fetchone()
+
+
+def resolve_room_type(room_type, cursor=None):
+    # the provisioned room type that room_type names, in any case, or None
+    # when no room has that type
+    cursor = cursor or get_connection().cursor()
+    row = cursor.execute(
+        "SELECT room_type FROM rooms WHERE room_type = ? COLLATE NOCASE LIMIT 1", (room_type,)
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def room_type_price(room_type, cursor=None):
+    # the nightly price of room_type's rooms as provisioned, so custom types
+    # price like the standard ones; the standard price if it has no rooms yet
+    cursor = cursor or get_connection().cursor()
+    (price,) = cursor.execute(
+        "SELECT MIN(price_per_night) FROM rooms WHERE room_type = ?", (room_type,)
+    ).fetchone()
+    if price is None:
+        price = ROOM_TYPE_PRICES.get(room_type)
+    if price is None:
+        raise ValueError(f"No rooms of type {room_type!r}")
+    return price
+
+
+@timed("db_call_seconds")
+def set_rates(room_type, start, end, rate=None, multiplier=None, weekdays=None):
+    # Prices the nights start..end-1 of room_type at a fixed rate, or scales
+    # their current rate by multiplier (e.g. 1.25 for a high season). weekdays
+    # limits the change to those date.weekday() nights, so (4, 5) with a
+    # multiplier is a Friday/Saturday surcharge. Rules applied later stack on
+    # earlier ones.
+    with transaction("IMMEDIATE") as cursor:
+        base = room_type_price(room_type, cursor)
+        first, last = cursor.execute(
+            """
+            SELECT (SELECT MIN(night) FROM rates WHERE room_type = ?),
+                   (SELECT MAX(night) FROM rates WHERE room_type = ?)
+        """,
+            (room_type, room_type),
+        ).fetchone()
+        # a type's nights stay contiguous so the running total has no holes;
+        # nights between the old range and the new one get the rooms' own
+        # price, which quote_stay charges outside the range too
+        if first is not None:
+            start_night = min(start, datetime.date.fromisoformat(first))
+            end_night = max(end, datetime.date.fromisoformat(last) + datetime.timedelta(days=1))
+        else:
+            start_night, end_night = start, end
+        current = dict(
+            cursor.execute(
+                "SELECT night, rate FROM rates WHERE room_type = ?", (room_type,)
+            )
+        )
+
+        rows = []
+        cumulative = 0
+        night = start_night
+        while night < end_night:
+            nightly = current.get(night.isoformat(), base)
+            if start <= night < end and (weekdays is None or night.weekday() in weekdays):
+                nightly = rate if rate is not None else nightly * multiplier
+            nightly = round(nightly, 2)
+            cumulative = round(cumulative + nightly, 2)
+            rows.append((room_type, night.isoformat(), nightly, cumulative))
+            night += datetime.timedelta(days=1)
+        cursor.executemany(
+            "INSERT OR REPLACE INTO rates (room_type, night, rate, cumulative) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+
+
+@timed("db_call_seconds")
+def quote_stay(room_type, check_in, check_out, price_per_night=None, cursor=None):
+    # total for the stay; pass the booking's cursor to price inside its transaction
+    cursor = cursor or get_connection().cursor()
+    if price_per_night is None:
+        price_per_night = room_type_price(room_type, cursor)
+    nights = (check_out - check_in).days
+    first, last = cursor.execute(
+        """
+        SELECT (SELECT MIN(night) FROM rates WHERE room_type = ?),
+               (SELECT MAX(night) FROM rates WHERE room_type = ?)
+    """,
+        (room_type, room_type),
+    ).fetchone()
+    if first is None:
+        return nights * price_per_night
+    start = max(check_in, datetime.date.fromisoformat(first))
+    end = min(check_out, datetime.date.fromisoformat(last) + datetime.timedelta(days=1))
+    if start >= end:
+        return nights * price_per_night
+    covered = cursor.execute(
+        """
+        SELECT (SELECT cumulative FROM rates WHERE room_type = ? AND night = ?)
+             - (SELECT cumulative - rate FROM rates WHERE room_type = ? AND night = ?)
+    """,
+        (
+            room_type,
+            (end - datetime.timedelta(days=1)).isoformat(),
+            room_type,
+            start.isoformat(),
+        ),
+    ).fetchone()[0]
+    return round(covered + (nights - (end - start).days) * price_per_night, 2)
+
+
+@timed("db_call_seconds")
+def book_room(name, contact, room_type, check_in, nights):
+    check_out = check_in + datetime.timedelta(days=nights)
+
+    # IMMEDIATE takes the write lock before the room is chosen, so no other
+    # process can claim the same room or ID between the check and the insert
+    with transaction("IMMEDIATE") as cursor:
+        room = find_available_room(room_type, check_in, check_out)
+        if not room:
+            return None
+        room_number, price = room
+        total_cost = quote_stay(room_type, check_in, check_out, price, cursor)
+
+        # Insert guest into 'guests' table
+        cursor.execute(
+            "INSERT INTO guests (name, contact) VALUES (?, ?)", (name, contact)
+        )
+        guest_id = cursor.lastrowid  # gets the auto incremented guest_id
+
+        reservation_id = allocate_reservation_id(cursor)
+        cursor.execute(
+            "INSERT INTO reservations (reservation_id, guest_id, room_number, check_in_date, check_out_date, total_cost) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                reservation_id,
+                guest_id,
+                room_number,
+                check_in.isoformat(),
+                check_out.isoformat(),
+                total_cost,
+            ),
+        )
+
+    return Reservation(
+        reservation_id,
+        name,
+        contact,
+        room_number,
+        room_type,
+        check_in,
+        check_out,
+        total_cost,
+        price,
+        guest_id,
+    )
+
+
+class BookingError(Exception):
+    pass
+
+
+@timed("db_call_seconds")
+def book_rooms_bulk(requests):
+    # requests: list of (name, contact, room_type, check_in, nights).
+    # Every request gets a room or nothing is written: the whole batch is
+    # one IMMEDIATE transaction and rolls back on the first miss. Returns
+    # the booked reservations, or None.
+    try:
+        with transaction("IMMEDIATE") as cursor:
+            # Requests for the same stay share one availability query; rooms
+            # claimed earlier in the batch are not in the database yet, so
+            # they are tracked here until the final executemany.
+            free_rooms = {}
+            claimed = {}
+            bookings = []
+            for name, contact, room_type, check_in, nights in requests:
+                check_out = check_in + datetime.timedelta(days=nights)
+                key = (room_type, check_in, check_out)
+                if key not in free_rooms:
+                    free_rooms[key] = iter(
+                        find_available_rooms(room_type, check_in, check_out)
+                    )
+                for room_number, price in free_rooms[key]:
+                    stays = claimed.setdefault(room_number, [])
+                    if all(
+                        check_out <= other_in or check_in >= other_out
+                        for other_in, other_out in stays
+                    ):
+                        stays.append((check_in, check_out))
+                        break
+                else:
+                    raise BookingError(f"No {room_type} room free from {check_in}")
+                total_cost = quote_stay(room_type, check_in, check_out, price, cursor)
+                bookings.append(
+                    (name, contact, room_number, room_type, check_in, check_out, total_cost, price)
+                )
+
+            # the batch holds the write lock, so its guest and reservation IDs
+            # are the next consecutive values
+            first_guest_id = cursor.execute(
+                """
+                SELECT MAX(
+                    IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'guests'), 0),
+                    IFNULL((SELECT MAX(guest_id) FROM guests), 0)
+                ) + 1"""
+            ).fetchone()[0]
+            cursor.execute(
+                "UPDATE sequences SET value = value + ? WHERE name = 'reservation_id'",
+                (len(bookings),),
+            )
+            last_number = cursor.execute(
+                "SELECT value FROM sequences WHERE name = 'reservation_id'"
+            ).fetchone()[0]
+            first_number = last_number - len(bookings) + 1
+
+            cursor.executemany(
+                "INSERT INTO guests (guest_id, name, contact) VALUES (?, ?, ?)",
+                [
+                    (first_guest_id + i, booking[0], booking[1])
+                    for i, booking in enumerate(bookings)
+                ],
+            )
+            reservations = [
+                Reservation(
+                    format_reservation_id(first_number + i), *booking, first_guest_id + i
+                )
+                for i, booking in enumerate(bookings)
+            ]
+            cursor.executemany(
+                "INSERT INTO reservations (reservation_id, guest_id, room_number, check_in_date, check_out_date, total_cost) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        r.reservation_id,
+                        r.guest_id,
+                        r.room_number,
+                        r.check_in.isoformat(),
+                        r.check_out.isoformat(),
+                        r.total_cost,
+                    )
+                    for r in reservations
+                ],
+            )
+    except BookingError:
+        return None
+    return reservations
+
+
+@timed("db_call_seconds")
+def get_reservation(reservation_id):
+    row = (
+        get_connection()
+        .execute(
+            f"""
+            SELECT {RESERVATION_COLUMNS}
+            FROM reservations r
+            JOIN guests g ON r.guest_id = g.guest_id
+            JOIN rooms ON r.room_number = rooms.room_number
+            WHERE r.reservation_id = ?
+        """,
+            (reservation_id,),
+        )
+        .fetchone()
+    )
+    return None if row is None else Reservation.from_row(row)
+
+
+@timed("db_call_seconds")
+def delete_reservation(reservation_id):
+    # returns the freed room number, or None if there was no such reservation.
+    # IMMEDIATE: a deferred read that later writes can fail with "database is
+    # locked" instead of waiting when another connection commits in between
+    with transaction("IMMEDIATE") as cursor:
+        result = cursor.execute(
+            "SELECT room_number FROM reservations WHERE reservation_id = ?",
+            (reservation_id,),
+        ).fetchone()
+        if not result:
+            return None
+
+        # Delete reservation; the room is free again for those dates
+        cursor.execute(
+            "DELETE FROM reservations WHERE reservation_id = ?", (reservation_id,)
+        )
+    return result[0]
+
+
+def iter_reservations(
+    start=None,
+    end=None,
+    room_type=None,
+    status=None,
+    after=None,
+    page_size=LIST_PAGE_SIZE,
+    today=None,
+):
+    # Yields reservations checking in within [start, end), ordered by
+    # (check_in_date, reservation_id). Each page is its own short query that
+    # resumes after the last key seen, so memory stays at one page and no
+    # read transaction is held open between pages. Pass the last one's
+    # (check_in, reservation_id) as `after` to continue a listing.
+    today = str(today or datetime.date.today())
+    clauses = []
+    params = []
+    if start is not None:
+        clauses.append("r.check_in_date >= ?")
+        params.append(str(start))
+    if end is not None:
+        clauses.append("r.check_in_date < ?")
+        params.append(str(end))
+    if room_type is not None:
+        clauses.append("rooms.room_type = ?")
+        params.append(room_type)
+    if status == "upcoming":
+        clauses.append("r.check_in_date > ?")
+        params.append(today)
+    elif status == "in-house":
+        clauses.append("r.check_in_date <= ? AND r.check_out_date > ?")
+        params.extend([today, today])
+    elif status == "completed":
+        clauses.append("r.check_out_date <= ?")
+        params.append(today)
+    elif status is not None:
+        raise ValueError(f"Unknown reservation status {status!r}")
+
+    conn = get_connection()
+    key = (str(after[0]), after[1]) if after else None
+    while True:
+        page_clauses = list(clauses)
+        page_params = list(params)
+        if key:
+            page_clauses.append("(r.check_in_date, r.reservation_id) > (?, ?)")
+            page_params.extend(key)
+        where = ("WHERE " + " AND ".join(page_clauses)) if page_clauses else ""
+        rows = conn.execute(
+            f"""
+            SELECT {RESERVATION_COLUMNS}
+            FROM reservations r
+            JOIN guests g ON r.guest_id = g.guest_id
+            JOIN rooms ON r.room_number = rooms.room_number
+            {where}
+            ORDER BY r.check_in_date, r.reservation_id
+            LIMIT ?
+        """,
+            page_params + [page_size],
+        ).fetchall()
+        yield from map(Reservation.from_row, rows)
+        if len(rows) < page_size:
+            return
+        key = (rows[-1][5], rows[-1][0])
+
+
+def guest_search_enabled():
+    return (
+        get_connection()
+        .execute("SELECT 1 FROM sqlite_master WHERE name = 'guests_fts'")
+        .fetchone()
+        is not None
+    )
+
+
+def guest_match_query(keyword):
+    # every word has to match the start of a word in the name or contact,
+    # so "jo smi" finds "John Smith"
+    return " ".join(f'"{term}"*' for term in re.findall(r"\w+", keyword))
+
+
+@timed("db_call_seconds")
+def search_guests(keyword, limit=SEARCH_PAGE_SIZE, offset=0):
+    match = guest_match_query(keyword)
+    conn = get_connection()
+    if not match:
+        cursor = conn.execute(
+            f"""
+            SELECT {RESERVATION_COLUMNS}
+            FROM reservations r
+            JOIN guests g ON r.guest_id = g.guest_id
+            JOIN rooms ON r.room_number = rooms.room_number
+            ORDER BY r.check_in_date, r.reservation_id
+            LIMIT ? OFFSET ?
+        """,
+            (limit, offset),
+        )
+    elif guest_search_enabled():
+        # best bm25 match first, then that guest's stays in date order
+        cursor = conn.execute(
+            f"""
+            SELECT {RESERVATION_COLUMNS}
+            FROM guests_fts f
+            JOIN guests g ON g.guest_id = f.rowid
+            JOIN reservations r ON r.guest_id = g.guest_id
+            JOIN rooms ON r.room_number = rooms.room_number
+            WHERE guests_fts MATCH ?
+            ORDER BY f.rank, r.check_in_date, r.reservation_id
+            LIMIT ? OFFSET ?
+        """,
+            (match, limit, offset),
+        )
+    else:
+        cursor = conn.execute(
+            f"""
+            SELECT {RESERVATION_COLUMNS}
+            FROM reservations r
+            JOIN guests g ON r.guest_id = g.guest_id
+            JOIN rooms ON r.room_number = rooms.room_number
+            WHERE g.name LIKE ? OR g.contact LIKE ?
+            ORDER BY r.check_in_date, r.reservation_id
+            LIMIT ? OFFSET ?
+        """,
+            ("%" + keyword + "%", "%" + keyword + "%", limit, offset),
+        )
+    return [Reservation.from_row(row) for row in cursor]
+
+
+@timed("db_call_seconds")
+def modify_reservation(
+    reservation_id, check_in=None, nights=None, room_type=None, name=None, contact=None
+):
+    # Moves a booking to new dates and/or room type, and updates the guest
+    # details; anything left as None keeps its current value. The booking
+    # keeps its room when that room is still free for the new dates (its own
+    # nights don't count against it) and otherwise takes the first free room
+    # of the type. The total is re-quoted for the room it ends up in. Returns
+    # the updated Reservation, or None, changing nothing, when there is no
+    # such reservation or no room is free.
+    with transaction("IMMEDIATE") as cursor:
+        current = get_reservation(reservation_id)
+        if current is None:
+            return None
+        check_in = check_in or current.check_in
+        nights = nights or current.nights
+        check_out = check_in + datetime.timedelta(days=nights)
+        if room_type is None:
+            room_type = current.room_type
+        else:
+            room_type = resolve_room_type(room_type, cursor)
+            if room_type is None:
+                return None
+
+        room = None
+        if room_type == current.room_type:
+            (free,) = cursor.execute(
+                ROOM_FREE_SQL,
+                (
+                    current.room_number,
+                    check_out.isoformat(),
+                    reservation_id,
+                    check_in.isoformat(),
+                ),
+            ).fetchone()
+            if free:
+                room = (current.room_number, current.price_per_night)
+        if room is None:
+            room = find_available_room(
+                room_type, check_in, check_out, exclude_reservation_id=reservation_id
+            )
+        if room is None:
+            return None
+        room_number, price = room
+        total_cost = quote_stay(room_type, check_in, check_out, price, cursor)
+
+        if name is not None or contact is not None:
+            cursor.execute(
+                "UPDATE guests SET name = ?, contact = ? WHERE guest_id = ?",
+                (
+                    current.guest_name if name is None else name,
+                    current.contact if contact is None else contact,
+                    current.guest_id,
+                ),
+            )
+        cursor.execute(
+            """
+            UPDATE reservations
+            SET room_number = ?, check_in_date = ?, check_out_date = ?, total_cost = ?
+            WHERE reservation_id = ?
+        """,
+            (
+                room_number,
+                check_in.isoformat(),
+                check_out.isoformat(),
+                total_cost,
+                reservation_id,
+            ),
+        )
+    return Reservation(
+        reservation_id,
+        current.guest_name if name is None else name,
+        current.contact if contact is None else contact,
+        room_number,
+        room_type,
+        check_in,
+        check_out,
+        total_cost,
+        price,
+        current.guest_id,
+    )
+
+
+def iter_changes(since=0, page_size=CHUNK_ROWS):
+    # Yields an ExportRow for every reservation booked, changed or
+    # cancelled after the `since` sequence, oldest change first. Like
+    # iter_reservations, each page is one short query resuming after the
+    # last sequence seen, so memory stays at one page and writers are not
+    # held up while the rows are written out.
+    conn = get_connection()
+    while True:
+        rows = conn.execute(
+            CHANGES_SQL, {"since": since, "limit": page_size}
+        ).fetchall()
+        for row in rows:
+            if row[8]:
+                yield cancelled_row(row[1], row[0])
+            else:
+                yield ExportRow(
+                    row[1],
+                    row[2],
+                    row[3],
+                    row[4],
+                    datetime.date.fromisoformat(row[5]),
+                    datetime.date.fromisoformat(row[6]),
+                    row[7],
+                    row[0],
+                    False,
+                )
+
+        if len(rows) < page_size:
+            return
+        since = rows[-1][0]
+
+
+@timed("db_call_seconds")
+def export_changes(path, since=0):
+    # Writes the changes after `since` to a CSV export (see
+    # reservation_csv) and returns (rows, watermark); pass the watermark as
+    # `since` on the next run. since=0 exports everything.
+    return write_export(path, iter_changes(since), since)
+
+
+@timed("db_call_seconds")
+def import_reservations(path, chunk_rows=CHUNK_ROWS):
+    # Applies an export or a reservations.csv, one IMMEDIATE transaction
+    # per chunk of rows. A row books or updates the reservation with its
+    # ID, in its own room when that is free and otherwise in the first free
+    # room of its type; a cancelled row deletes it. Rows that no room can
+    # be found for are skipped.
+    applied = cancelled = skipped = 0
+    for chunk in read_chunks(path, chunk_rows):
+        with transaction("IMMEDIATE") as cursor:
+            for row in chunk:
+                if row.cancelled:
+                    cursor.execute(
+                        "DELETE FROM reservations WHERE reservation_id = ?",
+                        (row.reservation_id,),
+                    )
+                    cancelled += cursor.rowcount
+                elif import_row(cursor, row):
+                    applied += 1
+                else:
+                    skipped += 1
+    return ImportResult(applied, cancelled, skipped)
+
+
+def import_row(cursor, row):
+    # must run inside a write transaction; False when no room is free
+    current = cursor.execute(
+        "SELECT guest_id FROM reservations WHERE reservation_id = ?",
+        (row.reservation_id,),
+    ).fetchone()
+    room = cursor.execute(
+        "SELECT room_number, price_per_night FROM rooms WHERE room_number = ? AND room_type = ?",
+        (row.room_number, row.room_type),
+    ).fetchone()
+    if room is not None:
+        (free,) = cursor.execute(
+            ROOM_FREE_SQL,
+            (
+                row.room_number,
+                row.check_out.isoformat(),
+                row.reservation_id,
+                row.check_in.isoformat(),
+            ),
+        ).fetchone()
+        if not free:
+            room = None
+    if room is None:
+        room = find_available_room(
+            row.room_type,
+            row.check_in,
+            row.check_out,
+            exclude_reservation_id=row.reservation_id,
+        )
+    if room is None:
+        return False
+    room_number, price = room
+    total_cost = row.total_cost
+    if total_cost is None:
+        total_cost = quote_stay(row.room_type, row.check_in, row.check_out, price, cursor)
+
+    if current is None:
+        cursor.execute(
+            "INSERT INTO guests (name, contact) VALUES (?, ?)", (row.guest_name, "N/A")
+        )
+        cursor.execute(
+            "INSERT INTO reservations (reservation_id, guest_id, room_number, check_in_date, check_out_date, total_cost) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                row.reservation_id,
+                cursor.lastrowid,
+                room_number,
+                row.check_in.isoformat(),
+                row.check_out.isoformat(),
+                total_cost,
+            ),
+        )
+        # keep new IDs clear of the imported ones
+        match = RESERVATION_ID_NUMBER.match(row.reservation_id)
+        if match:
+            cursor.execute(
+                "UPDATE sequences SET value = MAX(value, ?) WHERE name = 'reservation_id'",
+                (int(match.group(1)),),
+            )
+        return True
+
+    cursor.execute(
+        "UPDATE guests SET name = ? WHERE guest_id = ? AND name IS NOT ?",
+        (row.guest_name, current[0], row.guest_name),
+    )
+    cursor.execute(
+        """
+        UPDATE reservations
+        SET room_number = ?, check_in_date = ?, check_out_date = ?, total_cost = ?
+        WHERE reservation_id = ?
+    """,
+        (
+            room_number,
+            row.check_in.isoformat(),
+            row.check_out.isoformat(),
+            total_cost,
+            row.reservation_id,
+        ),
+    )
+    return True
+
+
+def forget_cancellations(through):
+    # Drops the cancellations up to sequence `through` once every
+    # downstream system has exported past them. Returns how many.
+    with transaction("IMMEDIATE") as cursor:
+        cursor.execute(
+            "DELETE FROM cancelled_reservations WHERE change_seq <= ?", (through,)
+        )
+        return cursor.rowcount
+
+
+# Occupancy and revenue as a difference array over the nights of [:start,
+# :end): every stay overlapping the range, clipped to it, contributes +1
+# (and its nightly revenue) on its first night and -1 on the night it
+# leaves. The edges are summed per night and room type, and a running
+# window sum over each type turns them into the totals from that night
+# until the next row of the same type. The work grows with the number of
+# stays, not with their length, and only the change points come back.
+# idx_reservations_check_in bounds the scan by check-in.
+NIGHTLY_STATS_SQL = """
+    WITH stays AS (
+        SELECT rooms.room_type AS room_type,
+               MAX(r.check_in_date, :start) AS first_night,
+               MIN(r.check_out_date, :end) AS end_night,
+               IFNULL(r.total_cost, 0)
+                   / (julianday(r.check_out_date) - julianday(r.check_in_date)) AS per_night
+        FROM reservations r
+        JOIN rooms ON rooms.room_number = r.room_number
+        WHERE r.check_in_date < :end
+          AND r.check_out_date > :start
+          AND r.check_out_date > r.check_in_date
+          AND (:room_type IS NULL OR rooms.room_type = :room_type)
+    ),
+    edges(room_type, night, occupied, revenue) AS (
+        SELECT room_type, first_night, 1, per_night FROM stays
+        UNION ALL
+        SELECT room_type, end_night, -1, -per_night FROM stays
+    )
+    SELECT room_type, night, SUM(SUM(occupied)) OVER w, SUM(SUM(revenue)) OVER w
+    FROM edges
+    GROUP BY room_type, night
+    WINDOW w AS (PARTITION BY room_type ORDER BY night)
+"""
+
+
+@timed("db_call_seconds")
+def nightly_stats(start, end, room_type=None):
+    # occupancy and revenue per night and room type over [start, end), as
+    # analytics.NightStats; a stay's total is spread evenly over its nights
+    if end <= start:
+        return []
+    connection = get_connection()
+    room_counts = dict(
+        connection.execute(
+            """
+            SELECT room_type, COUNT(*) FROM rooms
+            WHERE ? IS NULL OR room_type = ?
+            GROUP BY room_type
+        """,
+            (room_type, room_type),
+        )
+    )
+    rows = connection.execute(
+        NIGHTLY_STATS_SQL,
+        {"start": start.isoformat(), "end": end.isoformat(), "room_type": room_type},
+    ).fetchall()
+
+    # each row holds until the next change point of its room type
+    totals = {}
+    for (night_type, night, occupied, revenue), following in zip(rows, rows[1:] + [None]):
+        if not occupied:
+            continue
+        night = datetime.date.fromisoformat(night)
+        until = end
+        if following is not None and following[0] == night_type:
+            until = datetime.date.fromisoformat(following[1])
+        while night < until:
+            totals[night, night_type] = (occupied, revenue)
+            night += datetime.timedelta(days=1)
+    return fill_nights(room_counts, totals, start, end)
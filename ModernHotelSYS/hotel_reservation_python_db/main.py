@@ -1,140 +1,52 @@
-import sqlite3
-import datetime
-
-
-reservation_counter = 1
-
-
-def get_next_reservation_id():
-    conn = sqlite3.connect("hotel.db")
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT reservation_id FROM reservations ORDER BY reservation_id DESC LIMIT 1"
-    )
-    row = cursor.fetchone()
-    conn.close()
-
-    if row:
-        try:
-            last_number = int(row[0].split("-")[1])
-            return last_number + 1
-        except:
-            return 1
-    return 1
-
-
-def init_db():
-    conn = sqlite3.connect("hotel.db")
-    cursor = conn.cursor()
-
-    # create tables if they don't exist
-    cursor.execute(
-        """
-    CREATE TABLE IF NOT EXISTS rooms (
-        room_number INTEGER PRIMARY KEY,
-        room_type TEXT,
-        price_per_night REAL,
-        is_available INTEGER DEFAULT 1
-    )"""
-    )
-
-    cursor.execute(
-        """
-    CREATE TABLE IF NOT EXISTS guests (
-        guest_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        contact TEXT
-    )"""
-    )
-
-    cursor.execute(
-        """
-    CREATE TABLE IF NOT EXISTS reservations (
-        reservation_id TEXT PRIMARY KEY,
-        guest_id INTEGER,
-        room_number INTEGER,
-        check_in_date TEXT,
-        check_out_date TEXT,
-        total_cost REAL,
-        FOREIGN KEY (guest_id) REFERENCES guests(guest_id),
-        FOREIGN KEY (room_number) REFERENCES rooms(room_number)
-    )"""
-    )
-
-
-def add_room(room_number, room_type, price_per_night):
-    conn = sqlite3.connect("hotel.db")
-    cursor = conn.cursor()
+# Interactive front end: prompts, calls hotel_db and prints the results.
+# Scripts and services should import hotel_db instead.
 
-    cursor.execute(
-        "INSERT OR IGNORE INTO rooms (room_number, room_type, price_per_night) VALUES (?, ?, ?)",
-        (room_number, room_type, price_per_night),
+import datetime
+import os
+import sys
+
+from hotel_db import (
+    DEFAULT_ROOM_SPEC,
+    ROOM_TYPE_PRICES,
+    SEARCH_PAGE_SIZE,
+    export_changes,
+    import_reservations,
+    init_db,
+    iter_reservations,
+    provision_rooms,
+    resolve_room_type,
+)
+from metrics import configure_from_env  # shared/ is on sys.path via db_connection
+from read_cache import DEFAULT_TTL, ReadCache
+
+# availability, lookups and searches are served from here; bookings,
+# cancellations and edits go through it too so it can drop what they change
+cache = ReadCache(ttl=float(os.environ.get("HOTEL_CACHE_TTL", DEFAULT_TTL)))
+
+
+def provision(inventory):
+    added, skipped, elapsed = provision_rooms(inventory)
+    print(
+        f"{added} rooms added to database in {elapsed * 1000:.1f} ms"
+        + (f" ({skipped} already existed)." if skipped else ".")
     )
 
-    conn.commit()
-    conn.close()
-
-    print(f"Room {room_number} added to database.")
-
-
-def auto_add_rooms():
-    for i in range(1, 11):
-        add_room(100 + i, "Single", 100)
-        add_room(200 + i, "Double", 150)
-        add_room(300 + i, "Suite", 300)
-
 
-def list_available_rooms():
-    conn = sqlite3.connect("hotel.db")
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "SELECT room_number, room_type, price_per_night FROM rooms WHERE is_available = 1"
-    )
-    rows = cursor.fetchall()
-
-    if rows:
-        print("\nAvailable Rooms:")
-        for room_number, room_type, price in rows:
-            print(f"Room: {room_number} ({room_type}) - ${price}/night")
+def sync(command, path, since=0):
+    # python main.py export changes.csv [watermark] | import changes.csv,
+    # for scheduled syncs with other systems
+    if command == "export":
+        rows, watermark = export_changes(path, since)
+        print(f"{rows} changed reservations written to {path}; next watermark {watermark}")
     else:
-        print("No rooms available.")
-
-    conn.close()
-
-
-def make_reservation():
-    global reservation_counter
-    conn = sqlite3.connect("hotel.db")
-    cursor = conn.cursor()
-
-    # get guest details
-    name = input("Enter guest name: ")
-    contact = input("Enter guest contact info: ")
-
-    # Insert guest into 'guests' table
-    cursor.execute("INSERT INTO guests (name, contact) VALUES (?, ?)", (name, contact))
-    guest_id = cursor.lastrowid  # gets the auto incremented guest_id
-
-    # choose room type
-    room_type = input("Enter room type (Single/Double/Suite): ").capitalize()
-
-    # Find an available room
-    cursor.execute(
-        "SELECT room_number, price_per_night FROM rooms WHERE room_type = ? AND is_available = 1",
-        (room_type,),
-    )
-    room = cursor.fetchone()
-
-    if not room:
-        print("No available rooms for that type")
-        conn.close()
-        return
+        result = import_reservations(path)
+        print(
+            f"{result.applied} reservations imported, {result.cancelled} cancelled, "
+            f"{result.skipped} skipped for want of a free room"
+        )
 
-    room_number, price = room
-    print(f"Room {room_number} selected at ${price}/night")
 
-    # choose check-in date
+def ask_check_in_date():
     print("Select Check-in Date")
     print(f"1. Today ({datetime.date.today()})")
     print(f"2. Tomorrow ({datetime.date.today() + datetime.timedelta(days=1)})")
@@ -143,334 +55,216 @@ def make_reservation():
     while True:
         choice = input("Choice: ")
         if choice == "1":
-            check_in = datetime.date.today()
-            break
+            return datetime.date.today()
         elif choice == "2":
-            check_in = datetime.date.today() + datetime.timedelta(days=1)
-            break
+            return datetime.date.today() + datetime.timedelta(days=1)
         elif choice == "3":
             try:
                 user_input = input("Enter check-in date (YYYY-MM-DD): ")
-                check_in = datetime.datetime.strptime(user_input, "%Y-%m-%d").date()
-                break
+                return datetime.datetime.strptime(user_input, "%Y-%m-%d").date()
             except:
                 print("Invalid date format.")
 
         else:
             print("Invalid options.")
 
-    # stay duration
-    nights = int(input("How many nights will the guest stay? "))
+
+def list_available_rooms():
+    check_in = ask_check_in_date()
+    nights = int(input("How many nights? ") or 1)
     check_out = check_in + datetime.timedelta(days=nights)
-    total_cost = nights * price
-
-    # create reservation
-    reservation_id = f"RES-{reservation_counter:03d}"
-    reservation_counter += 1
-
-    cursor.execute(
-        "INSERT INTO reservations (reservation_id, guest_id, room_number, check_in_date, check_out_date, total_cost) VALUES (?, ?, ?, ?, ?, ?)",
-        (
-            reservation_id,
-            guest_id,
-            room_number,
-            check_in.isoformat(),
-            check_out.isoformat(),
-            total_cost,
-        ),
-    )
 
-    # update room to not available
-    cursor.execute(
-        "UPDATE rooms SET is_available = 0 WHERE room_number = ?", (room_number,)
-    )
+    found = False
+    for room_type in ROOM_TYPE_PRICES:
+        for room_number, price in cache.available_rooms(room_type, check_in, check_out):
+            if not found:
+                print(f"\nAvailable Rooms ({check_in} to {check_out}):")
+                found = True
+            print(f"Room: {room_number} ({room_type}) - ${price}/night")
+    if not found:
+        print("No rooms available.")
 
-    conn.commit()
-    conn.close()
 
-    print("Reservation Successful!")
-    print(f"Reservation ID: {reservation_id}")
-    print(f"Check-in: {check_in}")
-    print(f"Check-out: {check_out}")
-    print(f"Total cost: ${total_cost}")
+def make_reservation():
+    # get guest details
+    name = input("Enter guest name: ")
+    contact = input("Enter guest contact info: ")
 
+    # choose room type
+    room_type = input("Enter room type (Single/Double/Suite): ").capitalize()
 
-def cancel_reservation():
-    conn = sqlite3.connect("hotel.db")
-    cursor = conn.cursor()
+    # choose check-in date
+    check_in = ask_check_in_date()
 
-    reservation_id = input("Enter reservation ID to cancel: ")
+    # stay duration
+    nights = int(input("How many nights will the guest stay? "))
 
-    # Check if reservation exists
-    cursor.execute(
-        "SELECT room_number FROM reservations WHERE reservation_id = ?",
-        (reservation_id,),
-    )
-    result = cursor.fetchone()
+    reservation = cache.book_room(name, contact, room_type, check_in, nights)
 
-    if not result:
-        print("Reservation not found.")
-        conn.close()
+    if not reservation:
+        print("No available rooms for that type")
         return
 
-    room_number = result[0]
-
-    # Delete reservation
-    cursor.execute(
-        "DELETE FROM reservations WHERE reservation_id = ?", (reservation_id,)
+    print(
+        f"Room {reservation.room_number} selected at ${reservation.price_per_night}/night"
     )
+    print("Reservation Successful!")
+    print(f"Reservation ID: {reservation.reservation_id}")
+    print(f"Check-in: {reservation.check_in}")
+    print(f"Check-out: {reservation.check_out}")
+    print(f"Total cost: ${reservation.total_cost}")
 
-    # Set room as available again
-    cursor.execute(
-        "UPDATE rooms SET is_available = 1 WHERE room_number = ?", (room_number,)
-    )
 
-    conn.commit()
-    conn.close()
+def cancel_reservation():
+    reservation_id = input("Enter reservation ID to cancel: ")
+
+    room_number = cache.delete_reservation(reservation_id)
+    if room_number is None:
+        print("Reservation not found.")
+        return
 
     print(
         f"Reservation {reservation_id} has been canceled and Room {room_number} is now available."
     )
 
 
-def view_reservations():
-    conn = sqlite3.connect("hotel.db")
-    cursor = conn.cursor()
-
-    query = """
-    SELECT 
-        r.reservation_id,
-        g.name,
-        g.contact,
-        r.room_number,
-        rooms.room_type,
-        r.check_in_date,
-        r.check_out_date,
-        r.total_cost
-    FROM reservations r
-    JOIN guests g ON r.guest_id = g.guest_id
-    JOIN rooms ON r.room_number = rooms.room_number
-    ORDER BY r.check_in_date
-    """
-    cursor.execute(query)
-    rows = cursor.fetchall()
-
-    if not rows:
+def view_reservations(start=None, end=None, room_type=None, status=None):
+    found = False
+    for reservation in iter_reservations(start, end, room_type, status):
+        if not found:
+            print("\n=== Current Reservations ===")
+            found = True
+        print_reservation(reservation)
+
+    if not found:
         print("No reservations found")
-    else:
-        print("\n=== Current Reservations ===")
-        for row in rows:
-            print(f"\nReservation ID: {row[0]}")
-            print(f"Guest: {row[1]} (Contact: {row[2]})")
-            print(f"Room: {row[3]} ({row[4]})")
-            print(f"Check-in: {row[5]}")
-            print(f"Check-out: {row[6]}")
-            print(f"Total Cost: ${row[7]}")
-            print("-" * 40)
 
-    conn.close()
 
+def print_reservation(r):
+    print(f"\nReservation ID: {r.reservation_id}")
+    print(f"Guest: {r.guest_name} (Contact: {r.contact})")
+    print(f"Room: {r.room_number} ({r.room_type})")
+    print(f"Check-in: {r.check_in}")
+    print(f"Check-out: {r.check_out}")
+    print(f"Total Cost: ${r.total_cost}")
+    print("-" * 40)
 
-def search_reservation():
-    conn = sqlite3.connect("hotel.db")
-    cursor = conn.cursor()
 
+def search_reservation():
     print("\nSearch By:")
-    print("1. Guest name: ")
+    print("1. Guest name or contact: ")
     print("2. Reservation ID: ")
     choice = input("Enter your choice: ")
 
     if choice == "1":
-        keyword = input("Enter guest name keyword: ").strip()
-        cursor.execute(
-            """
-            SELECT 
-                r.reservation_id, g.name, g.contact, 
-                r.room_number, rooms.room_type, 
-                r.check_in_date, r.check_out_date, r.total_cost
-            FROM reservations r
-            JOIN guests g ON r.guest_id = g.guest_id
-            JOIN rooms ON r.room_number = rooms.room_number
-            WHERE g.name LIKE ?
-        """,
-            ("%" + keyword + "%",),
-        )
+        keyword = input("Enter guest name or contact keyword: ").strip()
+        offset = 0
+        while True:
+            matches = cache.search_guests(keyword, offset=offset)
+            if not matches and offset == 0:
+                print("No Matching reservations found.")
+            for reservation in matches:
+                print_reservation(reservation)
+            if len(matches) < SEARCH_PAGE_SIZE:
+                return
+            if input("Show more results? (y/n): ").lower() != "y":
+                return
+            offset += SEARCH_PAGE_SIZE
 
     elif choice == "2":
         res_id = input("Enter reservation ID: ").strip()
-        cursor.execute(
-            """
-            SELECT 
-                r.reservation_id, g.name, g.contact, 
-                r.room_number, rooms.room_type, 
-                r.check_in_date, r.check_out_date, r.total_cost
-            FROM reservations r
-            JOIN guests g ON r.guest_id = g.guest_id
-            JOIN rooms ON r.room_number = rooms.room_number
-            WHERE r.reservation_id = ?
-        """,
-            (res_id,),
-        )
+        reservation = cache.get_reservation(res_id)
     else:
         print("Invalid choice!")
-        conn.close()
         return
 
-    rows = cursor.fetchall()
-    if not rows:
+    if not reservation:
         print("No Matching reservations found.")
     else:
-        for row in rows:
-            print(f"\nReservation ID: {row[0]}")
-            print(f"Guest: {row[1]} (Contact: {row[2]})")
-            print(f"Room: {row[3]} ({row[4]})")
-            print(f"Check-in: {row[5]}")
-            print(f"Check-out: {row[6]}")
-            print(f"Total Cost: ${row[7]}")
-            print("-" * 40)
-
-    conn.close()
+        print_reservation(reservation)
 
 
 def edit_reservation():
-    conn = sqlite3.connect("hotel.db")
-    cursor = conn.cursor()
-
-    reservation_id = input("Enter reservation ID to edit").strip()
+    reservation_id = input("Enter reservation ID to edit: ").strip()
 
     # fetch the reservation details
-    cursor.execute(
-        """
-        SELECT r.guest_id, g.name, g.contact, r.room_number, rooms.room_type,
-               r.check_in_date, r.check_out_date
-        FROM reservations r
-        JOIN guests g ON r.guest_id = g.guest_id
-        JOIN rooms ON r.room_number = rooms.room_number
-        WHERE r.reservation_id = ?
-    """,
-        (reservation_id,),
-    )
-    result = cursor.fetchone()
+    reservation = cache.get_reservation(reservation_id)
 
-    if not result:
+    if not reservation:
         print("Reservation not found")
-        conn.close()
         return
 
-    (
-        guest_id,
-        current_name,
-        current_contact,
-        room_number,
-        room_type,
-        check_in,
-        check_out,
-    ) = result
     print("\n=== Current Reservation Info ===")
-    print(f"Guest Name: {current_name}")
-    print(f"Contact: {current_contact}")
-    print(f"Room Type: {room_type}")
-    print(f"Check-in: {check_in}")
-    print(f"Check-out: {check_out}")
+    print(f"Guest Name: {reservation.guest_name}")
+    print(f"Contact: {reservation.contact}")
+    print(f"Room: {reservation.room_number} ({reservation.room_type})")
+    print(f"Check-in: {reservation.check_in}")
+    print(f"Check-out: {reservation.check_out}")
 
-    # ask what to update
+    # ask what to update; blank answers keep the current value
     new_name = (
-        input("Enter new guest name (Leave a blank to keep current): ").strip()
-        or current_name
+        input("Enter new guest name (Leave a blank to keep current): ").strip() or None
     )
     new_contact = (
-        input("Enter new contact (Leave a blank to keep current): ").strip()
-        or current_contact
+        input("Enter new contact (Leave a blank to keep current): ").strip() or None
     )
-
-    # ask for new room type
     new_room_type = (
         input("Enter new room type (Single/Double/Suite) or leave blank: ").strip()
-        or room_type
-    )
-    cursor.execute(
-        """
-        SELECT room_number FROM rooms 
-        WHERE room_type = ? AND is_available = 1
-    """,
-        (new_room_type,),
+        or None
     )
-    new_room = cursor.fetchone()
-    if not new_room:
-        print(f"No available {new_room_type} rooms. Keeping current room.")
-        new_room_number = room_number
-    else:
-        # free up old room
-        cursor.execute(
-            "UPDATE rooms SET is_available = 1 WHERE room_number = ?", (room_number,)
-        )
-        new_room_number = new_room[0]
-        cursor.execute(
-            "UPDATE rooms SET is_available = 0 WHERE room_number = ?",
-            (new_room_number,),
-        )
+    if new_room_type:
+        new_room_type = resolve_room_type(new_room_type)
+        if new_room_type is None:
+            print("Unknown room type: Keeping current type.")
 
-    # check-in updates
+    new_check_in = input("Enter new check-in date (YYYY-MM-DD) or leave blank: ").strip()
     try:
-        new_check_in = input(
-            "Enter new check-in date (YYYY-MM-DD) or leave blank: "
-        ).strip()
         new_check_in_date = (
-            datetime.datetime.strptime(new_check_in, "%Y-%m%d").date()
-            if new_check_in
-            else datetime.datetime.strptime(check_in, "Y%-%m-%d").date()
+            datetime.date.fromisoformat(new_check_in) if new_check_in else None
         )
-    except:
+    except ValueError:
         print("Invalid date format: Keeping current date.")
-        new_check_in_date = datetime.datetime.strptime(check_in, "%Y-%m-%d").date()
+        new_check_in_date = None
 
     try:
         nights = int(
-            input("Enter number of nights (Leave blank to keep same length): ")
-            or (datetime.datetime.strptime(check_in, "%Y-%m-%d").date()).days
+            input("Enter number of nights (Leave blank to keep same length): ") or 0
         )
-    except:
-        nights = 1
-
-    new_check_out_date = new_check_in_date + datetime.timedelta(days=nights)
-    new_total_cost = nights * (
-        150
-        if new_room_type.lower() == "double"
-        else 300 if new_room_type.lower() == "suite" else 100
-    )
-
-    # update database
-    cursor.execute(
-        "UPDATE guests SET name = ?, contact = ? WHERE guest_id = ?",
-        (new_name, new_contact, guest_id),
-    )
-    cursor.execute(
-        """
-        UPDATE reservations
-        SET room_number = ?, check_in_date = ?, check_out_date = ?, total_cost = ?
-        WHERE reservation_id = ?
-    """,
-        (
-            new_room_number,
-            new_check_in_date,
-            new_check_out_date,
-            new_total_cost,
-            reservation_id,
-        ),
+    except ValueError:
+        nights = 0
+    if nights < 0:
+        nights = 0
+
+    # availability, the room swap and the new price are settled in one
+    # transaction
+    updated = cache.modify_reservation(
+        reservation_id,
+        new_check_in_date,
+        nights or None,
+        new_room_type,
+        new_name,
+        new_contact,
     )
+    if updated is None:
+        print("No room is free for those dates. Reservation unchanged.")
+        return
 
-    conn.commit()
-    conn.close()
     print("\nReservation updated successfully!")
+    print_reservation(updated)
 
 
 if __name__ == "__main__":
+    configure_from_env()
     init_db()
 
-    reservation_counter = get_next_reservation_id()
-
-    if input("Add rooms to database? (y/n): ").lower() == "y":
-        auto_add_rooms()
+    if len(sys.argv) > 2 and sys.argv[1] in ("export", "import"):
+        sync(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 0)
+        sys.exit()
+    if len(sys.argv) > 1:
+        # python main.py rooms.csv|rooms.json provisions a whole property
+        provision(sys.argv[1])
+    elif input("Add rooms to database? (y/n): ").lower() == "y":
+        provision(DEFAULT_ROOM_SPEC)
 
     while True:
         print("\nHotel Reservation System (DB version)")
@@ -501,3 +295,4 @@ if __name__ == "__main__":
             break
         else:
             print("Invalid choice. Try again.")
+
@@ -0,0 +1,164 @@
+# Read-through cache in front of hotel_db for the lookups the front desk
+# repeats all day: free rooms by (room type, check-in, check-out),
+# reservations by ID and guest searches. Entries expire after `ttl` seconds
+# and the least recently used go first once there are `max_entries`.
+#
+# Writes go through the same object, which drops exactly the entries the
+# write can have changed: availability of the room type over overlapping
+# dates, the reservation itself, and searches that list it or whose
+# keyword matches its guest, before and after the change. Writes made by
+# other processes are only seen once entries expire; that can show a room
+# as free for up to `ttl` seconds after it was taken, but never double
+# books it, since book_room checks the room again inside its transaction.
+
+import collections
+import re
+import threading
+import time
+import unicodedata
+
+import hotel_db as db
+from db_connection import transaction
+from metrics import METRICS  # shared/ is on sys.path via db_connection
+
+DEFAULT_TTL = 30.0
+DEFAULT_MAX_ENTRIES = 4096
+
+# the kinds of entry, the first element of every key
+AVAILABILITY = "availability"
+RESERVATION = "reservation"
+SEARCH = "search"
+
+
+def fold(text):
+    # lower case without accents, as the guests_fts tokenizer sees it
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def guest_matches(keyword, name, contact):
+    # True when search_guests(keyword) could list a reservation of this
+    # guest: under either the FTS word-prefix match or the LIKE fallback.
+    # Erring towards True only costs a needless reload.
+    terms = re.findall(r"\w+", fold(keyword))
+    words = re.findall(r"\w+", fold(f"{name} {contact}"))
+    if all(any(word.startswith(term) for word in words) for term in terms):
+        return True
+    return fold(keyword) in fold(name) or fold(keyword) in fold(contact)
+
+
+class ReadCache:
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()  # key -> (expires, value), oldest use first
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
+        # bumped by every invalidation; a load that overlapped one is not
+        # stored, as it may have read the data from before the write
+        self.generation = 0
+
+    def _read(self, key, load, *args):
+        now = self.clock()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.hits[key[0]] += 1
+                METRICS.inc("db_cache_hits_total", cache=key[0])
+                return entry[1]
+            self.misses[key[0]] += 1
+            METRICS.inc("db_cache_misses_total", cache=key[0])
+            generation = self.generation
+        value = load(*args)
+        with self.lock:
+            if generation == self.generation:
+                self.entries[key] = (now + self.ttl, value)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return value
+
+    def available_rooms(self, room_type, check_in, check_out):
+        # [(room_number, price_per_night), ...] as db.find_available_rooms,
+        # for room_type exactly as provisioned; treat the list as read-only,
+        # it is shared with later callers
+        return self._read(
+            (AVAILABILITY, room_type, check_in, check_out),
+            db.find_available_rooms,
+            room_type,
+            check_in,
+            check_out,
+        )
+
+    def get_reservation(self, reservation_id):
+        return self._read((RESERVATION, reservation_id), db.get_reservation, reservation_id)
+
+    def search_guests(self, keyword, limit=db.SEARCH_PAGE_SIZE, offset=0):
+        return self._read((SEARCH, keyword, limit, offset), db.search_guests, keyword, limit, offset)
+
+    def book_room(self, name, contact, room_type, check_in, nights):
+        reservation = db.book_room(name, contact, room_type, check_in, nights)
+        self.invalidate(reservation)
+        return reservation
+
+    def delete_reservation(self, reservation_id):
+        # the reservation is read in the same transaction as the delete, so
+        # the entries dropped are the ones for what was actually deleted
+        with transaction("IMMEDIATE"):
+            deleted = db.get_reservation(reservation_id)
+            room_number = db.delete_reservation(reservation_id)
+        self.invalidate(deleted)
+        return room_number
+
+    def modify_reservation(self, reservation_id, *args, **kwargs):
+        with transaction("IMMEDIATE"):
+            before = db.get_reservation(reservation_id)
+            after = db.modify_reservation(reservation_id, *args, **kwargs)
+        if after is not None:
+            self.invalidate(before, after)
+        return after
+
+    def invalidate(self, *reservations):
+        # drops every entry any of these reservations can appear in, or
+        # change the answer of; None stands for no reservation
+        reservations = [r for r in reservations if r is not None]
+        if not reservations:
+            return
+        with self.lock:
+            self.generation += 1
+            stale = [
+                key
+                for key, (_, value) in self.entries.items()
+                if any(self._affects(key, value, r) for r in reservations)
+            ]
+            for key in stale:
+                del self.entries[key]
+        METRICS.inc("db_cache_invalidations_total", len(stale))
+
+    def _affects(self, key, value, r):
+        if key[0] == AVAILABILITY:
+            _, room_type, check_in, check_out = key
+            return room_type == r.room_type and check_in < r.check_out and r.check_in < check_out
+        if key[0] == RESERVATION:
+            return key[1] == r.reservation_id
+        return any(found.reservation_id == r.reservation_id for found in value) or guest_matches(
+            key[1], r.guest_name, r.contact
+        )
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def stats(self):
+        # {kind: {"hits": n, "misses": n}} plus the number of live entries
+        with self.lock:
+            counts = {
+                kind: {"hits": self.hits[kind], "misses": self.misses[kind]}
+                for kind in (AVAILABILITY, RESERVATION, SEARCH)
+            }
+            counts["entries"] = len(self.entries)
+        return counts
@@ -1,17 +1,71 @@
+import array
+import bisect
 import csv
 import datetime
+import heapq
+import itertools
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+
+from analytics import expand_stays
+from metrics import configure_from_env, timed
+from rate_calendar import RateCalendar
+from reservation_csv import (
+    CHUNK_ROWS, CSV_HEADER, ExportRow, ImportResult, cancelled_row, read_chunks, write_export,
+)
+from reservation_journal import CANCEL, CREATE, MODIFY, REPACK, ReservationJournal
+from reservation_snapshot import RECORD_FIELDS, ReservationSnapshot, write_snapshot
+from room_assignment import FirstFit, repack
+
+# data files with this suffix use the binary format of reservation_snapshot
+SNAPSHOT_SUFFIX = ".snap"
+
+# derived from the dates; cancelled reservations are removed from the hotel
+RESERVATION_STATUSES = ("upcoming", "in-house", "completed")
+
+def reservation_status(reservation, today):
+    if reservation.check_in > today:
+        return "upcoming"
+    if reservation.check_out > today:
+        return "in-house"
+    return "completed"
+
+def parse_total(text):
+    # the price the guest was quoted, or None for rows saved without one
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def parse_sequence(parts, index):
+    # the change sequence stored in column `index`, or 0 for rows saved
+    # before there was one
+    try:
+        return int(parts[index])
+    except (IndexError, ValueError):
+        return 0
+
+# A hotel keeps every reservation it has ever loaded in memory, so the model
+# classes use __slots__ (no per-instance __dict__) and share what they can:
+# room types are interned strings and the loaders reuse one Guest per name
+# and one date object per distinct date.
 
 class Room:
+    __slots__ = ("room_number", "room_type", "price_per_night")
+
     def __init__(self, room_number, room_type, price_per_night):
         self.room_number = room_number
-        self.room_type = room_type
+        self.room_type = sys.intern(room_type)
         self.price_per_night = price_per_night
 
     def __str__(self):
         return f"Room {self.room_number} ({self.room_type}) - ${self.price_per_night:.2f}/night"
 
 class Guest:
+    __slots__ = ("name", "contact_info")
+
     def __init__(self, name, contact_info):
         self.name = name
         self.contact_info = contact_info
@@ -20,14 +74,23 @@ class Guest:
         return f"Guest: {self.name}, Contact: {self.contact_info}"
 
 class Reservation:
-    def __init__(self, reservation_id, guest, room, check_in, check_out):
+    __slots__ = ("reservation_id", "guest", "room", "check_in", "check_out", "total_cost", "sequence")
+
+    def __init__(self, reservation_id, guest, room, check_in, check_out, total_cost=None, sequence=0):
         self.reservation_id = reservation_id
         self.guest = guest
         self.room = room
         self.check_in = check_in
         self.check_out = check_out
+        # priced once when booked (see RateCalendar) and stored with the booking
+        self.total_cost = total_cost
+        # the hotel's change sequence when this was last booked, moved or
+        # edited; 0 until the hotel records it
+        self.sequence = sequence
 
     def calculate_total_cost(self):
+        if self.total_cost is not None:
+            return self.total_cost
         nights = (self.check_out - self.check_in).days
         return nights * self.room.price_per_night
 
@@ -38,106 +101,992 @@ class Reservation:
                 f"Check-in: {self.check_in}, Check-out: {self.check_out}\n"
                 f"Total Cost: ${self.calculate_total_cost():.2f}")
 
+class RoomSchedule:
+    # Bookings of a single room kept sorted by check-in. Bookings on one room
+    # never overlap, so the check-out dates are sorted as well and both lists
+    # can be searched with bisect.
+    def __init__(self):
+        self.check_ins = []
+        self.check_outs = []
+        self.reservations = []
+
+    def __len__(self):
+        return len(self.reservations)
+
+    def is_free(self, check_in, check_out):
+        # first booking that ends after the requested check-in
+        i = bisect.bisect_right(self.check_outs, check_in)
+        return i == len(self.check_ins) or self.check_ins[i] >= check_out
+
+    def gap_around(self, check_in, check_out):
+        # (end of the booking before, start of the booking after) the free
+        # stretch holding [check_in, check_out); None marks an open end.
+        # Returns None when the room is taken for those dates.
+        i = bisect.bisect_right(self.check_outs, check_in)
+        if i < len(self.check_ins) and self.check_ins[i] < check_out:
+            return None
+        previous_end = self.check_outs[i - 1] if i > 0 else None
+        next_start = self.check_ins[i] if i < len(self.check_ins) else None
+        return previous_end, next_start
+
+    def load(self, reservations):
+        # reservations must already be sorted by check-in and non-overlapping
+        self.reservations = list(reservations)
+        self.check_ins = [r.check_in for r in self.reservations]
+        self.check_outs = [r.check_out for r in self.reservations]
+
+    def add(self, reservation):
+        i = bisect.bisect_right(self.check_ins, reservation.check_in)
+        self.check_ins.insert(i, reservation.check_in)
+        self.check_outs.insert(i, reservation.check_out)
+        self.reservations.insert(i, reservation)
+
+    def remove(self, reservation):
+        i = bisect.bisect_left(self.check_ins, reservation.check_in)
+        while i < len(self.reservations) and self.check_ins[i] == reservation.check_in:
+            if self.reservations[i] is reservation:
+                del self.check_ins[i]
+                del self.check_outs[i]
+                del self.reservations[i]
+                return True
+            i += 1
+        return False
+
+class OccupancyCalendar:
+    # Room x night occupancy kept as one int bitmask per room: bit i is set
+    # when the room is booked for the night of day `origin + i`. A window of
+    # nights is then a single shift-and-mask instead of a scan per night.
+    def __init__(self):
+        self.origin = None
+        self.masks = {}
+        self.rooms_by_type = {}
+
+    def add_room(self, room):
+        if room.room_number not in self.masks:
+            self.masks[room.room_number] = 0
+            self.rooms_by_type.setdefault(room.room_type.lower(), []).append(room)
+
+    def _offset(self, day):
+        ordinal = day.toordinal()
+        if self.origin is None:
+            self.origin = ordinal
+        elif ordinal < self.origin:
+            shift = self.origin - ordinal
+            for room_number in self.masks:
+                self.masks[room_number] <<= shift
+            self.origin = ordinal
+        return ordinal - self.origin
+
+    def _window(self, room_number, start, days):
+        if self.origin is None or days <= 0:
+            return 0
+        offset = start.toordinal() - self.origin
+        mask = self.masks.get(room_number, 0)
+        mask = mask >> offset if offset >= 0 else mask << -offset
+        return mask & ((1 << days) - 1)
+
+    def load(self, schedules):
+        # rebuild every mask from sorted per-room schedules in one pass
+        self.origin = None
+        first = [s.check_ins[0] for s in schedules.values() if len(s)]
+        if first:
+            self.origin = min(first).toordinal()
+        for room_number in self.masks:
+            self.masks[room_number] = 0
+        for room_number, schedule in schedules.items():
+            mask = 0
+            for check_in, check_out in zip(schedule.check_ins, schedule.check_outs):
+                nights = (check_out - check_in).days
+                if nights > 0:
+                    mask |= ((1 << nights) - 1) << (check_in.toordinal() - self.origin)
+            self.masks[room_number] = mask
+
+    def book(self, room_number, check_in, check_out):
+        nights = (check_out - check_in).days
+        if nights > 0:
+            bits = ((1 << nights) - 1) << self._offset(check_in)
+            self.masks[room_number] = self.masks.get(room_number, 0) | bits
+
+    def release(self, room_number, check_in, check_out):
+        nights = (check_out - check_in).days
+        if nights > 0 and room_number in self.masks:
+            bits = ((1 << nights) - 1) << self._offset(check_in)
+            self.masks[room_number] &= ~bits
+
+    def free_rooms(self, room_type, check_in, nights):
+        return [room for room in self.rooms_by_type.get(room_type.lower(), [])
+                if not self._window(room.room_number, check_in, nights)]
+
+    def availability_grid(self, start, days, room_type=None):
+        # {room_number: [True if free on night start + i for i in range(days)]}
+        if room_type is None:
+            rooms = [room for rooms in self.rooms_by_type.values() for room in rooms]
+        else:
+            rooms = self.rooms_by_type.get(room_type.lower(), [])
+        grid = {}
+        for room in rooms:
+            window = self._window(room.room_number, start, days)
+            grid[room.room_number] = [c == "0" for c in format(window, f"0{days}b")[::-1]]
+        return grid
+
+    def free_counts(self, start, days):
+        # {room_type: [free rooms on night start + i for i in range(days)]}
+        counts = {}
+        for room_type, rooms in self.rooms_by_type.items():
+            free = [len(rooms)] * days
+            for room in rooms:
+                window = self._window(room.room_number, start, days)
+                while window:
+                    low = window & -window
+                    free[low.bit_length() - 1] -= 1
+                    window ^= low
+            counts[rooms[0].room_type] = free
+        return counts
+
+class GuestSearchIndex:
+    # Word-prefix index over guest names and contacts, for
+    # search_reservations. postings maps each lower-cased word to the ID of
+    # the one booking holding it, or to a set of IDs once several do (most
+    # words, a surname or a phone number, belong to one booking, and a set
+    # costs far more than the string). words keeps the distinct words
+    # sorted, so the words starting with a term are one bisect range; new
+    # words wait in pending and are merged in by the next search.
+    def __init__(self):
+        self.postings = {}
+        self.words = []
+        self.pending = []
+
+    @staticmethod
+    def words_of(guest):
+        return set(f"{guest.name} {guest.contact_info}".lower().split())
+
+    def add(self, reservation_id, guest):
+        for word in self.words_of(guest):
+            ids = self.postings.get(word)
+            if ids is None:
+                self.postings[word] = reservation_id
+                self.pending.append(word)
+            elif isinstance(ids, set):
+                ids.add(reservation_id)
+            else:
+                self.postings[word] = {ids, reservation_id}
+
+    def remove(self, reservation_id, guest):
+        for word in self.words_of(guest):
+            ids = self.postings.get(word)
+            if isinstance(ids, set):
+                ids.discard(reservation_id)
+                if len(ids) == 1:
+                    self.postings[word] = next(iter(ids))
+            elif ids == reservation_id:
+                del self.postings[word]
+                i = bisect.bisect_left(self.words, word)
+                if i < len(self.words) and self.words[i] == word:
+                    del self.words[i]
+                else:
+                    self.pending.remove(word)
+
+    def load(self, reservations):
+        self.postings = {}
+        self.pending = []
+        for r in reservations:
+            self.add(r.reservation_id, r.guest)
+        self.words = sorted(self.postings)
+        self.pending = []
+
+    def matching(self, terms):
+        # the IDs with a word starting with each of the terms
+        if len(self.pending) > 64:
+            self.words = sorted(self.words + self.pending)
+        else:
+            for word in self.pending:
+                bisect.insort(self.words, word)
+        self.pending = []
+        # (read-only: a term matching a single word gets that word's own set)
+        matched = None
+        for term in terms:
+            i = bisect.bisect_left(self.words, term)
+            j = i
+            while j < len(self.words) and self.words[j].startswith(term):
+                j += 1
+            postings = [self.postings[word] for word in self.words[i:j]]
+            if len(postings) == 1 and isinstance(postings[0], set):
+                found = postings[0]
+            else:
+                found = set()
+                for ids in postings:
+                    if isinstance(ids, set):
+                        found |= ids
+                    else:
+                        found.add(ids)
+            matched = found if matched is None else matched & found
+            if not matched:
+                break
+        return matched
+
 class Hotel:
-    def __init__(self, name, address):
+    def __init__(self, name, address, data_file="reservations.csv", journal_file="reservations.journal",
+                 compact_every=1000, assignment_strategy=None, rates=None):
         self.name = name
         self.address = address
+        self.assignment_strategy = assignment_strategy or FirstFit()
+        self.rates = rates or RateCalendar()
+        self.data_file = data_file
+        self.journal = ReservationJournal(journal_file)
+        self.compact_every = compact_every
         self.rooms = []
+        self.rooms_by_number = {}
+        self.stored_guests = {}
+        self.search_index = GuestSearchIndex()
+        # Reservations in booking order. Cancelling leaves a None tombstone
+        # so the positions in reservation_index stay valid; the list is
+        # compacted once tombstones make up half of it.
         self.reservations = []
+        self.reservation_index = {}
+        self.tombstones = 0
         self.reservation_counter = 1
+        self.room_schedules = {}
+        self.calendar = OccupancyCalendar()
+        # Every change takes the next change_sequence number. The change
+        # log, change_sequences with change_ids alongside, lists them in
+        # sequence order for iter_changes (an array of sequences rather than
+        # (sequence, ID) tuples saves a tuple and an int per booking); an
+        # entry is stale once its reservation changes again and the log
+        # drops stale entries once they make up half of it.
+        # Cancelled IDs keep their sequence in cancellations, saved next to
+        # the data file, until forget_cancellations.
+        self.change_sequence = 0
+        self.change_sequences = array.array("q")
+        self.change_ids = []
+        self.stale_changes = 0
+        self.cancellations = {}
+        self.cancellations_file = data_file + ".cancelled"
 
     def add_room(self, room):
         self.rooms.append(room)
+        self.rooms_by_number[room.room_number] = room
+        self.room_schedules.setdefault(room.room_number, RoomSchedule())
+        self.calendar.add_room(room)
+        self.rates.add_room_type(room.room_type, room.price_per_night)
 
     def auto_add_rooms(self, singles, doubles, suites):
         for i in range(1, singles + 1):
-            self.add_room(Room(100 + i, "Single", 100))
+            self.add_room(Room(100 + i, "Single", self.rates.base_rate("Single")))
         for i in range(1, doubles + 1):
-            self.add_room(Room(200 + i, "Double", 150))
+            self.add_room(Room(200 + i, "Double", self.rates.base_rate("Double")))
         for i in range(1, suites + 1):
-            self.add_room(Room(300 + i, "Suite", 300))
+            self.add_room(Room(300 + i, "Suite", self.rates.base_rate("Suite")))
+
+    def quote(self, room_type, check_in, nights):
+        return self.rates.quote(room_type, check_in, nights)
 
     def is_room_available(self, room, check_in, check_out):
-        for r in self.reservations:
-            if r.room.room_number == room.room_number:
-                if not (check_out <= r.check_in or check_in >= r.check_out):
-                    return False
-        return True
+        # not timed: the assignment strategies call it once per candidate room
+        schedule = self.room_schedules.get(room.room_number)
+        return schedule is None or schedule.is_free(check_in, check_out)
 
+    @timed("hotel_call_seconds")
     def find_available_room(self, room_type, check_in, check_out):
-        for r in self.rooms:
-            if r.room_type.lower() == room_type.lower() and self.is_room_available(r, check_in, check_out):
-                return r
-        return None
+        rooms = self.calendar.rooms_by_type.get(room_type.lower(), [])
+        return self.assignment_strategy.choose(self, rooms, check_in, check_out)
 
+    def repack_room_type(self, room_type, today=None):
+        # Reassigns the rooms of every booking of this type that has not
+        # checked in yet, packing them as tightly as possible. Bookings that
+        # have started keep their rooms. Returns the number of bookings moved,
+        # or None if they could not all be placed (nothing is changed then).
+        today = today or datetime.date.today()
+        rooms = self.calendar.rooms_by_type.get(room_type.lower(), [])
+        movable = []
+        busy_until = {}
+        for room in rooms:
+            for r in self.room_schedules[room.room_number].reservations:
+                if r.check_in > today:
+                    movable.append(r)
+                elif r.check_out > busy_until.get(room.room_number, today):
+                    busy_until[room.room_number] = r.check_out
+        assignment = repack(movable, rooms, busy_until)
+        if assignment is None:
+            return None
+        moved = [r for r in movable if assignment[r.reservation_id] is not r.room]
+        for r in moved:
+            self._unindex_reservation(r)
+        for r in moved:
+            r.room = assignment[r.reservation_id]
+            self._index_reservation(r)
+            self._changed(r)
+        self.journal.append_many([self._journal_row(REPACK, r) for r in moved])
+        self.maybe_compact()
+        return len(moved)
+
+    @timed("hotel_call_seconds")
     def make_reservation(self, guest, room_type, check_in, nights):
         check_out = check_in + datetime.timedelta(days=nights)
         room = self.find_available_room(room_type, check_in, check_out)
         if room:
             reservation_id = f"RES-{self.reservation_counter:03d}"
             self.reservation_counter += 1
-            reservation = Reservation(reservation_id, guest, room, check_in, check_out)
-            self.reservations.append(reservation)
-            self.save_reservations_to_file()
+            total = self.quote(room.room_type, check_in, nights)
+            reservation = Reservation(reservation_id, guest, room, check_in, check_out, total)
+            self.add_reservation(reservation)
+            self._changed(reservation)
+            self._journal_reservation(CREATE, reservation)
             return reservation
         return None
 
+    @timed("hotel_call_seconds")
+    def make_reservations_bulk(self, requests):
+        # requests: iterable of (guest, room_type, check_in, nights).
+        # Either every request gets a room or none is booked; the batch is
+        # journalled with a single write and fsync.
+        counter = self.reservation_counter
+        booked = []
+        for guest, room_type, check_in, nights in requests:
+            check_out = check_in + datetime.timedelta(days=nights)
+            room = self.find_available_room(room_type, check_in, check_out)
+            if room is None:
+                # undo in reverse; the batch sits at the end of self.reservations
+                for r in reversed(booked):
+                    self._unindex_reservation(r)
+                    self.search_index.remove(r.reservation_id, r.guest)
+                    del self.reservation_index[r.reservation_id]
+                    self.reservations.pop()
+                self.reservation_counter = counter
+                return None
+            reservation_id = f"RES-{self.reservation_counter:03d}"
+            self.reservation_counter += 1
+            total = self.quote(room.room_type, check_in, nights)
+            reservation = Reservation(reservation_id, guest, room, check_in, check_out, total)
+            self.add_reservation(reservation)
+            booked.append(reservation)
+        for r in booked:
+            self._changed(r)
+        self.journal.append_many([self._journal_row(CREATE, r) for r in booked])
+        self.maybe_compact()
+        return booked
+
+    def _journal_row(self, event, r):
+        return [event, r.reservation_id, r.guest.name, r.room.room_number, r.room.room_type,
+                r.check_in, r.check_out, f"{r.calculate_total_cost():.2f}", r.sequence]
+
+    def _journal_reservation(self, event, r):
+        self.journal.append(self._journal_row(event, r))
+        self.maybe_compact()
+
+    def get_reservation(self, reservation_id):
+        position = self.reservation_index.get(reservation_id)
+        return None if position is None else self.reservations[position]
+
+    def reservation_count(self):
+        return len(self.reservation_index)
+
+    def active_reservations(self):
+        return (r for r in self.reservations if r is not None)
+
+    def add_reservation(self, reservation):
+        self.reservation_index[reservation.reservation_id] = len(self.reservations)
+        self.reservations.append(reservation)
+        self._index_reservation(reservation)
+        self.search_index.add(reservation.reservation_id, reservation.guest)
+        self._advance_counter(reservation.reservation_id)
+
+    def _index_reservation(self, reservation):
+        self.room_schedules.setdefault(reservation.room.room_number, RoomSchedule()).add(reservation)
+        self.calendar.book(reservation.room.room_number, reservation.check_in, reservation.check_out)
+
+    def _unindex_reservation(self, reservation):
+        self.room_schedules[reservation.room.room_number].remove(reservation)
+        self.calendar.release(reservation.room.room_number, reservation.check_in, reservation.check_out)
+
+    def _advance_counter(self, reservation_id):
+        # keep new IDs clear of the ones loaded from disk
+        try:
+            number = int(reservation_id.split("-")[1])
+        except (IndexError, ValueError):
+            return
+        if number >= self.reservation_counter:
+            self.reservation_counter = number + 1
+
+    def _next_sequence(self):
+        self.change_sequence += 1
+        return self.change_sequence
+
+    def _changed(self, r):
+        # r was just booked, moved or edited
+        if r.sequence:
+            self.stale_changes += 1
+        r.sequence = self._next_sequence()
+        self._log_change(r.sequence, r.reservation_id)
+
+    def _cancelled(self, r):
+        self.stale_changes += 1
+        if r.reservation_id in self.cancellations:
+            self.stale_changes += 1  # cancelled before, then imported again
+        sequence = self.cancellations[r.reservation_id] = self._next_sequence()
+        self._log_change(sequence, r.reservation_id)
+        return sequence
+
+    def _is_current(self, sequence, reservation_id):
+        # whether a change log entry is still the latest booking or the
+        # latest cancellation of its ID (an imported row can bring back a
+        # cancelled ID, and then both are)
+        r = self.get_reservation(reservation_id)
+        return (r is not None and r.sequence == sequence) or self.cancellations.get(reservation_id) == sequence
+
+    def _log_change(self, sequence, reservation_id):
+        self.change_sequences.append(sequence)
+        self.change_ids.append(reservation_id)
+        if self.stale_changes > 64 and self.stale_changes * 2 > len(self.change_ids):
+            self._set_change_log(
+                (s, i) for s, i in zip(self.change_sequences, self.change_ids) if self._is_current(s, i)
+            )
+
+    def _rebuild_change_log(self):
+        self._set_change_log(sorted(
+            [(r.sequence, r.reservation_id) for r in self.active_reservations()]
+            + [(sequence, reservation_id) for reservation_id, sequence in self.cancellations.items()]
+        ))
+
+    def _set_change_log(self, entries):
+        # entries: (sequence, reservation_id) pairs in sequence order
+        sequences = array.array("q")
+        ids = []
+        for sequence, reservation_id in entries:
+            sequences.append(sequence)
+            ids.append(reservation_id)
+        self.change_sequences = sequences
+        self.change_ids = ids
+        self.stale_changes = 0
+
+    def stored_guest(self, name):
+        # files only keep the guest name, so rows with the same name share a Guest
+        guest = self.stored_guests.get(name)
+        if guest is None:
+            guest = self.stored_guests[name] = Guest(name, "N/A")
+        return guest
+
+    def remove_reservation(self, reservation_id):
+        position = self.reservation_index.pop(reservation_id, None)
+        if position is None:
+            return None
+        r = self.reservations[position]
+        self.reservations[position] = None
+        self.tombstones += 1
+        self._unindex_reservation(r)
+        self.search_index.remove(reservation_id, r.guest)
+        if self.tombstones > 64 and self.tombstones * 2 > len(self.reservations):
+            self._compact_reservations()
+        return r
+
+    def _compact_reservations(self):
+        self.reservations = list(self.active_reservations())
+        self.reservation_index = {r.reservation_id: i for i, r in enumerate(self.reservations)}
+        self.tombstones = 0
+
+    @timed("hotel_call_seconds")
+    def modify_reservation(self, reservation_id, check_in=None, nights=None, room_type=None):
+        # Moves a booking to new dates and/or room type, keeping its room when
+        # that room is still free. Returns None and leaves the booking as it
+        # was when nothing suitable is free.
+        r = self.get_reservation(reservation_id)
+        if r is None:
+            return None
+        check_in = check_in or r.check_in
+        nights = nights or (r.check_out - r.check_in).days
+        check_out = check_in + datetime.timedelta(days=nights)
+        room_type = room_type or r.room.room_type
+        self._unindex_reservation(r)
+        room = r.room
+        if room.room_type.lower() != room_type.lower() or not self.is_room_available(room, check_in, check_out):
+            room = self.find_available_room(room_type, check_in, check_out)
+        if room is None:
+            self._index_reservation(r)
+            return None
+        r.room = room
+        r.check_in = check_in
+        r.check_out = check_out
+        r.total_cost = self.quote(room.room_type, check_in, nights)
+        self._index_reservation(r)
+        self._changed(r)
+        self._journal_reservation(MODIFY, r)
+        return r
+
+    @timed("hotel_call_seconds")
+    def discard_reservation(self, reservation_id):
+        # cancel without printing; returns the removed reservation or None
+        r = self.remove_reservation(reservation_id)
+        if r is not None:
+            self.journal.append([CANCEL, reservation_id, self._cancelled(r)])
+            self.maybe_compact()
+        return r
+
+    @timed("hotel_call_seconds")
     def cancel_reservation(self, reservation_id):
-        for i, r in enumerate(self.reservations):
-            if r.reservation_id == reservation_id:
-                del self.reservations[i]
-                self.save_reservations_to_file()
-                print(f"Reservation {reservation_id} canceled.")
-                return
+        if self.discard_reservation(reservation_id):
+            print(f"Reservation {reservation_id} canceled.")
+            return
         print("Reservation ID not found.")
 
+    def search_reservations(self, keyword, limit=20, offset=0):
+        # every word has to match the start of a word in the guest name or
+        # contact, like the database search; results in check-in order
+        terms = keyword.lower().split()
+        wanted = offset + limit
+        if not terms:
+            return list(itertools.islice(self.iter_reservations(), offset, wanted))
+        ids = self.search_index.matching(terms)
+        if not ids:
+            return []
+        if len(ids) * len(ids) > wanted * self.reservation_count():
+            # a common word: walking the check-in order fills the page
+            # sooner than ordering every match
+            matches = (r for r in self.iter_reservations() if r.reservation_id in ids)
+            return list(itertools.islice(matches, offset, wanted))
+        matches = heapq.nsmallest(wanted, (self.get_reservation(i) for i in ids),
+                                  key=lambda r: (r.check_in, r.reservation_id))
+        return matches[offset:]
+
+    def available_rooms(self, room_type, check_in, nights):
+        return self.calendar.free_rooms(room_type, check_in, nights)
+
+    def availability_grid(self, start, days, room_type=None):
+        return self.calendar.availability_grid(start, days, room_type)
+
+    def free_room_counts(self, start, days):
+        return self.calendar.free_counts(start, days)
+
+    @timed("hotel_call_seconds")
+    def nightly_stats(self, start, end, room_type=None):
+        # occupancy and revenue per night and room type over [start, end), as
+        # analytics.NightStats. Each room schedule is entered by bisecting its
+        # check-outs, so only the stays overlapping the range are visited.
+        rooms = self.rooms if room_type is None else self.calendar.rooms_by_type.get(room_type.lower(), [])
+        room_counts = {}
+        for room in rooms:
+            room_counts[room.room_type] = room_counts.get(room.room_type, 0) + 1
+
+        def stays():
+            for room in rooms:
+                schedule = self.room_schedules[room.room_number]
+                first = bisect.bisect_right(schedule.check_outs, start)
+                for r in itertools.islice(schedule.reservations, first, None):
+                    if r.check_in >= end:
+                        break
+                    yield room.room_type, r.check_in, r.check_out, r.calculate_total_cost()
+
+        return expand_stays(room_counts, stays(), start, end)
+
     def list_available_rooms(self, check_in, nights, room_type):
-        check_out = check_in + datetime.timedelta(days=nights)
-        found = False
-        for r in self.rooms:
-            if r.room_type.lower() == room_type.lower() and self.is_room_available(r, check_in, check_out):
-                print(r)
-                found = True
-        if not found:
+        rooms = self.available_rooms(room_type, check_in, nights)
+        for r in rooms:
+            print(r)
+        if not rooms:
             print("No available rooms for the given date.")
 
-    def list_reservations(self):
-        if not self.reservations:
-            print("No current reservations.")
+    def iter_reservations(self, start=None, end=None, room_type=None, status=None, after=None, today=None):
+        # Streams reservations checking in within [start, end) in
+        # (check_in, reservation_id) order. The per-room schedules are already
+        # sorted by check-in, so they are merged lazily instead of sorting a
+        # copy of every reservation. Pass the last (check_in, reservation_id)
+        # seen as `after` to resume a listing page by page.
+        if status is not None and status not in RESERVATION_STATUSES:
+            raise ValueError(f"Unknown reservation status {status!r}")
+        today = today or datetime.date.today()
+        rooms = self.rooms if room_type is None else self.calendar.rooms_by_type.get(room_type.lower(), [])
+        low = start
+        if after is not None and (low is None or after[0] > low):
+            low = after[0]
+        streams = []
+        for room in rooms:
+            schedule = self.room_schedules[room.room_number]
+            first = 0 if low is None else bisect.bisect_left(schedule.check_ins, low)
+            streams.append(itertools.islice(schedule.reservations, first, None))
+        for r in heapq.merge(*streams, key=lambda r: (r.check_in, r.reservation_id)):
+            if end is not None and r.check_in >= end:
+                return
+            if after is not None and (r.check_in, r.reservation_id) <= tuple(after):
+                continue
+            if status is not None and reservation_status(r, today) != status:
+                continue
+            yield r
+
+    def iter_changes(self, since=0, chunk_rows=CHUNK_ROWS):
+        # Streams an ExportRow for every reservation booked, changed or
+        # cancelled after the `since` sequence, oldest change first. The log
+        # is read a chunk at a time from the last sequence seen, so changes
+        # made between chunks are picked up rather than skipped.
+        while True:
+            start = bisect.bisect_right(self.change_sequences, since)
+            chunk = list(zip(self.change_sequences[start:start + chunk_rows],
+                             self.change_ids[start:start + chunk_rows]))
+            if not chunk:
+                return
+            for sequence, reservation_id in chunk:
+                r = self.get_reservation(reservation_id)
+                if r is not None and r.sequence == sequence:
+                    yield ExportRow(r.reservation_id, r.guest.name, r.room.room_number, r.room.room_type,
+                                    r.check_in, r.check_out, r.calculate_total_cost(), sequence, False)
+                elif self.cancellations.get(reservation_id) == sequence:
+                    yield cancelled_row(reservation_id, sequence)
+            since = chunk[-1][0]
+
+    def export_changes(self, path, since=0):
+        # Writes the changes after `since` to a CSV export (see
+        # reservation_csv) and returns (rows, watermark); pass the
+        # watermark as `since` on the next run. since=0 exports everything.
+        return write_export(path, self.iter_changes(since), since)
+
+    def import_reservations(self, path, chunk_rows=CHUNK_ROWS):
+        # Applies an export or a reservations.csv a chunk at a time. A row
+        # books or updates the reservation with its ID, in its own room when
+        # that is free and otherwise in the first free room of its type; a
+        # cancelled row cancels it. Every chunk is journalled with one write.
+        # Rows that no room can be found for are skipped.
+        applied = cancelled = skipped = 0
+        for chunk in read_chunks(path, chunk_rows):
+            events = []
+            for row in chunk:
+                if row.cancelled:
+                    r = self.remove_reservation(row.reservation_id)
+                    if r is not None:
+                        events.append([CANCEL, r.reservation_id, self._cancelled(r)])
+                        cancelled += 1
+                    continue
+                event = MODIFY if row.reservation_id in self.reservation_index else CREATE
+                r = self._import_row(row)
+                if r is None:
+                    skipped += 1
+                    continue
+                events.append(self._journal_row(event, r))
+                applied += 1
+            self.journal.append_many(events)
+            self.maybe_compact()
+        return ImportResult(applied, cancelled, skipped)
+
+    def _import_row(self, row):
+        r = self.get_reservation(row.reservation_id)
+        if r is not None:
+            self._unindex_reservation(r)
+        room = self.rooms_by_number.get(row.room_number)
+        if (room is None or room.room_type.lower() != row.room_type.lower()
+                or not self.is_room_available(room, row.check_in, row.check_out)):
+            room = self.find_available_room(row.room_type, row.check_in, row.check_out)
+        if room is None:
+            if r is not None:
+                self._index_reservation(r)
+            return None
+        total = row.total_cost
+        if total is None:
+            total = self.quote(room.room_type, row.check_in, (row.check_out - row.check_in).days)
+        if r is None:
+            r = Reservation(row.reservation_id, self.stored_guest(row.guest_name), room, row.check_in, row.check_out, total)
+            self.add_reservation(r)
         else:
-            for r in self.reservations:
-                print(r)
-                print("-" * 40)
+            if r.guest.name != row.guest_name:
+                r.guest = self.stored_guest(row.guest_name)
+            r.room = room
+            r.check_in = row.check_in
+            r.check_out = row.check_out
+            r.total_cost = total
+            self._index_reservation(r)
+        self._changed(r)
+        return r
+
+    def forget_cancellations(self, through):
+        # Drops the cancellations up to sequence `through` once every
+        # downstream system has exported past them; the file next to the
+        # data file shrinks at the next compaction. Returns how many.
+        forgotten = [i for i, sequence in self.cancellations.items() if sequence <= through]
+        for reservation_id in forgotten:
+            del self.cancellations[reservation_id]
+        self.stale_changes += len(forgotten)
+        return len(forgotten)
+
+    def list_reservations(self, start=None, end=None, room_type=None, status=None):
+        found = False
+        for r in self.iter_reservations(start, end, room_type, status):
+            print(r)
+            print("-" * 40)
+            found = True
+        if not found:
+            print("No current reservations.")
+
+    def maybe_compact(self):
+        if self.journal.entries >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        # fold the journal into a fresh snapshot; replay skips creates that are
+        # already in the snapshot, so a crash between the two steps is safe
+        self.save_reservations_to_file()
+        self.journal.truncate()
 
+    def close(self):
+        # leave an up-to-date reservations.csv behind on a clean shutdown
+        if self.journal.entries:
+            self.compact()
+        self.journal.close()
+
+    @timed("hotel_call_seconds")
     def save_reservations_to_file(self):
-        with open("reservations.csv", "w", newline='') as f:
+        self.save_cancellations()
+        if self.data_file.endswith(SNAPSHOT_SUFFIX):
+            write_snapshot(
+                self.data_file,
+                [(room.room_number, room.room_type, room.price_per_night) for room in self.rooms],
+                ((r.reservation_id, r.guest.name, r.room.room_number, r.check_in, r.check_out,
+                  r.calculate_total_cost(), r.sequence)
+                 for r in self.active_reservations()),
+            )
+            return
+        tmp_file = self.data_file + ".tmp"
+        with open(tmp_file, "w", newline='') as f:
             writer = csv.writer(f)
-            writer.writerow(["Reservation ID", "Guest Name", "Room Number", "Room Type", "Check-in Date", "Check-out Date", "Total Cost"])
-            for r in self.reservations:
+            writer.writerow(CSV_HEADER)
+            for r in self.active_reservations():
                 writer.writerow([
                     r.reservation_id, r.guest.name, r.room.room_number, r.room.room_type,
-                    r.check_in, r.check_out, f"{r.calculate_total_cost():.2f}"
+                    r.check_in, r.check_out, f"{r.calculate_total_cost():.2f}", r.sequence
                 ])
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.data_file)
+
+    def save_cancellations(self):
+        # The first row, with no ID, holds the change sequence and the next
+        # reservation number, so neither goes back once the cancellations
+        # that reached them are forgotten: IDs and sequences are never
+        # handed out twice.
+        if not self.cancellations and not os.path.exists(self.cancellations_file):
+            return
+        tmp_file = self.cancellations_file + ".tmp"
+        with open(tmp_file, "w", newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["Reservation ID", "Change Sequence"])
+            writer.writerow(["", self.change_sequence, self.reservation_counter])
+            writer.writerows(self.cancellations.items())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.cancellations_file)
 
+    def load_cancellations(self):
+        if not os.path.exists(self.cancellations_file):
+            return
+        with open(self.cancellations_file, "r", newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for parts in reader:
+                sequence = parse_sequence(parts, 1)
+                if not parts or not parts[0]:
+                    self.change_sequence = max(self.change_sequence, sequence)
+                    self.reservation_counter = max(self.reservation_counter, parse_sequence(parts, 2))
+                elif sequence:
+                    self.cancellations[parts[0]] = sequence
+                    self._advance_counter(parts[0])
+
+    @timed("hotel_call_seconds")
     def load_reservations_from_file(self):
-        if not os.path.exists("reservations.csv"):
+        self.load_snapshot()
+        self.load_cancellations()
+        self._sequence_loaded()
+        self.replay_journal()
+        self._rebuild_change_log()
+
+    def _sequence_loaded(self):
+        self.change_sequence = max(
+            [self.change_sequence, *self.cancellations.values()]
+            + [r.sequence for r in self.active_reservations()]
+        )
+        # files saved before change sequences: number their rows in file order
+        for r in self.active_reservations():
+            if not r.sequence:
+                r.sequence = self._next_sequence()
+
+    def replay_journal(self):
+        # A repack's moves are applied together, as they were made: rooms
+        # can swap bookings within one, so a move only finds its room free
+        # once the others have left.
+        repacked = []
+        for parts in self.journal.replay():
+            if parts[0] == REPACK:
+                repacked.append(parts)
+                continue
+            if repacked:
+                self._replay_bookings(repacked)
+                repacked = []
+            if parts[0] == CREATE or parts[0] == MODIFY:
+                if parts[0] == CREATE and parts[1] in self.reservation_index:
+                    continue  # already folded into the snapshot
+                self._replay_bookings([parts])
+            elif parts[0] == CANCEL:
+                sequence = parse_sequence(parts, 2) or self._next_sequence()
+                self.change_sequence = max(self.change_sequence, sequence)
+                self.remove_reservation(parts[1])
+                self.cancellations[parts[1]] = sequence
+                self._advance_counter(parts[1])
+        if repacked:
+            self._replay_bookings(repacked)
+
+    def _replay_bookings(self, rows):
+        # takes every booking in rows out before putting any back; a booking
+        # repacked twice in a row keeps its last room
+        rows = list({parts[1]: parts for parts in rows}.values())
+        for parts in rows:
+            self.remove_reservation(parts[1])
+        for parts in rows:
+            sequence = parse_sequence(parts, 8) or self._next_sequence()
+            self.change_sequence = max(self.change_sequence, sequence)
+            check_in = datetime.date.fromisoformat(parts[5])
+            check_out = datetime.date.fromisoformat(parts[6])
+            room = self.rooms_by_number.get(int(parts[3]))
+            if room is None or not self.is_room_available(room, check_in, check_out):
+                room = self.find_available_room(parts[4], check_in, check_out)
+            if room:
+                total = parse_total(parts[7])
+                if total is None:
+                    total = self.quote(room.room_type, check_in, (check_out - check_in).days)
+                self.add_reservation(Reservation(parts[1], self.stored_guest(parts[2]), room, check_in, check_out, total,
+                                                 sequence))
+
+    def load_snapshot(self):
+        if not os.path.exists(self.data_file):
             return
-        with open("reservations.csv", "r", newline='') as f:
+        binary = self.data_file.endswith(SNAPSHOT_SUFFIX)
+        if binary:
+            unplaced = self._load_binary_rows()
+        else:
+            unplaced = self._load_csv_rows()
+        for r in self.rebuild_indexes():
+            unplaced.append((r.reservation_id, r.guest.name, r.room.room_type, r.check_in, r.check_out, r.total_cost,
+                             r.sequence))
+        # rows whose stored room is unknown or already taken fall back to the
+        # first free room of the same type, as the loader always did. A CSV
+        # row with no such room is left out as before; a snapshot is only
+        # ever written from a consistent hotel, so there it means the rooms
+        # no longer match the file, and loading stops rather than lose it.
+        for reservation_id, guest_name, room_type, check_in, check_out, total, sequence in unplaced:
+            room = self.find_available_room(room_type, check_in, check_out)
+            if room:
+                if total is None:
+                    total = self.quote(room.room_type, check_in, (check_out - check_in).days)
+                self.add_reservation(Reservation(reservation_id, self.stored_guest(guest_name), room, check_in, check_out,
+                                                 total, sequence))
+            elif binary:
+                raise ValueError(
+                    f"{self.data_file}: no {room_type} room free for {reservation_id} from {check_in} to {check_out}"
+                )
+
+    def _load_binary_rows(self):
+        # Straight from the mapped records: no text to parse, every date and
+        # guest name is built once, and a room's bookings come in check-in
+        # order. Returns the rows that need a new room, like _load_csv_rows.
+        unplaced = []
+        with ReservationSnapshot(self.data_file) as snapshot:
+            rooms = []
+            for number, room_type, _, _, _ in snapshot.rooms:
+                room = self.rooms_by_number.get(number)
+                rooms.append(room if room is not None and room.room_type.lower() == room_type.lower() else None)
+            guests = [None] * len(snapshot.strings)
+            dates = {}
+            columns = [snapshot.column(field) for field in range(RECORD_FIELDS)]
+            for number, first_night, last_day, room_index, guest_index, cents, sequence in zip(*columns):
+                reservation_id = f"RES-{number:03d}" if number >= 0 else snapshot.string(-1 - number)
+                if reservation_id in self.reservation_index:
+                    continue
+                check_in = dates.get(first_night)
+                if check_in is None:
+                    check_in = dates[first_night] = datetime.date.fromordinal(first_night)
+                check_out = dates.get(last_day)
+                if check_out is None:
+                    check_out = dates[last_day] = datetime.date.fromordinal(last_day)
+                total = None if cents < 0 else cents / 100
+                room = rooms[room_index]
+                if room is None:
+                    guest_name = snapshot.string(guest_index)
+                    unplaced.append((reservation_id, guest_name, snapshot.rooms[room_index][1], check_in, check_out, total,
+                                     sequence))
+                    continue
+                guest = guests[guest_index]
+                if guest is None:
+                    guest = guests[guest_index] = self.stored_guest(snapshot.string(guest_index))
+                if total is None:
+                    total = self.quote(room.room_type, check_in, (check_out - check_in).days)
+                self.reservation_index[reservation_id] = len(self.reservations)
+                self.reservations.append(Reservation(reservation_id, guest, room, check_in, check_out, total, sequence))
+                if number >= self.reservation_counter:
+                    self.reservation_counter = number + 1
+            del columns  # the views must go before the snapshot is closed
+        return unplaced
+
+    def _load_csv_rows(self):
+        dates = {}
+        totals = {}
+        unplaced = []
+        with open(self.data_file, "r", newline='') as f:
             reader = csv.reader(f)
             next(reader, None)  # skip header
             for parts in reader:
-                if len(parts) < 7:
+                if len(parts) < 7 or parts[0] in self.reservation_index:
+                    continue
+                # most bookings share a few hundred distinct dates, parse each once
+                check_in = dates.get(parts[4])
+                if check_in is None:
+                    check_in = dates[parts[4]] = datetime.date.fromisoformat(parts[4])
+                check_out = dates.get(parts[5])
+                if check_out is None:
+                    check_out = dates[parts[5]] = datetime.date.fromisoformat(parts[5])
+                try:
+                    room = self.rooms_by_number.get(int(parts[2]))
+                except ValueError:
+                    room = None
+                if room is None or room.room_type.lower() != parts[3].lower():
+                    unplaced.append((parts[0], parts[1], parts[3], check_in, check_out, parse_total(parts[6]),
+                                     parse_sequence(parts, 7)))
                     continue
-                guest = Guest(parts[1], "N/A")
-                room = self.find_available_room(parts[3], datetime.date.fromisoformat(parts[4]), datetime.date.fromisoformat(parts[5]))
-                if room:
-                    self.reservations.append(Reservation(
-                        parts[0], guest, room,
-                        datetime.date.fromisoformat(parts[4]),
-                        datetime.date.fromisoformat(parts[5])
-                    ))
+                self.reservation_index[parts[0]] = len(self.reservations)
+                if parts[6] not in totals:
+                    totals[parts[6]] = parse_total(parts[6])
+                total = totals[parts[6]]
+                if total is None:
+                    total = self.quote(room.room_type, check_in, (check_out - check_in).days)
+                self.reservations.append(Reservation(parts[0], self.stored_guest(parts[1]), room, check_in, check_out, total,
+                                                     parse_sequence(parts, 7)))
+                self._advance_counter(parts[0])
+
+        return unplaced
+
+    def rebuild_indexes(self):
+        # Rebuilds the room schedules and the calendar from self.reservations.
+        # Bookings that overlap an earlier one on the same room are taken out
+        # of the list and returned so the caller can place them elsewhere.
+        by_room = {}
+        for r in self.active_reservations():
+            by_room.setdefault(r.room.room_number, []).append(r)
+        conflicts = set()
+        for room_number, bookings in by_room.items():
+            bookings.sort(key=lambda r: r.check_in)
+            kept = []
+            for r in bookings:
+                if kept and r.check_in < kept[-1].check_out:
+                    conflicts.add(id(r))
+                else:
+                    kept.append(r)
+            self.room_schedules.setdefault(room_number, RoomSchedule()).load(kept)
+        for room_number, schedule in self.room_schedules.items():
+            if room_number not in by_room:
+                schedule.load([])
+        self.calendar.load(self.room_schedules)
+        removed = []
+        if conflicts:
+            removed = [r for r in self.active_reservations() if id(r) in conflicts]
+            self.reservations = [r for r in self.active_reservations() if id(r) not in conflicts]
+            self.reservation_index = {r.reservation_id: i for i, r in enumerate(self.reservations)}
+            self.tombstones = 0
+        self.search_index.load(self.active_reservations())
+        return removed
 
 def main():
+    configure_from_env()
     hotel = Hotel("Modern Hotel", "123 Main Street")
     hotel.auto_add_rooms(10, 10, 10)
     hotel.load_reservations_from_file()
@@ -147,7 +1096,8 @@ def main():
         print("1. Make a Reservation")
         print("2. View Current Reservations")
         print("3. Cancel a Reservation")
-        print("4. Exit")
+        print("4. Find a Reservation")
+        print("5. Exit")
         choice = input("Enter your choice: ").strip()
 
         if choice == "1":
@@ -213,6 +1163,11 @@ def main():
             reservation_id = input("Enter reservation ID to cancel: ")
             hotel.cancel_reservation(reservation_id)
         elif choice == "4":
+            reservation_id = input("Enter reservation ID: ").strip()
+            res = hotel.get_reservation(reservation_id)
+            print(res if res else "Reservation ID not found.")
+        elif choice == "5":
+            hotel.close()
             print("Thank you for using the system. Goodbye!")
             break
         else:
@@ -0,0 +1,108 @@
+import datetime
+import functools
+
+# nightly rates for the standard room types; rooms of other types are priced
+# at the rate of the first room of that type added to the hotel
+DEFAULT_BASE_RATES = {"Single": 100, "Double": 150, "Suite": 300}
+# Friday and Saturday nights, as date.weekday() numbers
+WEEKEND_NIGHTS = (4, 5)
+
+
+class Season:
+    __slots__ = ("start", "end", "multiplier", "room_types")
+
+    def __init__(self, start, end, multiplier, room_types=None):
+        self.start = start
+        self.end = end  # exclusive
+        self.multiplier = multiplier
+        self.room_types = None if room_types is None else {t.lower() for t in room_types}
+
+    def applies(self, room_type, day):
+        return self.start <= day < self.end and (self.room_types is None or room_type in self.room_types)
+
+
+class RateCalendar:
+    # Nightly rates per room type. A night costs its per-date override if one
+    # is set, otherwise the base rate scaled by the last season covering it
+    # and, on weekend nights, by the weekend multiplier. Rates are kept in
+    # cents, and each room type has a running total of cents over a window of
+    # nights, so a stay of any length is priced with two list lookups.
+    # Quotes are memoized; every rate change drops the totals and the memo.
+
+    def __init__(self, base_rates=None, weekend_multiplier=1, window=366, quote_cache_size=4096):
+        base_rates = DEFAULT_BASE_RATES if base_rates is None else base_rates
+        self.base_rates = {t.lower(): rate for t, rate in base_rates.items()}
+        self.weekend_multiplier = weekend_multiplier
+        self.seasons = []
+        self.overrides = {}  # (room_type, date) -> rate
+        self.window = window
+        # room_type -> (first ordinal, sums) with sums[i] = cents for the
+        # nights before first + i
+        self.prefix = {}
+        self.quote = functools.lru_cache(maxsize=quote_cache_size)(self._quote)
+
+    def base_rate(self, room_type):
+        return self.base_rates[room_type.lower()]
+
+    def add_room_type(self, room_type, rate):
+        # nothing has been priced for an unknown type yet, so no invalidation
+        self.base_rates.setdefault(room_type.lower(), rate)
+
+    def set_base_rate(self, room_type, rate):
+        self.base_rates[room_type.lower()] = rate
+        self.invalidate()
+
+    def set_weekend_multiplier(self, multiplier):
+        self.weekend_multiplier = multiplier
+        self.invalidate()
+
+    def add_season(self, start, end, multiplier, room_types=None):
+        self.seasons.append(Season(start, end, multiplier, room_types))
+        self.invalidate()
+
+    def set_rate(self, room_type, day, rate, nights=1):
+        # fixed rate for `nights` nights from `day`, ignoring seasons and weekends
+        room_type = room_type.lower()
+        for i in range(nights):
+            self.overrides[(room_type, day + datetime.timedelta(days=i))] = rate
+        self.invalidate()
+
+    def invalidate(self):
+        self.prefix.clear()
+        self.quote.cache_clear()
+
+    def nightly_rate(self, room_type, day):
+        room_type = room_type.lower()
+        rate = self.overrides.get((room_type, day))
+        if rate is not None:
+            return rate
+        rate = self.base_rates[room_type]
+        for season in reversed(self.seasons):
+            if season.applies(room_type, day):
+                rate *= season.multiplier
+                break
+        if day.weekday() in WEEKEND_NIGHTS:
+            rate *= self.weekend_multiplier
+        return rate
+
+    def _sums(self, room_type, first, last):
+        # running totals covering the nights first..last-1 (ordinals)
+        cached = self.prefix.get(room_type)
+        if cached is not None:
+            origin, sums = cached
+            if origin <= first and last <= origin + len(sums) - 1:
+                return cached
+            first = min(first, origin)
+            last = max(last, origin + len(sums) - 1)
+        last = max(last, first + self.window)
+        sums = [0]
+        for ordinal in range(first, last):
+            cents = round(self.nightly_rate(room_type, datetime.date.fromordinal(ordinal)) * 100)
+            sums.append(sums[-1] + cents)
+        self.prefix[room_type] = (first, sums)
+        return first, sums
+
+    def _quote(self, room_type, check_in, nights):
+        start = check_in.toordinal()
+        origin, sums = self._sums(room_type.lower(), start, start + nights)
+        return (sums[start - origin + nights] - sums[start - origin]) / 100
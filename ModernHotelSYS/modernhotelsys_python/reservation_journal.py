@@ -0,0 +1,151 @@
+import csv
+import datetime
+import os
+import threading
+import time
+
+CREATE = "C"
+CANCEL = "X"
+MODIFY = "M"
+# one row per booking a repack moved; consecutive rows replay as one batch
+REPACK = "R"
+
+
+def is_complete(row):
+    # False for a row a crash cut short, or one it glued onto the next event
+    try:
+        if row[0] in (CREATE, MODIFY, REPACK):
+            int(row[3])
+            datetime.date.fromisoformat(row[5])
+            datetime.date.fromisoformat(row[6])
+            return len(row) >= 8
+        return row[0] == CANCEL and len(row) >= 2
+    except (IndexError, ValueError):
+        return False
+
+
+class ReservationJournal:
+    # Append-only log of reservation events. Every event is flushed to the OS
+    # straight away, so a crashed process loses nothing; fsync is batched and
+    # runs once `sync_every` events are waiting or `sync_interval` seconds
+    # have passed since the last one (checked on a timer too, for when no
+    # further event comes), so a power loss can drop at most that many
+    # recent events.
+    def __init__(self, path, sync_every=32, sync_interval=1.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.entries = 0
+        self.pending = 0
+        self.last_sync = time.monotonic()
+        self.file = None
+        self.writer = None
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def replay(self):
+        self.entries = 0
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", newline="") as f:
+            for row in csv.reader(f):
+                # a torn final line from a crash mid-write is skipped
+                if not row or not is_complete(row):
+                    continue
+                self.entries += 1
+                yield row
+
+    def _open(self):
+        if self.file is None:
+            self._drop_torn_tail()
+            self.file = open(self.path, "a", newline="")
+            self.writer = csv.writer(self.file)
+
+    def _drop_torn_tail(self):
+        # cuts a partial last line left by a crash back to the last complete
+        # one, so the next event starts on a line of its own
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r+b") as f:
+            end = f.seek(0, os.SEEK_END)
+            keep = end
+            while keep > 0:
+                start = max(0, keep - 4096)
+                f.seek(start)
+                block = f.read(keep - start)
+                newline = block.rfind(b"\n")
+                if newline >= 0:
+                    keep = start + newline + 1
+                    break
+                keep = start
+            if keep < end:
+                f.truncate(keep)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def append(self, row):
+        with self.lock:
+            self._open()
+            self.writer.writerow(row)
+            self.file.flush()
+            self.entries += 1
+            self.pending += 1
+            if self.pending >= self.sync_every or time.monotonic() - self.last_sync >= self.sync_interval:
+                self._sync()
+            else:
+                self._schedule_sync()
+
+    def append_many(self, rows):
+        # a batch is written and fsynced together
+        with self.lock:
+            self._open()
+            self.writer.writerows(rows)
+            self.file.flush()
+            self.entries += len(rows)
+            self.pending += len(rows)
+            self._sync()
+
+    def _schedule_sync(self):
+        # an idle hotel still gets its last events synced within sync_interval
+        if self.timer is None:
+            self.timer = threading.Timer(self.sync_interval, self._sync_on_timer)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _sync_on_timer(self):
+        with self.lock:
+            self.timer = None
+            self._sync()
+
+    def sync(self):
+        with self.lock:
+            self._sync()
+
+    def _sync(self):
+        if self.file is not None and self.pending:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def truncate(self):
+        with self.lock:
+            self._open()
+            self.file.seek(0)
+            self.file.truncate()
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.entries = 0
+            self.pending = 0
+            self.last_sync = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if self.file is not None:
+                self._sync()
+                self.file.close()
+                self.file = None
+                self.writer = None
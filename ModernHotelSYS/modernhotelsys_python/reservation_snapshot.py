@@ -0,0 +1,259 @@
+import argparse
+import array
+import csv
+import datetime
+import mmap
+import os
+import re
+import struct
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+
+from rate_calendar import DEFAULT_BASE_RATES
+from reservation_csv import CSV_HEADER, ExportRow, format_row, read_chunks
+
+# Binary snapshot of a hotel's reservations, an alternative to
+# reservations.csv that loads without parsing any text. Little-endian:
+#
+#   header    MAGIC, version, room count, string count, record count, then
+#             the byte offsets of the three sections below
+#   rooms     per room: number, first record, record count, price, type
+#             string index
+#   strings   string count + 1 uint32 offsets into a UTF-8 blob; every
+#             room type and guest name is stored once however many rooms
+#             or bookings it has
+#   records   RECORD_FIELDS int32s per reservation: ID number, check-in
+#             and check-out day ordinals, room index, guest string index,
+#             total in cents (-1 when unknown), change sequence
+#
+# Records are sorted by room and check-in, so each room's bookings are one
+# run. IDs of the usual RES-<number> form are stored as the number; any
+# other ID goes in the string table and its field holds -1 - string index.
+
+MAGIC = b"HOTELSNP"
+VERSION = 3
+HEADER = struct.Struct("<8sIIIIQQQ")
+ROOM = struct.Struct("<iIIdI")
+RECORD_FIELDS = 7
+ID, CHECK_IN, CHECK_OUT, ROOM_INDEX, GUEST, TOTAL_CENTS, SEQUENCE = range(RECORD_FIELDS)
+RESERVATION_ID = re.compile(r"RES-(\d+)\Z")
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def write_snapshot(path, rooms, reservations):
+    # rooms: (room_number, room_type, price_per_night) for every room the
+    # reservations use; reservations: (reservation_id, guest_name,
+    # room_number, check_in, check_out, total_cost or None, sequence).
+    # Written to a temporary file and renamed over `path`, like the CSV.
+    room_index = {number: i for i, (number, _, _) in enumerate(rooms)}
+    strings = {}
+    room_types = [strings.setdefault(room_type, len(strings)) for _, room_type, _ in rooms]
+    rows = []
+    for reservation_id, guest_name, room_number, check_in, check_out, total, sequence in reservations:
+        match = RESERVATION_ID.match(reservation_id)
+        if match and f"RES-{int(match.group(1)):03d}" == reservation_id and int(match.group(1)) < 2 ** 31:
+            number = int(match.group(1))
+        else:
+            number = -1 - strings.setdefault(reservation_id, len(strings))
+        rows.append((
+            room_index[room_number],
+            check_in.toordinal(),
+            number,
+            check_out.toordinal(),
+            strings.setdefault(guest_name, len(strings)),
+            -1 if total is None else round(total * 100),
+            sequence,
+        ))
+    rows.sort()
+
+    first = [0] * len(rooms)
+    counts = [0] * len(rooms)
+    for i, row in enumerate(rows):
+        if not counts[row[0]]:
+            first[row[0]] = i
+        counts[row[0]] += 1
+    records = array.array("i", [
+        field
+        for room, check_in, number, check_out, guest, cents, sequence in rows
+        for field in (number, check_in, check_out, room, guest, cents, sequence)
+    ])
+    blob = "".join(strings).encode()
+    offsets = array.array("I", [0])
+    for text in strings:
+        offsets.append(offsets[-1] + len(text.encode()))
+    if sys.byteorder == "big":
+        records.byteswap()
+        offsets.byteswap()
+
+    rooms_at = HEADER.size
+    strings_at = _align(rooms_at + ROOM.size * len(rooms))
+    records_at = _align(strings_at + 4 * len(offsets) + len(blob))
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(rooms), len(strings), len(rows), rooms_at, strings_at, records_at))
+        for i, (number, _, price) in enumerate(rooms):
+            f.write(ROOM.pack(number, first[i], counts[i], price, room_types[i]))
+        f.write(bytes(strings_at - f.tell()))
+        f.write(offsets.tobytes())
+        f.write(blob)
+        f.write(bytes(records_at - f.tell()))
+        f.write(records.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+class ReservationSnapshot:
+    # A snapshot file opened with mmap. Nothing is read up front but the
+    # header and the room table: records are int32 views straight onto the
+    # mapped pages (`column(CHECK_IN)` is every check-in, still without a
+    # copy) and strings are decoded when first asked for.
+
+    def __init__(self, path):
+        self.records = self.offsets = self.map = None
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file cannot be mapped
+            self.file.close()
+            raise ValueError(f"{path} is not a reservation snapshot")
+        if self.map.size() < HEADER.size or self.map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a reservation snapshot")
+        magic, version, room_count, string_count, record_count, rooms_at, strings_at, records_at = (
+            HEADER.unpack_from(self.map)
+        )
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is snapshot version {version}, expected {VERSION}")
+        if sys.byteorder == "big":
+            self.close()
+            raise ValueError("reservation snapshots are little-endian; this machine is not")
+        view = memoryview(self.map)
+        self.offsets = view[strings_at:strings_at + 4 * (string_count + 1)].cast("I")
+        self.blob_at = strings_at + 4 * (string_count + 1)
+        self.records = view[records_at:records_at + 4 * RECORD_FIELDS * record_count].cast("i")
+        self.strings = [None] * string_count
+        self.rooms = []
+        for i in range(room_count):
+            number, first, count, price, room_type = ROOM.unpack_from(self.map, rooms_at + i * ROOM.size)
+            self.rooms.append((number, self.string(room_type), price, first, count))
+
+    def __len__(self):
+        return len(self.records) // RECORD_FIELDS
+
+    def column(self, field):
+        return self.records[field::RECORD_FIELDS]
+
+    def string(self, index):
+        text = self.strings[index]
+        if text is None:
+            start = self.blob_at + self.offsets[index]
+            end = self.blob_at + self.offsets[index + 1]
+            text = self.strings[index] = self.map[start:end].decode()
+        return text
+
+    def reservation_id(self, number):
+        return f"RES-{number:03d}" if number >= 0 else self.string(-1 - number)
+
+    def __iter__(self):
+        # ExportRows in file order
+        dates = {}
+        for number, check_in, check_out, room, guest, cents, sequence in zip(
+            *(self.column(f) for f in range(RECORD_FIELDS))
+        ):
+            if check_in not in dates:
+                dates[check_in] = datetime.date.fromordinal(check_in)
+            if check_out not in dates:
+                dates[check_out] = datetime.date.fromordinal(check_out)
+            room_number, room_type = self.rooms[room][:2]
+            yield ExportRow(
+                self.reservation_id(number),
+                self.string(guest),
+                room_number,
+                room_type,
+                dates[check_in],
+                dates[check_out],
+                None if cents < 0 else cents / 100,
+                sequence,
+                False,
+            )
+
+    def close(self):
+        # the views have to go before the map can be closed
+        for view in (self.records, self.offsets):
+            if view is not None:
+                view.release()
+        self.records = self.offsets = None
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def csv_to_snapshot(csv_path, snapshot_path, rooms=None):
+    # rooms: (room_number, room_type, price_per_night) to store; by default
+    # the rooms named in the CSV, priced at the standard base rates
+    reservations = []
+    known = {} if rooms is None else {number: room_type for number, room_type, _ in rooms}
+    found = {}
+    for chunk in read_chunks(csv_path):
+        for row in chunk:
+            if row.cancelled or row.room_number is None:
+                continue
+            if known.get(row.room_number, row.room_type) != row.room_type:
+                continue  # a row the loader would have to re-place anyway
+            found.setdefault(row.room_number, row.room_type)
+            reservations.append((
+                row.reservation_id,
+                row.guest_name,
+                row.room_number,
+                row.check_in,
+                row.check_out,
+                row.total_cost,
+                row.sequence,
+            ))
+    if rooms is None:
+        rooms = [(number, room_type, DEFAULT_BASE_RATES.get(room_type, 0)) for number, room_type in sorted(found.items())]
+    write_snapshot(snapshot_path, rooms, reservations)
+    return len(reservations)
+
+
+def snapshot_to_csv(snapshot_path, csv_path):
+    count = 0
+    tmp_file = csv_path + ".tmp"
+    with ReservationSnapshot(snapshot_path) as snapshot, open(tmp_file, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for row in snapshot:
+            writer.writerow(format_row(row)[:len(CSV_HEADER)])
+            count += 1
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, csv_path)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert reservations between CSV and the binary snapshot format")
+    parser.add_argument("source", help="a .csv or .snap file")
+    parser.add_argument("target", help="the file to write, in the other format")
+    args = parser.parse_args()
+    if args.source.endswith(".snap"):
+        count = snapshot_to_csv(args.source, args.target)
+    else:
+        count = csv_to_snapshot(args.source, args.target)
+    print(f"{count} reservations written to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
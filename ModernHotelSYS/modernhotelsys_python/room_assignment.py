@@ -0,0 +1,51 @@
+import bisect
+import datetime
+
+
+class FirstFit:
+    # the first free room of the type, in the order rooms were added
+    def choose(self, hotel, rooms, check_in, check_out):
+        for room in rooms:
+            if hotel.is_room_available(room, check_in, check_out):
+                return room
+        return None
+
+
+class BestFit:
+    # The free room whose surrounding gap is the smallest that still holds
+    # the stay. Long open stretches stay intact for long stays instead of
+    # being cut into leftovers too short to sell.
+    def choose(self, hotel, rooms, check_in, check_out):
+        best = None
+        best_gap = None
+        for room in rooms:
+            gap = hotel.room_schedules[room.room_number].gap_around(check_in, check_out)
+            if gap is None:
+                continue
+            previous_end, next_start = gap
+            start = previous_end.toordinal() if previous_end else datetime.date.min.toordinal()
+            end = next_start.toordinal() if next_start else datetime.date.max.toordinal()
+            if best_gap is None or end - start < best_gap:
+                best, best_gap = room, end - start
+        return best
+
+
+def repack(reservations, rooms, busy_until):
+    # Reassigns `reservations` (all of one room type) to `rooms`, treating it
+    # as interval partitioning: stays are taken in check-in order and each
+    # goes to the room that became free most recently before it starts.
+    # Once a room is free at a stay's check-in it is interchangeable with
+    # every other free room for all later stays, so this finds an assignment
+    # whenever one exists. busy_until maps room_number -> first date the room
+    # can take a moved stay. Returns {reservation_id: room} or None.
+    free_from = sorted((busy_until.get(room.room_number, datetime.date.min), i) for i, room in enumerate(rooms))
+    assignment = {}
+    for r in sorted(reservations, key=lambda r: (r.check_in, r.check_out)):
+        # rightmost room that is free by r.check_in
+        i = bisect.bisect_right(free_from, (r.check_in, len(rooms))) - 1
+        if i < 0:
+            return None
+        _, room_index = free_from.pop(i)
+        assignment[r.reservation_id] = rooms[room_index]
+        bisect.insort(free_from, (r.check_out, room_index))
+    return assignment
@@ -0,0 +1,479 @@
+import argparse
+import asyncio
+import concurrent.futures
+import datetime
+import json
+import os
+import signal
+import sys
+import time
+import urllib.parse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "modernhotelsys_python"))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "hotel_reservation_python_db"))
+
+import db_connection
+import hotel_db as db
+from analytics import roll_up
+from metrics import METRICS, configure_from_env, start_profiling
+from modern_hotel_sys import Guest, Hotel
+
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+}
+MAX_BODY = 64 * 1024
+# longest /analytics range, a little over ten years
+MAX_REPORT_NIGHTS = 3660
+# first path segments that get their own http_request_seconds label
+ROUTES = ("availability", "quote", "search", "analytics", "reservations", "metrics", "metrics.json")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_date(value, field):
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{field} must be a YYYY-MM-DD date")
+
+
+def parse_int(value, field, minimum=0):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{field} must be a whole number")
+    if number < minimum:
+        raise HTTPError(400, f"{field} must be at least {minimum}")
+    return number
+
+
+def parse_nights(value):
+    return parse_int(value, "nights", 1)
+
+
+def room_type_of(value):
+    room_type = str(value or "").capitalize()
+    if room_type not in db.ROOM_TYPE_PRICES:
+        raise HTTPError(400, f"room_type must be one of {', '.join(db.ROOM_TYPE_PRICES)}")
+    return room_type
+
+
+def reservation_json(r):
+    return {
+        "reservation_id": r.reservation_id,
+        "guest": r.guest.name,
+        "contact": r.guest.contact_info,
+        "room_number": r.room.room_number,
+        "room_type": r.room.room_type,
+        "check_in": r.check_in.isoformat(),
+        "check_out": r.check_out.isoformat(),
+        "total_cost": r.calculate_total_cost(),
+    }
+
+
+def optional_json(r):
+    return None if r is None else reservation_json(r)
+
+
+def db_reservation_json(r):
+    return {
+        "reservation_id": r.reservation_id,
+        "guest": r.guest_name,
+        "contact": r.contact,
+        "room_number": r.room_number,
+        "room_type": r.room_type,
+        "check_in": r.check_in.isoformat(),
+        "check_out": r.check_out.isoformat(),
+        "total_cost": r.total_cost,
+    }
+
+
+class MemoryBackend:
+    # Hotel keeps everything in memory and is not thread safe, so its calls
+    # run one at a time on a single worker thread. That keeps room
+    # allocation atomic, as each call finishes before the next starts, and
+    # keeps the journal's fsync and the reservations.csv rewrite at
+    # compaction off the event loop. Reservations are turned into JSON on
+    # the worker too, before a later call can change them.
+
+    def __init__(self, hotel):
+        self.hotel = hotel
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="hotel")
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def availability(self, room_type, check_in, nights):
+        def available():
+            return [
+                {"room_number": room.room_number, "price_per_night": room.price_per_night}
+                for room in self.hotel.available_rooms(room_type, check_in, nights)
+            ]
+        return await self.run(available)
+
+    async def quote(self, room_type, check_in, nights):
+        return await self.run(self.hotel.quote, room_type, check_in, nights)
+
+    async def book(self, name, contact, room_type, check_in, nights):
+        def book():
+            return optional_json(self.hotel.make_reservation(Guest(name, contact), room_type, check_in, nights))
+        return await self.run(book)
+
+    async def get(self, reservation_id):
+        return await self.run(lambda: optional_json(self.hotel.get_reservation(reservation_id)))
+
+    async def cancel(self, reservation_id):
+        return await self.run(lambda: optional_json(self.hotel.discard_reservation(reservation_id)))
+
+    async def edit(self, reservation_id, check_in, nights, room_type):
+        def edit():
+            if self.hotel.get_reservation(reservation_id) is None:
+                raise HTTPError(404, "reservation not found")
+            return optional_json(self.hotel.modify_reservation(reservation_id, check_in, nights, room_type))
+        return await self.run(edit)
+
+    async def search(self, keyword, limit, offset):
+        return await self.run(
+            lambda: [reservation_json(r) for r in self.hotel.search_reservations(keyword, limit, offset)]
+        )
+
+    async def nightly_stats(self, start, end, room_type):
+        return await self.run(self.hotel.nightly_stats, start, end, room_type)
+
+    def close(self):
+        # after the calls already queued, so nothing is left out of the file
+        self.executor.submit(self.hotel.close).result()
+        self.executor.shutdown(wait=True)
+
+
+class SqliteBackend:
+    # The DB functions block, so they run on a bounded thread pool; every
+    # worker thread keeps its own connection (see db_connection). Bookings of
+    # the same room type queue on an asyncio lock instead of all spinning on
+    # SQLite's write lock, while other room types and reads go ahead.
+
+    def __init__(self, workers=8):
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="sqlite"
+        )
+        self.room_type_locks = {room_type: asyncio.Lock() for room_type in db.ROOM_TYPE_PRICES}
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def availability(self, room_type, check_in, nights):
+        check_out = check_in + datetime.timedelta(days=nights)
+        rooms = await self.run(db.find_available_rooms, room_type, check_in, check_out)
+        return [
+            {"room_number": room_number, "price_per_night": price}
+            for room_number, price in rooms
+        ]
+
+    async def quote(self, room_type, check_in, nights):
+        check_out = check_in + datetime.timedelta(days=nights)
+        return await self.run(db.quote_stay, room_type, check_in, check_out)
+
+    async def book(self, name, contact, room_type, check_in, nights):
+        async with self.room_type_locks[room_type]:
+            reservation = await self.run(db.book_room, name, contact, room_type, check_in, nights)
+        return None if reservation is None else db_reservation_json(reservation)
+
+    async def get(self, reservation_id):
+        reservation = await self.run(db.get_reservation, reservation_id)
+        return None if reservation is None else db_reservation_json(reservation)
+
+    async def cancel(self, reservation_id):
+        reservation = await self.get(reservation_id)
+        if reservation is None or await self.run(db.delete_reservation, reservation_id) is None:
+            return None
+        return reservation
+
+    async def edit(self, reservation_id, check_in, nights, room_type):
+        current = await self.run(db.get_reservation, reservation_id)
+        if current is None:
+            raise HTTPError(404, "reservation not found")
+        # the move may take a room of the new type, so it queues behind
+        # bookings of that type
+        async with self.room_type_locks[room_type or current.room_type]:
+            reservation = await self.run(
+                db.modify_reservation, reservation_id, check_in, nights, room_type
+            )
+        return None if reservation is None else db_reservation_json(reservation)
+
+    async def search(self, keyword, limit, offset):
+        reservations = await self.run(db.search_guests, keyword, limit, offset)
+        return [db_reservation_json(r) for r in reservations]
+
+    async def nightly_stats(self, start, end, room_type):
+        return await self.run(db.nightly_stats, start, end, room_type)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class HotelService:
+    # A small HTTP/1.1 front end speaking JSON:
+    #   GET    /availability?room_type=Single&check_in=2025-01-01&nights=2
+    #   GET    /quote?room_type=Single&check_in=2025-01-01&nights=2
+    #   POST   /reservations {"name", "contact", "room_type", "check_in", "nights"}
+    #   GET    /reservations/<id>
+    #   PATCH  /reservations/<id> {"check_in", "nights", "room_type"} (all optional)
+    #   DELETE /reservations/<id>
+    #   GET    /search?q=smith&limit=20&offset=0
+    #   GET    /analytics?start=2025-01-01&end=2026-01-01&room_type=Suite (type optional)
+    #   GET    /metrics (Prometheus text), /metrics.json
+    # Connections are kept alive unless the client asks otherwise.
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body, keep_alive = request
+                started = time.perf_counter()
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                METRICS.observe(
+                    "http_request_seconds",
+                    time.perf_counter() - started,
+                    method=method,
+                    route=self.route_label(target),
+                    status=status,
+                )
+                self.write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HTTPError as e:
+            self.write_response(writer, e.status, {"error": str(e)}, False)
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = parse_int(headers.get("content-length") or 0, "Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(413, "request body too large")
+        body = await reader.readexactly(length) if length else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+        return method.upper(), target, headers, body, keep_alive
+
+    def route_label(self, target):
+        parts = urllib.parse.urlsplit(target).path.strip("/").split("/")
+        if parts[0] not in ROUTES:
+            return "other"
+        return "/" + parts[0] + ("/{id}" if len(parts) > 1 else "")
+
+    def write_response(self, writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body = payload.encode()
+            content_type = "text/plain; version=0.0.4"
+        else:
+            body = json.dumps(payload).encode()
+            content_type = "application/json"
+        head = (
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    async def dispatch(self, method, target, body):
+        url = urllib.parse.urlsplit(target)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        parts = [p for p in url.path.split("/") if p]
+
+        if parts == ["availability"] and method == "GET":
+            room_type = room_type_of(query.get("room_type"))
+            check_in = parse_date(query.get("check_in"), "check_in")
+            nights = parse_nights(query.get("nights", 1))
+            rooms = await self.backend.availability(room_type, check_in, nights)
+            return 200, {"room_type": room_type, "check_in": check_in.isoformat(), "nights": nights, "rooms": rooms}
+
+        if parts == ["quote"] and method == "GET":
+            room_type = room_type_of(query.get("room_type"))
+            check_in = parse_date(query.get("check_in"), "check_in")
+            nights = parse_nights(query.get("nights", 1))
+            total = await self.backend.quote(room_type, check_in, nights)
+            return 200, {"room_type": room_type, "check_in": check_in.isoformat(), "nights": nights, "total_cost": total}
+
+        if parts == ["metrics"] and method == "GET":
+            return 200, METRICS.to_prometheus()
+
+        if parts == ["metrics.json"] and method == "GET":
+            return 200, METRICS.snapshot()
+
+        if parts == ["search"] and method == "GET":
+            limit = min(parse_int(query.get("limit", db.SEARCH_PAGE_SIZE), "limit", 1), 500)
+            offset = parse_int(query.get("offset", 0), "offset")
+            results = await self.backend.search(query.get("q", ""), limit, offset)
+            return 200, {"results": results}
+
+        if parts == ["analytics"] and method == "GET":
+            start = parse_date(query.get("start"), "start")
+            end = parse_date(query.get("end"), "end")
+            if not 0 < (end - start).days <= MAX_REPORT_NIGHTS:
+                raise HTTPError(400, f"end must be 1 to {MAX_REPORT_NIGHTS} nights after start")
+            room_type = query.get("room_type")
+            stats = await self.backend.nightly_stats(
+                start, end, None if room_type is None else room_type_of(room_type)
+            )
+            return 200, {
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "total": roll_up(stats, None)[None].to_json(),
+                "room_types": {t: s.to_json() for t, s in roll_up(stats).items()},
+                "nights": [s.to_json() for s in stats],
+            }
+
+        if parts == ["reservations"] and method == "POST":
+            data = self.json_body(body)
+            name = str(data.get("name") or "").strip()
+            if not name:
+                raise HTTPError(400, "name is required")
+            reservation = await self.backend.book(
+                name,
+                str(data.get("contact") or "N/A"),
+                room_type_of(data.get("room_type")),
+                parse_date(data.get("check_in"), "check_in"),
+                parse_nights(data.get("nights")),
+            )
+            if reservation is None:
+                raise HTTPError(409, "no room of that type is free for those dates")
+            return 201, reservation
+
+        if len(parts) == 2 and parts[0] == "reservations":
+            reservation_id = urllib.parse.unquote(parts[1])
+            if method == "GET":
+                reservation = await self.backend.get(reservation_id)
+            elif method == "DELETE":
+                reservation = await self.backend.cancel(reservation_id)
+            elif method == "PATCH":
+                data = self.json_body(body)
+                check_in = data.get("check_in")
+                nights = data.get("nights")
+                room_type = data.get("room_type")
+                reservation = await self.backend.edit(
+                    reservation_id,
+                    None if check_in is None else parse_date(check_in, "check_in"),
+                    None if nights is None else parse_nights(nights),
+                    None if room_type is None else room_type_of(room_type),
+                )
+                if reservation is None:
+                    raise HTTPError(409, "no room is free for the new dates")
+            else:
+                raise HTTPError(405, f"{method} is not allowed here")
+            if reservation is None:
+                raise HTTPError(404, "reservation not found")
+            return 200, reservation
+
+        if parts in (["availability"], ["quote"], ["search"], ["analytics"], ["reservations"]):
+            raise HTTPError(405, f"{method} is not allowed here")
+        raise HTTPError(404, "no such endpoint")
+
+    def json_body(self, body):
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "body must be JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        return data
+
+    async def start(self, host="127.0.0.1", port=8080):
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+def make_backend(name, data_dir=".", workers=8):
+    if name == "memory":
+        hotel = Hotel(
+            "Modern Hotel",
+            "123 Main Street",
+            data_file=os.path.join(data_dir, "reservations.csv"),
+            journal_file=os.path.join(data_dir, "reservations.journal"),
+        )
+        hotel.auto_add_rooms(10, 10, 10)
+        hotel.load_reservations_from_file()
+        return MemoryBackend(hotel)
+    db_connection.DB_PATH = os.path.join(data_dir, "hotel.db")
+    db.init_db()
+    if not db_connection.get_connection().execute("SELECT 1 FROM rooms LIMIT 1").fetchone():
+        db.auto_add_rooms()
+    return SqliteBackend(workers)
+
+
+async def serve(args):
+    configure_from_env()
+    if args.metrics:
+        METRICS.enable()
+    if args.profile:
+        start_profiling(args.profile)
+    backend = make_backend(args.backend, args.data_dir, args.workers)
+    service = HotelService(backend)
+    server = await service.start(args.host, args.port)
+    print(f"Serving the {args.backend} backend on http://{args.host}:{args.port}")
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        # flushes the memory backend's journal into reservations.csv
+        backend.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON API for the hotel reservation system")
+    parser.add_argument("--backend", choices=("memory", "sqlite"), default="sqlite")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--data-dir", default=".", help="where reservations.csv or hotel.db live")
+    parser.add_argument("--workers", type=int, default=8, help="sqlite worker threads")
+    parser.add_argument("--metrics", action="store_true", help="record metrics for /metrics")
+    parser.add_argument("--profile", metavar="PATH", help="write cProfile stats to PATH on exit")
+    asyncio.run(serve(parser.parse_args()))
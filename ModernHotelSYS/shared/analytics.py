@@ -0,0 +1,115 @@
+import collections
+import datetime
+import itertools
+
+
+class NightStats(collections.namedtuple("NightStats", "night room_type rooms occupied revenue")):
+    # One room type on one night: `rooms` in the inventory, `occupied` of
+    # them booked, and the revenue booked for that night. A stay's total is
+    # spread evenly over its nights. Rolled-up rows (see roll_up) count
+    # room-nights instead and leave night and/or room_type as None.
+    __slots__ = ()
+
+    @property
+    def occupancy(self):
+        return self.occupied / self.rooms if self.rooms else 0.0
+
+    @property
+    def adr(self):
+        # average daily rate: revenue per occupied room-night
+        return self.revenue / self.occupied if self.occupied else 0.0
+
+    @property
+    def revpar(self):
+        # revenue per available room-night
+        return self.revenue / self.rooms if self.rooms else 0.0
+
+    def to_json(self):
+        return {
+            "night": self.night and self.night.isoformat(),
+            "room_type": self.room_type,
+            "rooms": self.rooms,
+            "occupied": self.occupied,
+            "revenue": round(self.revenue, 2),
+            "occupancy": round(self.occupancy, 4),
+            "adr": round(self.adr, 2),
+            "revpar": round(self.revpar, 2),
+        }
+
+
+def nights_between(start, end):
+    return [start + datetime.timedelta(days=i) for i in range((end - start).days)]
+
+
+def expand_stays(room_counts, stays, start, end):
+    # NightStats for every night in [start, end) and every room type, night
+    # by night. room_counts: {room_type: rooms}; stays: iterable of
+    # (room_type, check_in, check_out, total_cost).
+    #
+    # Each stay, clipped to the range, adds +1 at its first night and -1
+    # after its last in a per-type difference array (and the same with its
+    # nightly revenue); one running sum per type then gives the nightly
+    # totals. That is one step per stay plus one per night and type, however
+    # long the stays are, instead of touching every night of every stay.
+    days = (end - start).days
+    if days <= 0:
+        return []
+    origin = start.toordinal()
+    occupied = {room_type: [0] * (days + 1) for room_type in room_counts}
+    revenue = {room_type: [0.0] * (days + 1) for room_type in room_counts}
+    for room_type, check_in, check_out, total_cost in stays:
+        nights = (check_out - check_in).days
+        first = max(check_in.toordinal() - origin, 0)
+        last = min(check_out.toordinal() - origin, days)
+        if nights <= 0 or first >= last:
+            continue
+        if room_type not in occupied:
+            occupied[room_type] = [0] * (days + 1)
+            revenue[room_type] = [0.0] * (days + 1)
+        per_night = (total_cost or 0) / nights
+        occupied[room_type][first] += 1
+        occupied[room_type][last] -= 1
+        revenue[room_type][first] += per_night
+        revenue[room_type][last] -= per_night
+    dates = nights_between(start, end)
+    totals = {}
+    for room_type in occupied:
+        for night, count, amount in zip(
+            dates, itertools.accumulate(occupied[room_type]), itertools.accumulate(revenue[room_type])
+        ):
+            if count:
+                totals[night, room_type] = (count, amount)
+    return fill_nights(room_counts, totals, start, end)
+
+
+def fill_nights(room_counts, totals, start, end):
+    # NightStats for every night in [start, end) and room type, from
+    # {(night, room_type): (occupied, revenue)} holding only the booked nights
+    room_types = sorted(set(room_counts) | {room_type for _, room_type in totals})
+    stats = []
+    for night in nights_between(start, end):
+        for room_type in room_types:
+            count, amount = totals.get((night, room_type), (0, 0.0))
+            stats.append(NightStats(night, room_type, room_counts.get(room_type, 0), count, round(amount, 2)))
+    return stats
+
+
+def roll_up(stats, by="room_type"):
+    # Sums NightStats over the range: {room_type: ...} for by="room_type",
+    # {night: ...} over all types for by="night", or {None: ...} for the
+    # whole hotel with by=None. rooms and occupied become room-nights.
+    rolled = {}
+    for s in stats:
+        key = s.room_type if by == "room_type" else s.night if by == "night" else None
+        rooms, occupied, revenue = rolled.get(key, (0, 0, 0.0))
+        rolled[key] = (rooms + s.rooms, occupied + s.occupied, revenue + s.revenue)
+    return {
+        key: NightStats(
+            key if by == "night" else None,
+            key if by == "room_type" else None,
+            rooms,
+            occupied,
+            round(revenue, 2),
+        )
+        for key, (rooms, occupied, revenue) in rolled.items()
+    }
@@ -0,0 +1,211 @@
+import atexit
+import bisect
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds, from 50us to 10s.
+BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        # upper bound of the bucket holding the q-th observation
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS + (float("inf"),), self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return bound
+        return 0.0
+
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(key, extra=()):
+    pairs = [f'{name}="{escape(value)}"' for name, value in key + tuple(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Registry:
+    # Counters and latency histograms keyed by metric name and labels. Both
+    # hotel backends record into the module-level METRICS; it stays disabled
+    # (every call returns at the first check) until enable() or
+    # configure_from_env() turns it on. Updates take a lock, since the
+    # service calls the database from a thread pool.
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.trace_file = None
+
+    def enable(self, trace_path=None):
+        self.enabled = True
+        if trace_path:
+            self.trace_file = open(trace_path, "a", buffering=1)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+            if self.trace_file is not None:
+                self.trace_file.write(
+                    json.dumps({"time": time.time(), "metric": name, "labels": labels, "seconds": seconds}) + "\n"
+                )
+
+    @contextmanager
+    def timer(self, name, **labels):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(name.replace("_seconds", "_errors_total"), **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed(self, name, **labels):
+        # decorator; the function name becomes the "function" label
+        def decorate(func):
+            function_labels = dict(labels, function=func.__name__)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.timer(name, **function_labels):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    def snapshot(self):
+        with self.lock:
+            counters = [
+                {"name": name, "labels": dict(key), "value": value}
+                for (name, key), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(key),
+                    "count": h.count,
+                    "sum": h.sum,
+                    "p50": h.quantile(0.5),
+                    "p99": h.quantile(0.99),
+                    "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], h.buckets)),
+                }
+                for (name, key), h in sorted(self.histograms.items())
+            ]
+        return {"counters": counters, "histograms": histograms}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        lines = []
+        with self.lock:
+            typed = set()
+            for (name, key), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{format_labels(key)} {value}")
+            for (name, key), h in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, n in zip(BUCKETS + ("+Inf",), h.buckets):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{format_labels(key, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(key)} {h.sum}")
+                lines.append(f"{name}_count{format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        # .prom/.txt files get the Prometheus text format, anything else JSON
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w") as f:
+            f.write(text)
+
+
+METRICS = Registry()
+timed = METRICS.timed
+
+
+def start_profiling(path):
+    # cProfile the whole process and write pstats to `path` on exit
+    # (inspect with `python -m pstats path`)
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def stop():
+        profiler.disable()
+        profiler.dump_stats(path)
+
+    atexit.register(stop)
+    return profiler
+
+
+def configure_from_env():
+    # HOTEL_METRICS=1           record metrics
+    # HOTEL_METRICS_FILE=path   ...and write them there on exit (implies HOTEL_METRICS)
+    # HOTEL_TRACE=path          ...and append every timed call to path as JSON lines
+    # HOTEL_PROFILE=path        run under cProfile and dump the stats on exit
+    metrics_file = os.environ.get("HOTEL_METRICS_FILE")
+    trace_path = os.environ.get("HOTEL_TRACE")
+    if os.environ.get("HOTEL_METRICS") or metrics_file or trace_path:
+        METRICS.enable(trace_path)
+    if metrics_file:
+        atexit.register(METRICS.dump, metrics_file)
+    if os.environ.get("HOTEL_PROFILE"):
+        start_profiling(os.environ["HOTEL_PROFILE"])
@@ -0,0 +1,115 @@
+import collections
+import csv
+import datetime
+import os
+
+# reservations.csv as both backends write it. Change Sequence orders every
+# create, edit and cancellation in one store: whatever changed after a
+# sequence number (a watermark) is exactly the rows with a higher one.
+CSV_HEADER = [
+    "Reservation ID", "Guest Name", "Room Number", "Room Type",
+    "Check-in Date", "Check-out Date", "Total Cost", "Change Sequence",
+]
+
+# An export adds a Cancelled column: "yes" for a reservation cancelled
+# since the watermark, which then has no other fields but its ID and
+# sequence. A full reservations.csv reads as an export with no
+# cancellations, and so does one saved before sequences were added.
+EXPORT_HEADER = CSV_HEADER + ["Cancelled"]
+
+# rows read or written per chunk; memory use is bounded by one chunk
+CHUNK_ROWS = 1000
+
+ExportRow = collections.namedtuple(
+    "ExportRow",
+    "reservation_id guest_name room_number room_type check_in check_out total_cost sequence cancelled",
+)
+
+ImportResult = collections.namedtuple("ImportResult", "applied cancelled skipped")
+
+
+def cancelled_row(reservation_id, sequence):
+    return ExportRow(reservation_id, None, None, None, None, None, None, sequence, True)
+
+
+def format_row(row):
+    if row.cancelled:
+        return [row.reservation_id, "", "", "", "", "", "", row.sequence, "yes"]
+    total = "" if row.total_cost is None else f"{row.total_cost:.2f}"
+    return [
+        row.reservation_id, row.guest_name, row.room_number, row.room_type,
+        row.check_in, row.check_out, total, row.sequence, "",
+    ]
+
+
+def parse_row(parts):
+    # an ExportRow, or None for a row that is too short or malformed
+    try:
+        sequence = int(parts[7]) if len(parts) > 7 and parts[7] else 0
+        if len(parts) > 8 and parts[8].strip().lower() in ("yes", "y", "true", "1"):
+            return cancelled_row(parts[0], sequence)
+        if len(parts) < 7:
+            return None
+        try:
+            room_number = int(parts[2])
+        except ValueError:
+            room_number = None  # placed by room type instead
+        try:
+            total = float(parts[6])
+        except ValueError:
+            total = None
+        return ExportRow(
+            parts[0],
+            parts[1],
+            room_number,
+            parts[3],
+            datetime.date.fromisoformat(parts[4]),
+            datetime.date.fromisoformat(parts[5]),
+            total,
+            sequence,
+            False,
+        )
+    except ValueError:
+        return None
+
+
+def chunked(rows, chunk_rows=CHUNK_ROWS):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_export(path, rows, since=0, chunk_rows=CHUNK_ROWS):
+    # Streams ExportRows, in sequence order, to `path` a chunk at a time,
+    # through a temporary file renamed into place once complete. Returns
+    # (rows written, watermark): the last sequence written, or `since` when
+    # nothing changed, to pass as `since` next time.
+    count = 0
+    watermark = since
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_HEADER)
+        for chunk in chunked(rows, chunk_rows):
+            writer.writerows(format_row(row) for row in chunk)
+            count += len(chunk)
+            watermark = chunk[-1].sequence
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+    return count, watermark
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    # Yields lists of at most chunk_rows ExportRows from an export or a
+    # reservations.csv, skipping the header and malformed rows.
+    with open(path, "r", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        parsed = (parse_row(parts) for parts in reader if parts)
+        yield from chunked((row for row in parsed if row is not None), chunk_rows)